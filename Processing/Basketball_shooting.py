@@ -3,8 +3,7 @@ import time
 import numpy as np
 import math
 import logging
-import torch
-from ultralytics import YOLO
+from app.services.model_registry import get_pose_model
 import os
 
 # 配置logger
@@ -57,9 +56,7 @@ class ShootingDetector:
         
         # 載入 YOLO-Pose 模型
         try:
-            # 確保模型文件路徑正確
-            model_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'yolov8n-pose.pt')
-            self.pose_model = YOLO(model_path)
+            self.pose_model = get_pose_model()
             logger.info("成功載入YOLO-Pose模型")
         except Exception as e:
             logger.error(f"載入YOLO-Pose模型失敗: {e}")
@@ -3,8 +3,7 @@ import time
 import numpy as np
 import math
 import logging
-import torch
-from ultralytics import YOLO
+from app.services.model_registry import get_pose_model
 
 # 配置logger
 logger = logging.getLogger(__name__)
@@ -56,7 +55,7 @@ class HandDominanceDetector:
         
         # 載入YOLO-Pose模型
         try:
-            self.pose_model = YOLO('yolov8n-pose.pt')
+            self.pose_model = get_pose_model()
             logger.info("成功載入YOLO-Pose模型")
         except Exception as e:
             logger.error(f"載入YOLO-Pose模型失敗: {e}")
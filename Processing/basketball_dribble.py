@@ -3,9 +3,9 @@ import time
 import numpy as np
 import math
 import logging
-import torch
-from ultralytics import YOLO
+from app.services.model_registry import get_pose_model
 import os
+from app.services.inference_scheduler import batched_model
 
 # 配置logger
 logger = logging.getLogger(__name__)
@@ -54,9 +54,8 @@ class DribbleDetector:
         
         # 載入 YOLO-Pose 模型
         try:
-            # 確保模型文件路徑正確
-            model_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'yolov8n-pose.pt')
-            self.pose_model = YOLO(model_path)
+            # 所有檢測器共用同一個模型，才能合併成批次推論
+            self.pose_model = batched_model(get_pose_model())
             logger.info("成功載入YOLO-Pose模型")
         except Exception as e:
             logger.error(f"載入YOLO-Pose模型失敗: {e}")
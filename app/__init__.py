@@ -58,7 +58,13 @@ def create_app(config_name='development'):
     # 日誌配置已在 run.py 中完成，這裡不再重複配置
     
     # 初始化擴充
-    socketio.init_app(app)
+    # 設定訊息佇列時，任何節點發出的事件都經佇列轉送給連線所在的節點（多節點部署）
+    # 非同步模式由 SOCKETIO_ASYNC_MODE 決定，eventlet/gevent 須由 serve.py 先替換標準函式庫
+    socketio_options = {'async_mode': getattr(Config, 'SOCKETIO_ASYNC_MODE', 'threading')}
+    message_queue = getattr(Config, 'SOCKETIO_MESSAGE_QUEUE', None)
+    if message_queue:
+        socketio_options['message_queue'] = message_queue
+    socketio.init_app(app, **socketio_options)
     login_manager.init_app(app)
     bcrypt.init_app(app)
     
@@ -93,27 +99,16 @@ def create_app(config_name='development'):
     from app.routes.continuous_defense_routes import continuous_defense_bp
     app.register_blueprint(continuous_defense_bp)
     
-    # 初始化模型 - 統一在應用上下文中載入
-    with app.app_context():
-        # 載入姿態檢測模型
-        from app.services.pose_detection import load_models
-        try:
-            load_models()
-            app.logger.info("姿態檢測模型載入成功")
-        except Exception as e:
-            app.logger.error(f"載入姿態檢測模型失敗: {e}")
-        
-        # 載入運動分類模型（只載入一次）
-        from app.services import exercise_service
-        try:
-            if hasattr(exercise_service, 'init_models'):
-                exercise_service.init_models()
-                app.logger.info("運動檢測模型載入成功")
-            else:
-                exercise_service.load_exercise_models()
-                app.logger.info("運動檢測模型載入成功")
-        except Exception as e:
-            app.logger.error(f"載入運動檢測模型失敗: {e}")
+    # 模型在背景執行緒中載入與預熱，非視覺路由（登入、儀表板、分析）不必等待；
+    # 就緒狀態可由 GET /api/ready 查詢
+    from app.services.model_warmup import start_model_warmup
+    start_model_warmup(app)
+
+    # 登錄本節點，供其他節點導向檢測會話
+    import multiprocessing
+    if multiprocessing.parent_process() is None:
+        from app.services.node_registry import get_node_registry
+        get_node_registry().start()
     
     # 設置錯誤處理
     @app.errorhandler(404)
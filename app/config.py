@@ -14,6 +14,26 @@ class Config:
         'password': '1234',
         'database': 'nkust_exercise'
     } #no!!
+
+    # 資料庫連線池設定 - get_db_connection() 取自連線池，close() 時歸還而非真正關閉
+    DB_POOL_SIZE = 5              # 常駐的連線數
+    DB_POOL_MAX_OVERFLOW = 10     # 忙碌時可額外建立的臨時連線數（歸還時關閉）
+    DB_POOL_TIMEOUT = 10.0        # 連線用盡時等待歸還的秒數
+    DB_POOL_RECYCLE = 3600        # 連線使用超過此秒數後重新建立（需小於 MySQL wait_timeout）
+    DB_POOL_PING_INTERVAL = 0     # 閒置超過此秒數的連線取出時先 ping，0 表示每次都檢查
+
+    # 使用者快取設定 - Flask-Login 每個請求載入的使用者物件，修改個人資料或密碼時清除
+    USER_CACHE_SIZE = 1024        # 最多快取的使用者數
+    USER_CACHE_TTL = 60           # 快取秒數，其他程序修改資料後最多延遲此時間生效
+
+    # 儀表板快取設定 - 每位使用者的健身儀表板統計，寫入新的運動紀錄時清除
+    DASHBOARD_CACHE_SIZE = 512    # 最多快取的使用者數
+    DASHBOARD_CACHE_TTL = 30      # 快取秒數
+
+    # 運動紀錄分頁設定 - /api/dashboard_data 每頁筆數
+    DASHBOARD_DATA_PAGE_SIZE = 100      # 未指定 limit 時的筆數
+    DASHBOARD_DATA_MAX_PAGE_SIZE = 1000  # limit 的上限
+
     @staticmethod
     def init_app(app):
         pass
@@ -34,6 +54,77 @@ class Config:
         'dumbbell-row': os.path.join('static', 'models', 'YOLO_MODLE', 'dumbbell_row', 'row_best.pt'),
         'pose': os.path.join('static', 'models', 'YOLO_MODLE', 'pose', 'yolov8n-pose.pt')
     }
+
+    # 模型登錄表設定 - 每個權重檔只載入一次，分類模型第一次使用時才載入
+    MODEL_REGISTRY_MAX_CLASSIFIERS = 4         # 同時保留的分類模型上限，超過時釋放最久未使用的，0 表示不限制
+    MODEL_REGISTRY_PRELOAD_CLASSIFIERS = False  # 啟動時預先載入所有分類模型
+
+    # 推論後端 - 'torch'（PyTorch 權重）、'onnx'（onnxruntime）、'openvino'，
+    # 或 'auto'（依序尋找 OpenVINO、ONNX 匯出模型）。匯出模型以 scripts/export_models.py 產生，
+    # 找不到時退回 PyTorch 權重
+    INFERENCE_BACKEND = 'torch'
+
+    # INT8 量化姿態模型 - 使用 scripts/calibrate_int8.py 以錄影校正產生的 OpenVINO INT8 模型，
+    # 預設只有校正報告中關鍵點誤差與計數一致性都在門檻內時才會載入
+    POSE_INT8 = False
+    POSE_INT8_REQUIRE_CALIBRATION = True
+
+    # 模型預熱設定 - 啟動時在背景載入模型，每個模型以空白影像先推論一次
+    MODEL_WARMUP_BACKGROUND = True  # False 時在 create_app 中同步載入
+    MODEL_WARMUP_INFERENCE = True
+    MODEL_WARMUP_IMGSZ = 640
+
+    # 推論執行緒與併發設定 - threading 模式下多個會話同時呼叫模型，每個推論都會
+    # 使用全部核心而互相搶佔；限制同時推論數量並把核心平均分給每個推論
+    TORCH_INTRA_OP_THREADS = 0     # 單一推論的執行緒數，0 表示 CPU 核心數 / MAX_CONCURRENT_INFERENCES
+    TORCH_INTER_OP_THREADS = 1     # 運算子間平行執行緒數，YOLO 推論幾乎沒有可平行的分支
+    MAX_CONCURRENT_INFERENCES = 2  # 全程序同時進行的模型呼叫上限，0 表示不限制
+
+    # 多程序姿態推論池 - 姿態推論分散到多個工作程序，繞過單一程序的 GIL 限制；
+    # 影像經共享記憶體傳遞，同一會話固定由同一個工作程序處理
+    POSE_WORKER_POOL = False
+    POSE_WORKER_COUNT = 0                          # 工作程序數量，0 表示 CPU 核心數的一半
+    POSE_WORKER_SLOTS = 4                          # 每個工作程序同時處理的影像上限
+    POSE_WORKER_MAX_FRAME_BYTES = 1920 * 1080 * 3  # 單一影像大小上限，超過時改在主程序推論
+    POSE_WORKER_TIMEOUT = 5.0                      # 等待推論結果的秒數
+
+    # 批次推論設定 - 多個會話共用同一個姿態模型時合併成批次推論
+    INFERENCE_BATCHING = True
+    INFERENCE_BATCH_SIZE = 8          # 單一批次最多幀數
+    INFERENCE_BATCH_MAX_WAIT_MS = 8   # 等待湊批次的最長時間（毫秒）
+
+    # 客戶端上傳影像設定 - 瀏覽器以 client_frame 事件傳送壓縮影像，伺服器不需本地攝影機
+    CLIENT_FRAME_MAX_BYTES = 1024 * 1024  # 單幀上限（與 Socket.IO 預設訊息大小上限一致）
+    CLIENT_FRAME_SIZE = 720               # 解碼後縮放的正方形邊長，與攝影機擷取一致
+
+    # 影像環形緩衝區 - 擷取端直接寫入預先配置的影像格，處理端就地讀取，不需每幀配置與複製
+    FRAME_RING_SLOTS = 4       # 影像格數（寫入中、信箱中、處理中各佔一格，另留一格備用）
+    FRAME_RING_SHARED = True   # 配置在共享記憶體，其他程序可依名稱存取
+
+    # 多節點部署設定 - 多個應用節點在負載平衡器後方時，Socket.IO 事件經訊息佇列轉送，
+    # 檢測會話固定由持有其模型狀態的節點處理。單節點部署維持 None
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')  # 例如 'redis://redis:6379/0'，測試可用 'memory://'
+    NODE_REGISTRY_URL = os.environ.get('NODE_REGISTRY_URL') or SOCKETIO_MESSAGE_QUEUE  # 節點登錄資料的 Redis 網址
+    NODE_ID = os.environ.get('NODE_ID')                    # 節點識別，預設為主機名稱與程序 ID
+    NODE_PUBLIC_URL = os.environ.get('NODE_PUBLIC_URL')    # 客戶端可直接連到本節點的網址，用於導向
+    NODE_MAX_SESSIONS = int(os.environ.get('NODE_MAX_SESSIONS', 0))  # 同時處理的檢測會話上限，0 表示不限制
+    NODE_HEARTBEAT_SECONDS = 5                             # 更新節點資訊的間隔，超過三倍間隔未更新視為離線
+    DETECTION_SESSION_GRACE_SECONDS = None                 # 斷線後保留檢測會話與歸屬的秒數，None 表示心跳間隔的三倍
+
+    # 非同步伺服器設定 - serve.py 以 eventlet/gevent 協程處理連線，閒置連線不佔用作業系統執行緒；
+    # 推論與資料庫等阻塞操作交給 OFFLOAD_THREADS 個作業系統執行緒。run.py 維持 threading 模式
+    SOCKETIO_ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE', 'threading')  # 'threading'、'eventlet' 或 'gevent'
+    OFFLOAD_THREADS = int(os.environ.get('OFFLOAD_THREADS', 8))
+
+    # 分段影像管線設定 - 推論、編碼、發送各自在獨立執行緒中進行
+    PIPELINE_QUEUE_SIZE = 2  # 階段間佇列容量，已滿時丟棄最舊的幀
+
+    # 自適應推論設定 - 依實測每幀耗時調整姿態模型輸入尺寸與推論間隔
+    ADAPTIVE_INFERENCE = True
+    ADAPTIVE_TARGET_FPS = 15                 # 目標處理幀率
+    ADAPTIVE_IMGSZ_CHOICES = (320, 480, 640)  # 可選的模型輸入尺寸
+    ADAPTIVE_MAX_STRIDE = 3                  # 最多每幾幀推論一次，其餘幀由追蹤器推算關鍵點
+    POSE_INFERENCE_MAX_FPS = 0               # 姿態推論頻率上限（例如 10），0 表示不限制
     
     # 確保上傳目錄存在
     @staticmethod
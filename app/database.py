@@ -1,29 +1,320 @@
 import mysql.connector
 import sys
 import os
+import time
 import logging
+import threading
+import weakref
+import collections
+from contextlib import contextmanager
 from mysql.connector import Error
 from .config import Config  # 引入 Config 類
+from .utils.async_runtime import is_green
 logger = logging.getLogger(__name__)
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 
+class PooledConnection:
+    """從連線池取出的連線
+
+    用法與原本的 MySQL 連線相同，close() 時回滾未提交的交易並歸還連線池，
+    而不是真正關閉連線。忘記 close() 的連線在被回收時會關閉並釋放名額。
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._finalizer = weakref.finalize(self, pool._discard_leaked, raw)
+
+    def close(self):
+        """歸還連線池（重複呼叫無作用）"""
+        raw = self._raw
+        if raw is None:
+            return
+        self._raw = None
+        self._finalizer.detach()
+        self._pool._return(raw)
+
+    @property
+    def closed(self):
+        return self._raw is None
+
+    def is_connected(self):
+        """已歸還的連線視為未連線，讓「先檢查再關閉」的寫法重複執行時不會出錯"""
+        return self._raw is not None and self._raw.is_connected()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise AttributeError(f"連線已歸還連線池，無法使用 {name}")
+        return getattr(raw, name)
+
+
+class ConnectionPool:
+    """MySQL 連線池
+
+    保留 size 條閒置連線，忙碌時最多再建立 max_overflow 條臨時連線（歸還時關閉），
+    超過上限時等待其他連線歸還，逾時返回 None。取出時對閒置超過 ping_interval 秒的
+    連線做健康檢查，失效或超過 recycle 秒的連線會重新建立。
+    """
+
+    def __init__(self, config, size=5, max_overflow=10, timeout=10.0, recycle=3600, ping_interval=0):
+        """
+        Args:
+            config (dict): mysql.connector.connect 的連線參數
+            size (int): 常駐的連線數
+            max_overflow (int): 忙碌時可額外建立的連線數
+            timeout (float): 連線用盡時等待歸還的秒數
+            recycle (float): 連線使用超過此秒數後重新建立，0 表示不重建
+            ping_interval (float): 閒置超過此秒數的連線取出時先 ping，0 表示每次都檢查
+        """
+        self.config = dict(config)
+        self.size = max(1, int(size))
+        self.max_overflow = max(0, int(max_overflow))
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+
+        self._idle = collections.deque()  # (連線, 建立時間, 歸還時間)
+        self._created_at = {}             # id(連線) → 建立時間
+        self._open = 0                    # 已建立且未關閉的連線數（閒置 + 使用中）
+        self._cond = threading.Condition()
+
+        self.stats = {
+            'checkouts': 0,
+            'connects': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'max_wait': 0.0,
+            'timeouts': 0,
+            'ping_failures': 0,
+            'recycled': 0,
+            'reset_failures': 0,
+            'leaked': 0,
+            'connect_errors': 0,
+        }
+
+    def _connect(self):
+        raw = mysql.connector.connect(**self.config)
+        with self._cond:
+            self._created_at[id(raw)] = time.time()
+            self.stats['connects'] += 1
+        return raw
+
+    def _close_raw(self, raw):
+        with self._cond:
+            self._created_at.pop(id(raw), None)
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _healthy(self, raw, created_at, returned_at):
+        """取出前檢查閒置連線是否仍可用"""
+        now = time.time()
+        if self.recycle and now - created_at > self.recycle:
+            with self._cond:
+                self.stats['recycled'] += 1
+            return False
+        if now - returned_at < self.ping_interval:
+            return True
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Error:
+            with self._cond:
+                self.stats['ping_failures'] += 1
+            return False
+
+    def connect(self):
+        """取出一條連線
+
+        Returns:
+            PooledConnection: 連線，連線池用盡且等待逾時時返回 None
+
+        Raises:
+            Error: 無法建立新連線時
+        """
+        start = time.perf_counter()
+        waited = False
+        while True:
+            with self._cond:
+                item = self._idle.popleft() if self._idle else None
+                if item is None:
+                    if self._open < self.size + self.max_overflow:
+                        # 先佔用名額，建立連線期間不持有鎖
+                        self._open += 1
+                    else:
+                        if not waited:
+                            waited = True
+                            self.stats['waits'] += 1
+                        remaining = self.timeout - (time.perf_counter() - start)
+                        if remaining <= 0:
+                            self.stats['timeouts'] += 1
+                            logger.error(f"資料庫連線池已用盡（{self._open} 條使用中），等待 {self.timeout}s 逾時")
+                            return None
+                        self._cond.wait(remaining)
+                        continue
+
+            if item is not None:
+                raw, created_at, returned_at = item
+                if self._healthy(raw, created_at, returned_at):
+                    break
+                # 失效的閒置連線，名額沿用給新連線
+                self._close_raw(raw)
+            try:
+                raw = self._connect()
+            except Error:
+                with self._cond:
+                    self._open -= 1
+                    self.stats['connect_errors'] += 1
+                    self._cond.notify()
+                raise
+            break
+
+        with self._cond:
+            self.stats['checkouts'] += 1
+            if waited:
+                elapsed = time.perf_counter() - start
+                self.stats['wait_time'] += elapsed
+                self.stats['max_wait'] = max(self.stats['max_wait'], elapsed)
+        return PooledConnection(self, raw)
+
+    def _return(self, raw):
+        """歸還連線：回滾未提交的交易，常駐名額已滿或重設失敗時關閉"""
+        try:
+            if raw.is_connected():
+                raw.rollback()
+            else:
+                raise Error("連線已中斷")
+        except Exception:
+            with self._cond:
+                self.stats['reset_failures'] += 1
+            self._release(raw)
+            return
+
+        with self._cond:
+            if len(self._idle) < self.size:
+                self._idle.append((raw, self._created_at.get(id(raw), time.time()), time.time()))
+                self._cond.notify()
+                return
+        self._release(raw)
+
+    def _release(self, raw):
+        """關閉連線並釋放名額"""
+        self._close_raw(raw)
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def _discard_leaked(self, raw):
+        """未歸還就被回收的連線：關閉並釋放名額
+
+        回收可能發生在持有鎖的同一執行緒內，_cond 使用可重入鎖，不會死結。
+        """
+        with self._cond:
+            self.stats['leaked'] += 1
+        self._release(raw)
+
+    def dispose(self):
+        """關閉所有閒置連線（使用中的連線歸還時才關閉）"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for raw, _, _ in idle:
+            self._close_raw(raw)
+
+    def get_stats(self):
+        """取得連線池使用統計"""
+        with self._cond:
+            stats = dict(self.stats)
+            idle = len(self._idle)
+            stats.update({
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'idle': idle,
+                'in_use': self._open - idle,
+            })
+        checkouts = stats['checkouts']
+        stats['avg_wait_ms'] = stats['wait_time'] / stats['waits'] * 1000.0 if stats['waits'] else 0.0
+        stats['max_wait_ms'] = stats.pop('max_wait') * 1000.0
+        stats['reuse_ratio'] = 1.0 - stats['connects'] / checkouts if checkouts else 0.0
+        del stats['wait_time']
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """取得全程序共用的連線池（第一次使用時依 Config 建立）"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                db_config = Config.DB_CONFIG  # 使用 Config 中的 DB_CONFIG
+                _pool = ConnectionPool(
+                    {
+                        'host': db_config['host'],
+                        'database': db_config['database'],
+                        'user': db_config['user'],
+                        'password': db_config['password'],
+                        # 協程模式下使用純 Python 驅動，查詢等待走協程化的 socket，不會卡住其他連線
+                        'use_pure': is_green(),
+                    },
+                    size=getattr(Config, 'DB_POOL_SIZE', 5),
+                    max_overflow=getattr(Config, 'DB_POOL_MAX_OVERFLOW', 10),
+                    timeout=getattr(Config, 'DB_POOL_TIMEOUT', 10.0),
+                    recycle=getattr(Config, 'DB_POOL_RECYCLE', 3600),
+                    ping_interval=getattr(Config, 'DB_POOL_PING_INTERVAL', 0),
+                )
+    return _pool
+
+
 def get_db_connection():
-    """獲取數據庫連接"""
+    """獲取數據庫連接
+
+    連線取自連線池，呼叫 close() 即歸還；無法取得時返回 None。
+    """
     try:
-        db_config = Config.DB_CONFIG  # 使用 Config 中的 DB_CONFIG
-        conn = mysql.connector.connect(
-            host=db_config['host'],
-            database=db_config['database'],
-            user=db_config['user'],
-            password=db_config['password']
-        )
-        if conn.is_connected():
-            return conn
+        return get_pool().connect()
     except Error as e:
         logger.error(f"數據庫連接失敗: {e}")
         return None
 
+
+@contextmanager
+def db_connection():
+    """取得連線池中的連線，離開區塊時（包括發生例外）一定歸還
+
+    發生例外時先回滾再歸還，正常結束時不會自動提交。
+
+    Raises:
+        Error: 無法取得連線時
+    """
+    conn = get_db_connection()
+    if conn is None:
+        raise Error("無法取得資料庫連線")
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def get_pool_stats():
+    """取得連線池使用統計"""
+    return get_pool().get_stats()
+
 def test_db_connection():
     """測試數據庫連接"""
     try:
@@ -1,10 +1,16 @@
 import logging
 from flask_login import UserMixin
 from flask import current_app
+from app.config import Config
 from app.services.db_service import get_db_connection
+from app.utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# 已登入使用者的快取，Flask-Login 每個請求都會呼叫 load_user
+_user_cache = TTLCache(maxsize=getattr(Config, 'USER_CACHE_SIZE', 1024),
+                       ttl=getattr(Config, 'USER_CACHE_TTL', 60))
+
 class User(UserMixin):
     """使用者模型類"""
     
@@ -18,7 +24,14 @@ class User(UserMixin):
         return None
 
 def load_user(user_id):
-    """載入使用者的回調函數，供Flask-Login使用"""
+    """載入使用者的回調函數，供Flask-Login使用
+
+    先查快取，未命中時才查詢資料庫；修改使用者資料後須呼叫 invalidate_user()。
+    """
+    user = _user_cache.get(str(user_id))
+    if user is not None:
+        return user
+
     try:
         logger.debug(f"嘗試載入使用者ID: {user_id}")
         conn = get_db_connection()
@@ -27,14 +40,16 @@ def load_user(user_id):
             return None
             
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM users WHERE user_id = %s", (user_id,))
+        cursor.execute("SELECT user_id, username, role FROM users WHERE user_id = %s", (user_id,))
         user_data = cursor.fetchone()
         cursor.close()
         conn.close()
         
         if user_data:
             logger.debug(f"成功載入使用者: {user_data['username']}")
-            return User(user_data['user_id'], user_data['username'], user_data['role'])
+            user = User(user_data['user_id'], user_data['username'], user_data['role'])
+            _user_cache.set(str(user_id), user)
+            return user
         else:
             logger.warning(f"未找到使用者ID: {user_id}")
             return None
@@ -42,6 +57,14 @@ def load_user(user_id):
         logger.error(f"載入使用者時出錯: {e}")
         return None
 
+def invalidate_user(user_id):
+    """清除使用者快取，下一個請求重新從資料庫載入"""
+    _user_cache.invalidate(str(user_id))
+
+def get_user_cache_stats():
+    """取得使用者快取的命中統計"""
+    return _user_cache.get_stats()
+
 def user_exists(username):
     """檢查使用者名稱是否已存在"""
     conn = get_db_connection()
@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 from app.database import get_db_connection
+from app.services.stats_rollup import fetch_rollup
 import logging
 from datetime import datetime, timedelta
 import json
@@ -38,6 +39,22 @@ EXERCISE_MUSCLE_MAP = {
     }
 }
 
+# 最近的訓練記錄（沿 student_id + timestamp 索引倒序讀取）
+RECENT_RECORDS_QUERY = """
+    SELECT exercise_type, reps, weight, timestamp
+    FROM exercise_info
+    WHERE student_id = %s
+    ORDER BY timestamp DESC
+    LIMIT 10
+"""
+
+# 近一週的訓練次數（與原本 (now - timestamp).days <= 7 的判斷相同）
+RECENT_WEEK_QUERY = """
+    SELECT COUNT(*) AS count
+    FROM exercise_info
+    WHERE student_id = %s AND timestamp > %s
+"""
+
 @analytics_bp.route('/api/comprehensive-analytics', methods=['GET'])
 def get_comprehensive_analytics():
     """獲取綜合健身分析數據，結合體態數據和運動記錄"""
@@ -76,33 +93,37 @@ def get_comprehensive_analytics():
             actual_user_id = user_id
             logger.info(f"使用原始用戶ID: {actual_user_id}")
         
+        # 2. 獲取用戶所有體態數據（用於趨勢分析），最後一筆即最新體態數據
         cursor.execute(
-            "SELECT * FROM user_body_stats WHERE user_id = %s ORDER BY updated_at DESC LIMIT 1",
+            "SELECT * FROM user_body_stats WHERE user_id = %s ORDER BY updated_at ASC",
             (actual_user_id,)
         )
-        latest_body_stats = cursor.fetchone()
+        all_body_stats = cursor.fetchall()
+        latest_body_stats = all_body_stats[-1] if all_body_stats else None
         logger.info(f"最新體態數據: {latest_body_stats}")
         
-        # 2. 獲取用戶所有體態數據（用於趨勢分析）
+        # 3. 獲取每日運動彙總 - 使用用戶名查詢，列數與訓練天數成正比而非紀錄數
+        rollup_rows = fetch_rollup(cursor, user_id)
+        
+        # 最近的訓練記錄與近一週的訓練次數只讀取需要的紀錄
         cursor.execute(
-            "SELECT * FROM user_body_stats WHERE user_id = %s ORDER BY updated_at ASC",
-            (actual_user_id,)
+            RECENT_RECORDS_QUERY,
+            (user_id,)  # 直接使用傳入的用戶名
         )
-        all_body_stats = cursor.fetchall()
+        recent_records = cursor.fetchall()
         
-        # 3. 獲取運動記錄數據 - 使用用戶名查詢
         cursor.execute(
-            "SELECT * FROM exercise_info WHERE student_id = %s ORDER BY timestamp DESC",
-            (user_id,)  # 直接使用傳入的用戶名
+            RECENT_WEEK_QUERY,
+            (user_id, datetime.now() - timedelta(days=8))
         )
-        exercise_records = cursor.fetchall()
+        recent_week_count = cursor.fetchone()['count']
         
         cursor.close()
         conn.close()
         
         # 4. 計算綜合統計數據
         analytics_data = calculate_comprehensive_analytics(
-            latest_body_stats, all_body_stats, exercise_records
+            latest_body_stats, all_body_stats, rollup_rows, recent_records, recent_week_count
         )
         
         return jsonify({
@@ -117,36 +138,44 @@ def get_comprehensive_analytics():
             'message': '獲取分析數據失敗'
         }), 500
 
-def calculate_comprehensive_analytics(latest_body_stats, all_body_stats, exercise_records):
-    """計算綜合分析數據"""
+def calculate_comprehensive_analytics(latest_body_stats, all_body_stats, rollup_rows, recent_records, recent_week_count):
+    """計算綜合分析數據
+
+    Args:
+        rollup_rows (list): exercise_daily_rollup 中該用戶的每日、每種運動彙總
+        recent_records (list): 最近的運動記錄（依時間倒序）
+        recent_week_count (int): 近一週的運動記錄數
+    """
     
     # 基礎統計
-    total_weight = sum(record.get('weight', 0) for record in exercise_records)
-    total_exercises = len(exercise_records)
+    total_weight = sum(int(row['total_weight']) for row in rollup_rows)
+    total_exercises = sum(int(row['record_count']) for row in rollup_rows)
     
     # 計算總卡路里（基於體態數據調整）
+    # 逐筆的 base × reps × weight_factor × (1 + weight / 100) 加總後等於
+    # base × weight_factor × (Σreps + Σ(reps × weight) / 100)
     total_calories = 0
     user_weight = float(latest_body_stats['weight']) if latest_body_stats else 70.0  # 默認70kg，轉換為float
     
-    for record in exercise_records:
-        exercise_type = record.get('exercise_type', 'unknown')
-        reps = float(record.get('reps', 0))  # 轉換為float
-        weight = float(record.get('weight', 0))  # 轉換為float
+    for row in rollup_rows:
+        exercise_type = row['exercise_type']
+        reps = float(row['total_reps'])
+        weighted_reps = float(row['weighted_reps'])
         
         # 基礎卡路里計算
         base_calorie = EXERCISE_MUSCLE_MAP.get(exercise_type, {}).get('base_calorie', 0.3)
         # 根據用戶體重調整卡路里消耗
         weight_factor = user_weight / 70.0  # 以70kg為基準
-        calories = base_calorie * reps * weight_factor * (1 + weight / 100.0)
+        calories = base_calorie * weight_factor * (reps + weighted_reps / 100.0)
         total_calories += calories
     
     # 計算訓練時間（估算）
     total_training_time = total_exercises * 2  # 假設每組運動2分鐘
     
     # 計算訓練頻率
-    if exercise_records:
-        first_date = min(record['timestamp'] for record in exercise_records)
-        last_date = max(record['timestamp'] for record in exercise_records)
+    if rollup_rows:
+        first_date = min(row['first_at'] for row in rollup_rows)
+        last_date = max(row['last_at'] for row in rollup_rows)
         days_span = (last_date - first_date).days + 1
         weeks_span = max(1, days_span / 7.0)  # 確保除法結果為浮點數
         training_frequency = total_exercises / weeks_span if weeks_span > 0 else 0
@@ -157,16 +186,16 @@ def calculate_comprehensive_analytics(latest_body_stats, all_body_stats, exercis
     body_trends = analyze_body_trends(all_body_stats)
     
     # 運動表現趨勢
-    exercise_trends = analyze_exercise_trends(exercise_records)
+    exercise_trends = analyze_exercise_trends(rollup_rows)
     
     # 肌肉群發展分析
-    muscle_development = analyze_muscle_development(exercise_records)
+    muscle_development = analyze_muscle_development(rollup_rows)
     
     # 運動類型統計
-    exercise_stats = analyze_exercise_types(exercise_records)
+    exercise_stats = analyze_exercise_types(rollup_rows)
     
     # 最近訓練記錄
-    recent_exercises = get_recent_exercises(exercise_records, limit=10)
+    recent_exercises = get_recent_exercises(recent_records, limit=10)
     
     # BMI變化趨勢
     bmi_trend = calculate_bmi_trend(all_body_stats)
@@ -190,7 +219,7 @@ def calculate_comprehensive_analytics(latest_body_stats, all_body_stats, exercis
             'exercise_stats': exercise_stats,
             'recent_exercises': recent_exercises
         },
-        'insights': generate_insights(latest_body_stats, exercise_records, muscle_development)
+        'insights': generate_insights(latest_body_stats, total_exercises, recent_week_count, muscle_development)
     }
 
 def analyze_body_trends(all_body_stats):
@@ -211,15 +240,15 @@ def analyze_body_trends(all_body_stats):
     
     return trend_data
 
-def analyze_exercise_trends(exercise_records):
+def analyze_exercise_trends(rollup_rows):
     """分析運動表現趨勢"""
-    if not exercise_records:
+    if not rollup_rows:
         return []
     
-    # 按日期分組計算每日數據
+    # 按日期合併各運動類型的彙總
     daily_data = {}
-    for record in exercise_records:
-        date_str = record['timestamp'].strftime('%Y-%m-%d')
+    for row in rollup_rows:
+        date_str = row['day'].strftime('%Y-%m-%d')
         if date_str not in daily_data:
             daily_data[date_str] = {
                 'total_weight': 0, 
@@ -228,13 +257,13 @@ def analyze_exercise_trends(exercise_records):
                 'total_reps': 0
             }
         
-        exercise_type = record.get('exercise_type', 'unknown')
-        reps = float(record.get('reps', 0))
-        weight = float(record.get('weight', 0))
+        exercise_type = row['exercise_type']
+        reps = float(row['total_reps'])
+        weight = float(row['total_weight'])
         
         # 累加數據
         daily_data[date_str]['total_weight'] += weight
-        daily_data[date_str]['exercise_count'] += 1
+        daily_data[date_str]['exercise_count'] += int(row['record_count'])
         daily_data[date_str]['total_reps'] += reps
         
         # 計算卡路里
@@ -264,16 +293,18 @@ def analyze_exercise_trends(exercise_records):
     
     return trend_data
 
-def analyze_muscle_development(exercise_records):
+def analyze_muscle_development(rollup_rows):
     """分析肌肉群發展"""
     muscle_groups = {
         'chest': 0, 'arms': 0, 'shoulders': 0, 'core': 0, 'legs': 0, 'back': 0
     }
     
-    for record in exercise_records:
-        exercise_type = record.get('exercise_type', 'unknown')
-        reps = float(record.get('reps', 0))  # 轉換為float
-        
+    # 先依運動類型加總次數，每種類型只對應一次肌肉群
+    reps_by_type = {}
+    for row in rollup_rows:
+        reps_by_type[row['exercise_type']] = reps_by_type.get(row['exercise_type'], 0.0) + float(row['total_reps'])
+    
+    for exercise_type, reps in reps_by_type.items():
         if exercise_type in EXERCISE_MUSCLE_MAP:
             muscle_info = EXERCISE_MUSCLE_MAP[exercise_type]
             
@@ -315,14 +346,14 @@ def analyze_muscle_development(exercise_records):
     
     return muscle_groups
 
-def analyze_exercise_types(exercise_records):
+def analyze_exercise_types(rollup_rows):
     """分析運動類型統計"""
     exercise_counts = {}
-    for record in exercise_records:
-        exercise_type = record.get('exercise_type', 'unknown')
+    for row in rollup_rows:
+        exercise_type = row['exercise_type']
         if exercise_type not in exercise_counts:
             exercise_counts[exercise_type] = 0
-        exercise_counts[exercise_type] += 1
+        exercise_counts[exercise_type] += int(row['record_count'])
     
     # 轉換為列表格式並排序
     stats = []
@@ -358,7 +389,7 @@ def calculate_bmi_trend(all_body_stats):
     
     return trend
 
-def generate_insights(latest_body_stats, exercise_records, muscle_development):
+def generate_insights(latest_body_stats, total_exercises, recent_week_count, muscle_development):
     """生成健身建議和洞察"""
     insights = []
     
@@ -398,15 +429,14 @@ def generate_insights(latest_body_stats, exercise_records, muscle_development):
             })
     
     # 訓練頻率建議
-    if len(exercise_records) > 0:
-        recent_week = [r for r in exercise_records if (datetime.now() - r['timestamp']).days <= 7]
-        if len(recent_week) < 3:
+    if total_exercises > 0:
+        if recent_week_count < 3:
             insights.append({
                 'type': 'warning',
                 'title': '訓練頻率偏低',
                 'message': '建議每週至少進行3次訓練，以維持良好的健身效果。'
             })
-        elif len(recent_week) > 6:
+        elif recent_week_count > 6:
             insights.append({
                 'type': 'info',
                 'title': '訓練頻率很高',
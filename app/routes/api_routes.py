@@ -1,6 +1,11 @@
 from flask import Blueprint, jsonify, request, current_app
 from flask_login import current_user, login_required
-from app.services.db_service import get_db_connection
+from app.services.db_service import get_db_connection, get_pool_stats
+from app.services import model_warmup
+from app.services.node_registry import get_node_registry
+from app.models.user import get_user_cache_stats
+from app.services import dashboard_service
+from app.utils import async_runtime
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,6 +27,39 @@ def get_user_status():
             'authenticated': False
         })
 
+@api_bp.route('/ready', methods=['GET'])
+def get_ready_status():
+    """模型就緒狀態 - 模型載入與預熱完成前返回 503，供部署時的健康檢查使用"""
+    status = model_warmup.get_status()
+    return jsonify({'success': status['ready'], **status}), 200 if status['ready'] else 503
+
+@api_bp.route('/nodes', methods=['GET'])
+def get_nodes():
+    """節點狀態 - 本節點的會話數、容量與執行緒數，以及所有仍在更新的節點"""
+    registry = get_node_registry()
+    return jsonify({
+        'success': True,
+        'node': registry.get_stats(),
+        'runtime': async_runtime.get_stats(),
+        'nodes': registry.list_nodes(),
+        'has_capacity': registry.has_capacity()
+    })
+
+@api_bp.route('/db_pool', methods=['GET'])
+def get_db_pool_status():
+    """資料庫連線池統計 - 使用中/閒置連線數、等待與逾時次數、連線重用比例"""
+    return jsonify({'success': True, 'pool': get_pool_stats()})
+
+@api_bp.route('/user_cache', methods=['GET'])
+def get_user_cache_status():
+    """使用者快取統計 - 命中、未命中、過期與清除次數"""
+    return jsonify({'success': True, 'cache': get_user_cache_stats()})
+
+@api_bp.route('/dashboard_cache', methods=['GET'])
+def get_dashboard_cache_status():
+    """儀表板快取統計 - 命中、未命中、過期與清除次數"""
+    return jsonify({'success': True, 'cache': dashboard_service.get_cache_stats()})
+
 @api_bp.route('/discussions', methods=['GET'])
 def get_discussions():
     """取得課程討論列表"""
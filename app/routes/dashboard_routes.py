@@ -1,16 +1,189 @@
-from flask import Blueprint, jsonify, request, render_template
+from flask import Blueprint, jsonify, request, render_template, Response, stream_with_context
 from flask_login import current_user, login_required
+from app.config import Config
 from app.database import get_db_connection  # 使用統一的資料庫連接函數
 import mysql.connector
+import base64
+import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 
 dashboard_bp = Blueprint('dashboard', __name__)
 logger = logging.getLogger(__name__)
 
+# 可透過 fields 參數選取的欄位（輸出名稱 → SQL 欄位），未指定時輸出原本的欄位
+RECORD_FIELDS = {
+    'id': 'id',
+    'student_id': 'student_id',
+    'weight': 'weight',
+    'reps': 'reps',
+    'sets': 'sets',
+    'exercise_type': 'exercise_type',
+    'date': 'timestamp',
+    'total_count': 'total_count',
+    'game_level': 'game_level',
+}
+DEFAULT_FIELDS = ['id', 'student_id', 'weight', 'reps', 'sets', 'exercise_type', 'date']
+
+# 串流輸出時每次從資料庫取回的筆數
+FETCH_BATCH = 200
+
+
+def encode_cursor(timestamp, record_id):
+    """把最後一筆紀錄的 (timestamp, id) 編成不透明的分頁游標"""
+    raw = json.dumps([timestamp.strftime('%Y-%m-%d %H:%M:%S'), record_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """解析分頁游標，格式錯誤時拋出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('utf-8')
+        timestamp, record_id = json.loads(raw)
+        return datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S'), int(record_id)
+    except Exception:
+        raise ValueError('無效的 cursor 參數')
+
+
+def parse_time_filter(value, end=False):
+    """解析 from/to 參數，只有日期時 to 包含當天整天
+
+    Returns:
+        datetime: 起始時間（包含）或結束時間（不包含），未提供時返回 None
+    """
+    if not value:
+        return None
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d'):
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if end:
+            return parsed + timedelta(days=1) if fmt == '%Y-%m-%d' else parsed + timedelta(seconds=1)
+        return parsed
+    raise ValueError(f'無效的日期參數: {value}')
+
+
+def parse_page_args(args):
+    """解析分頁、篩選與欄位參數，參數錯誤時拋出 ValueError
+
+    Returns:
+        dict: limit、fields、cursor、student_id、start、end
+    """
+    page_size = getattr(Config, 'DASHBOARD_DATA_PAGE_SIZE', 100)
+    max_page_size = getattr(Config, 'DASHBOARD_DATA_MAX_PAGE_SIZE', 1000)
+    try:
+        limit = int(args.get('limit', page_size))
+    except ValueError:
+        raise ValueError('limit 必須是整數')
+    if limit < 1:
+        raise ValueError('limit 必須大於 0')
+
+    fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()] or DEFAULT_FIELDS
+    unknown = [f for f in fields if f not in RECORD_FIELDS]
+    if unknown:
+        raise ValueError(f'不支援的欄位: {", ".join(unknown)}')
+
+    token = args.get('cursor')
+    return {
+        'limit': min(limit, max_page_size),
+        'fields': list(dict.fromkeys(fields)),
+        'cursor': decode_cursor(token) if token else None,
+        'student_id': args.get('student_id') or None,
+        'start': parse_time_filter(args.get('from')),
+        'end': parse_time_filter(args.get('to'), end=True),
+    }
+
+
+def build_page_query(page):
+    """組成 keyset 分頁查詢
+
+    依 (timestamp, id) 倒序，下一頁從游標之後開始，每頁只讀取 limit + 1 筆
+    （多讀的一筆用來判斷是否還有下一頁），成本與資料表大小無關。
+    timestamp 索引（InnoDB 的二級索引隱含主鍵 id）提供這個順序。
+    """
+    columns = [f"{RECORD_FIELDS[name]} AS `{name}`" for name in page['fields']]
+    columns += ['timestamp AS _cursor_timestamp', 'id AS _cursor_id']
+    conditions, params = [], []
+
+    if page['student_id']:
+        conditions.append('student_id = %s')
+        params.append(page['student_id'])
+    if page['start']:
+        conditions.append('timestamp >= %s')
+        params.append(page['start'])
+    if page['end']:
+        conditions.append('timestamp < %s')
+        params.append(page['end'])
+    if page['cursor']:
+        timestamp, record_id = page['cursor']
+        conditions.append('(timestamp < %s OR (timestamp = %s AND id < %s))')
+        params.extend([timestamp, timestamp, record_id])
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    query = f"""
+        SELECT {', '.join(columns)}
+        FROM exercise_info
+        {where}
+        ORDER BY timestamp DESC, id DESC
+        LIMIT %s
+    """
+    params.append(page['limit'] + 1)
+    return query, params
+
+
+def stream_page(connection, cursor, limit):
+    """逐批輸出查詢結果的 JSON，結束時歸還連線
+
+    輸出格式為 {"success": true, "records": [...], "next_cursor": ..., "has_more": ...}，
+    逐筆序列化，不必先組成整頁的回應字串。
+    """
+    count = 0
+    last = None
+    has_more = False
+    try:
+        yield '{"success": true, "records": ['
+        while True:
+            rows = cursor.fetchmany(FETCH_BATCH)
+            if not rows:
+                break
+            for row in rows:
+                if count == limit:
+                    has_more = True
+                    continue
+                last = (row.pop('_cursor_timestamp'), row.pop('_cursor_id'))
+                if isinstance(row.get('date'), datetime):
+                    row['date'] = row['date'].strftime('%Y-%m-%d %H:%M:%S')
+                yield (',' if count else '') + json.dumps(row, ensure_ascii=False, default=str)
+                count += 1
+        next_cursor = encode_cursor(*last) if has_more else None
+        yield f'], "next_cursor": {json.dumps(next_cursor)}, "has_more": {json.dumps(has_more)}}}'
+        logger.info(f"成功取得{count}筆運動紀錄")
+    except Exception as e:
+        # 回應已開始傳送，只能中斷輸出並記錄錯誤
+        logger.error(f"輸出運動紀錄時發生錯誤: {e}")
+        raise
+    finally:
+        cursor.close()
+        connection.close()
+
+
 @dashboard_bp.route('/api/dashboard_data', methods=['GET'])
 def get_dashboard_data():
-    """取得儀表板資料"""
+    """取得儀表板資料（分頁）
+
+    查詢參數:
+        limit: 每頁筆數，預設 DASHBOARD_DATA_PAGE_SIZE，上限 DASHBOARD_DATA_MAX_PAGE_SIZE
+        cursor: 上一頁回應的 next_cursor
+        student_id: 只取得指定學號的紀錄
+        from / to: 時間範圍（YYYY-MM-DD 或 YYYY-MM-DD HH:MM:SS，只有日期時 to 包含當天）
+        fields: 以逗號分隔的輸出欄位，預設 id,student_id,weight,reps,sets,exercise_type,date
+    """
+    try:
+        page = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
     try:
         # 連結數據庫
         connection = get_db_connection()
@@ -18,32 +191,18 @@ def get_dashboard_data():
             logger.error("無法連線到資料庫")
             return jsonify({'success': False, 'message': '資料庫連線失敗'}), 500
         
-        cursor = connection.cursor(dictionary=True)
-        
-        # 查詢exercise_info表中的所有紀錄
-        cursor.execute("""
-            SELECT id, student_id, weight, reps, sets, exercise_type, timestamp as date
-            FROM exercise_info
-            ORDER BY timestamp DESC
-        """)
-        
-        records = cursor.fetchall()
+        try:
+            # 每頁最多 limit + 1 筆，使用緩衝 cursor，客戶端中途斷線時連線也能直接歸還
+            cursor = connection.cursor(dictionary=True, buffered=True)
+            query, params = build_page_query(page)
+            cursor.execute(query, params)
+        except Exception:
+            connection.close()
+            raise
         
-        # 轉換日期格式，確保JSON可序列化
-        for record in records:
-            if isinstance(record['date'], datetime):
-                record['date'] = record['date'].strftime('%Y-%m-%d %H:%M:%S')
-        
-        cursor.close()
-        connection.close()
-        
-        logger.info(f"成功取得{len(records)}筆運動紀錄")
-        
-        # 返回JSON格式的數據
-        return jsonify({
-            'success': True,
-            'records': records
-        })
+        # 查詢成功後才開始串流，連線在輸出結束時歸還
+        return Response(stream_with_context(stream_page(connection, cursor, page['limit'])),
+                        mimetype='application/json')
     
     except Exception as e:
         logger.error(f"取得儀表板資料時發生錯誤: {e}")
@@ -8,8 +8,9 @@ from app import socketio
 from app.services import exercise_service
 from app.services.camera_service import get_camera, get_current_frame, release_camera
 import base64
+import numpy as np
 from datetime import datetime
-import queue
+from app.config import Config
 from app.services.db_service import get_db_connection
 
 from flask import send_file # 需要導入 send_file
@@ -23,74 +24,34 @@ from app.services.basketball_service import BasketballService
 from app.services.basketball_dribble_service import BasketballDribbleService
 from app.services.volleyball_service import VolleyballService
 from app.services.taekwondo_service import get_taekwondo_service
+from app.services.detection_session import get_session, remove_session, resume_session, bind_session, latest_active_session, list_sessions
+from app.services.frame_pipeline import FramePipeline
+from app.utils.frame_ring import FrameSlot
+from app.services.inference_scheduler import get_scheduler_stats
+from app.services.model_registry import get_model_registry
+from app.services import model_warmup
+from app.services import inference_limits
+from app.services.pose_worker_pool import get_pose_worker_pool
+from app.services.node_registry import get_node_registry
+from app.utils.async_runtime import offload
+from app.services.dashboard_service import invalidate_user_stats
+from app.services.stats_rollup import record_exercise
 import uuid
 
 
-# 初始化桌球揮拍相關的全域變數
-# table_tennis_active: 用於追蹤桌球揮拍檢測是否啟用
-# table_tennis_session_id: 用於識別當前桌球揮拍檢測會話
-table_tennis_active = False
-table_tennis_session_id = None
-
-# 初始化籃球投籃相關的全域變數
-# basketball_active: 用於追蹤籃球投籃檢測是否啟用
-# basketball_session_id: 用於識別當前籃球投籃檢測會話
-basketball_active = False
-basketball_session_id = None
-
-# 在全局變量部分添加
-# 初始化籃球運球相關的全域變數
-basketball_dribble_active = False
-basketball_dribble_session_id = None
-
-# 初始化排球相關的全域變數
-# volleyball_overhand_active: 用於追蹤排球高手托球檢測是否啟用
-# volleyball_overhand_session_id: 用於識別當前排球高手托球檢測會話
-volleyball_overhand_active = False
-volleyball_overhand_session_id = None
-
-# volleyball_lowhand_active: 用於追蹤排球低手接球檢測是否啟用
-# volleyball_lowhand_session_id: 用於識別當前排球低手接球檢測會話
-volleyball_lowhand_active = False
-volleyball_lowhand_session_id = None
-
-# 初始化雙手輪流擺動熱身運動相關的全域變數
-# alternating_arm_swing_active: 用於追蹤雙手輪流擺動熱身運動檢測是否啟用
-# alternating_arm_swing_session_id: 用於識別當前雙手輪流擺動熱身運動檢測會話
-alternating_arm_swing_active = False
-alternating_arm_swing_session_id = None
-
-# 初始化平板支撐相關的全域變數
-# plank_active: 用於追蹤平板支撐檢測是否啟用
-# plank_session_id: 用於識別當前平板支撐檢測會話
-plank_active = False
-plank_session_id = None
-
-# 初始化跆拳道詳細檢測相關的全域變數
-# taekwondo_detail_active: 用於追蹤跆拳道詳細檢測是否啟用
-# taekwondo_detail_session_id: 用於識別當前跆拳道詳細檢測會話
-taekwondo_detail_active = False
-taekwondo_detail_session_id = None
-
-# 檢查並初始化運動模型
-# 如果運動服務尚未載入模型，則進行初始化
-if not hasattr(exercise_service, 'exercise_models') or exercise_service.exercise_models is None:
-    exercise_service.init_models()
-
 # 創建運動藍圖，設定URL前綴為/exercise
 exercise_bp = Blueprint('exercise', __name__, url_prefix='/exercise')
 # 初始化日誌記錄器
 logger = logging.getLogger(__name__)
 
-# 創建影像緩衝區，用於存儲原始和處理後的影像幀
-# 減少緩衝區大小以降低記憶體使用
-frame_buffer = queue.Queue(maxsize=1)
-processed_frame_buffer = queue.Queue(maxsize=1)
+# 影像緩衝區、檢測狀態與各模式的會話 ID 都保存在每個連線的 DetectionSession 中
+
+# 等待新幀的逾時秒數，僅用於定期檢查檢測是否已停止，不影響有新幀時的延遲
+FRAME_WAIT_TIMEOUT = 0.5
 
 # 初始化影像處理相關的全域變數
 processing_active = False   # 追蹤影像處理狀態
 processing_thread = None    # 儲存影像處理執行緒
-detection_active = False    #  追蹤姿態檢測狀態
 
 # 優化相關的全局變量
 thread_reuse_enabled = True  # 啟用線程重用
@@ -101,8 +62,34 @@ frame_processing_thread = None  # 幀處理線程
 
 @exercise_bp.route('/video_feed')
 def video_feed():
-    """影像串流路由 - 提供即時影像串流"""
-    return Response(generate_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    """影像串流路由 - 提供即時影像串流
+
+    可用 ?sid=<Socket.IO sid> 指定會話，未指定時使用最近活動中的會話
+    """
+    session = get_session(request.args.get('sid'), create=False) or latest_active_session()
+    return Response(generate_frames(session), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@exercise_bp.route('/api/pipeline_stats')
+def pipeline_stats():
+    """影像管線統計 - 各會話的分段耗時、丟棄幀數、批次推論與已載入模型統計"""
+    pool = get_pose_worker_pool()
+    sessions = []
+    for session in list_sessions():
+        if session.pipeline is None:
+            continue
+        sessions.append({
+            'sid': session.sid,
+            'detection_active': session.detection_active,
+            'exercise_type': session.current_exercise_type,
+            'stages': session.pipeline.get_stats(),
+            'inference': session.inference_controller.get_stats(),
+            'input_overwritten': session.frame_buffer.overwritten,
+            'ring_stalls': session.frame_ring.stalls if session.frame_ring is not None else 0,
+        })
+    return jsonify({'success': True, 'sessions': sessions, 'schedulers': get_scheduler_stats(),
+                    'models': get_model_registry().get_stats(),
+                    'inference_limits': inference_limits.get_stats(),
+                    'worker_pool': pool.get_stats() if pool is not None and pool.running else None})
 
 @exercise_bp.route('/realtime')
 def realtime():
@@ -150,24 +137,40 @@ def cleanup_thread(thread_name):
             return True
     return False
 
-def generate_frames():
+def generate_frames(session):
     """生成影像幀 - 從舊版app.py移植
     
-    持續從已處理的影像緩衝區獲取影像幀並生成串流
+    持續從會話的已處理影像緩衝區獲取影像幀並生成串流
+    
+    Args:
+        session (DetectionSession): 要串流的檢測會話
     """
-    while True:
-        if not processed_frame_buffer.empty():
-            # 從處理後的幀緩衝區獲取幀
-            frame = processed_frame_buffer.get()
-            if frame is not None:
-                # 編碼並發送幀
-                _, buffer = cv2.imencode('.jpg', frame)
-                frame_bytes = buffer.tobytes()
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        else:
-            # 如果緩衝區為空，短暫等待
-            time.sleep(0.01)  # 短暫等待，避免CPU過載
+    seq = 0
+    while not session.processed_frame_buffer.closed:
+        # 阻塞等待處理執行緒產生新幀，不取走幀以免影響其他觀看者
+        seq, frame = session.processed_frame_buffer.wait_for_newer(seq, timeout=FRAME_WAIT_TIMEOUT)
+        if frame is not None:
+            # 編碼並發送幀
+            _, buffer = cv2.imencode('.jpg', frame)
+            frame_bytes = buffer.tobytes()
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+
+def emit_video_frame(session, frame_data):
+    """發送 JPEG 影像幀給會話的客戶端
+
+    客戶端在 start_detection 中要求 frame_transport='binary' 時直接以
+    Socket.IO 二進位附件傳送 JPEG 位元組，否則退回舊版的 base64 字串。
+
+    Args:
+        session (DetectionSession): 目標會話
+        frame_data (bytes): JPEG 編碼後的影像
+    """
+    if session.frame_transport == 'binary':
+        session.emit('video_frame', {'frame': frame_data, 'format': 'jpeg'}, namespace='/exercise')
+    else:
+        frame_base64 = base64.b64encode(frame_data).decode('utf-8')
+        session.emit('video_frame', {'frame': frame_base64}, namespace='/exercise')
 
 def get_default_camera_index():
     """獲取默認攝像頭索引"""
@@ -176,13 +179,13 @@ def get_default_camera_index():
     logger.info(f"使用默認攝像頭索引: {default_index}")
     return default_index
 
-def video_capture_thread(camera_index=6):
+def video_capture_thread(session, camera_index=6):
     """影像擷取執行緒 - 從舊版app.py移植
     
     Args:
+        session (DetectionSession): 擷取影像所屬的檢測會話
         camera_index (int, optional): 攝影機索引值，如果為None則使用默認索引
     """
-    global frame_buffer, detection_active
     
     # 如果沒有指定攝影機索引，則使用默認索引
     if camera_index is None:
@@ -206,48 +209,130 @@ def video_capture_thread(camera_index=6):
     cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
     
     logger.info("攝影機初始化成功")
+
+    # 影像直接縮放寫入預先配置的影像格，攝影機原始幀也重用同一塊緩衝區
+    ring = session.ensure_frame_ring((720, 720, 3))
+    raw = None
     
-    while detection_active:
-        ret, frame = cap.read()
+    while session.detection_active:
+        ret, raw = cap.read(raw)
         if not ret:
             logger.warning("無法讀取影像幀")
+            raw = None
             time.sleep(0.1)
             continue
         
+        # 處理端仍佔用所有影像格時丟棄此幀
+        slot = ring.acquire(timeout=FRAME_WAIT_TIMEOUT)
+        if slot is None:
+            continue
+
         # 調整幀大小為720p正方形
-        frame = cv2.resize(frame, (720, 720))
+        cv2.resize(raw, (720, 720), dst=slot.array)
         
-        # 優化幀緩衝區處理 - 直接替換而不是檢查
-        try:
-            frame_buffer.get_nowait()  # 移除舊幀
-        except queue.Empty:
-            pass
-        frame_buffer.put(frame)  # 放入新幀
-        
-        time.sleep(0.03)  # 針對720p處理進一步降低幀率以減少CPU使用
+        # 放入信箱，處理執行緒尚未取走的舊幀直接被覆蓋並釋放
+        # cap.read() 本身會依攝影機幀率阻塞，不需額外 sleep
+        session.frame_buffer.put(slot)
     
     # 釋放攝影機
     cap.release()
     logger.info("影像擷取執行緒已停止")
 
 
-def frame_processing_thread(exercise_type='squat'):                                # 影像幀處理執行緒函數，預設運動類型為深蹲
+def push_client_frame(session, data):
+    """將客戶端上傳的壓縮影像解碼後放入會話的幀緩衝區
+
+    客戶端可能連續送出多幀而處理執行緒來不及消化，因此只保留最新的一幀：
+    序號比已接受的幀舊時直接丟棄，緩衝區中尚未處理的舊幀也會被新幀取代。
+
+    Args:
+        session (DetectionSession): 目標會話
+        data: `{'frame': bytes, 'seq': int}` 或直接為 JPEG/WebP 位元組
+
+    Returns:
+        bool: 是否接受此幀
+    """
+    if isinstance(data, dict):
+        payload = data.get('frame')
+        seq = data.get('seq')
+    else:
+        payload = data
+        seq = None
+
+    if not isinstance(payload, (bytes, bytearray)) or not payload:
+        return False
+    if len(payload) > Config.CLIENT_FRAME_MAX_BYTES:
+        logger.warning(f"客戶端影像幀過大 ({len(payload)} bytes)，已丟棄")
+        return False
+
+    with session.lock:
+        session.client_frames_received += 1
+        if seq is not None:
+            if seq <= session.client_frame_seq:
+                session.client_frames_dropped += 1
+                return False
+            session.client_frame_seq = seq
+
+    frame = offload(cv2.imdecode, np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        logger.warning("無法解碼客戶端影像幀")
+        return False
+
+    # 與攝影機擷取相同的正方形尺寸，直接縮放寫入預先配置的影像格
+    size = Config.CLIENT_FRAME_SIZE
+    slot = session.ensure_frame_ring((size, size, 3)).acquire(timeout=FRAME_WAIT_TIMEOUT)
+    if slot is None:
+        with session.lock:
+            session.client_frames_dropped += 1
+        return False
+    cv2.resize(frame, (size, size), dst=slot.array)
+
+    with session.lock:
+        # 解碼期間已有更新的幀被接受時丟棄此幀
+        if seq is not None and seq != session.client_frame_seq:
+            session.client_frames_dropped += 1
+            slot.release()
+            return False
+        # 處理執行緒落後時覆蓋（並釋放）未處理的舊幀
+        if session.frame_buffer.put(slot):
+            session.client_frames_dropped += 1
+
+    session.touch()
+    return True
+
+
+def frame_processing_thread(session, exercise_type='squat'):
     """影像幀處理執行緒
     
-    此函數負責處理從攝影機捕獲的影像幀，並根據不同的運動類型進行相應的處理。
+    將會話綁定到目前執行緒，讓 exercise_service 的計數狀態寫入此會話。
+    編碼與發送交給 FramePipeline 的獨立執行緒，本執行緒只做推論與標註。
     
     Args:
+        session (DetectionSession): 處理影像所屬的檢測會話
         exercise_type (str): 運動類型，預設為'squat'（深蹲）
+    """
+    pipeline = FramePipeline(session, emit_video_frame)
+    session.pipeline = pipeline
+    pipeline.start()
+    try:
+        with bind_session(session):
+            _frame_processing_loop(session, exercise_type, pipeline)
+    finally:
+        pipeline.stop()
+        logger.info(f"影像管線統計: {pipeline.get_stats()}")
+
+
+def _frame_processing_loop(session, exercise_type, pipeline):                        # 影像幀處理迴圈
+    """影像幀處理迴圈
+    
+    此函數負責處理從攝影機捕獲的影像幀，並根據不同的運動類型進行相應的處理。
+    
+    Args:
+        session (DetectionSession): 處理影像所屬的檢測會話
+        exercise_type (str): 運動類型，例如'squat'（深蹲）
                            可選值包括：'table-tennis'（桌球）, 'basketball'（籃球）等
+        pipeline (FramePipeline): 接收處理結果的編碼/發送管線
     """
-    global frame_buffer, processed_frame_buffer, detection_active, table_tennis_active, table_tennis_session_id
-    global basketball_active, basketball_session_id
-    global basketball_dribble_active, basketball_dribble_session_id  # 添加籃球運球全局變量
-    global volleyball_overhand_active, volleyball_overhand_session_id  # 添加排球高手托球全局變量
-    global volleyball_lowhand_active, volleyball_lowhand_session_id  # 添加排球低手接球全局變量
-    global alternating_arm_swing_active, alternating_arm_swing_session_id  # 添加雙手輪流擺動熱身運動全局變量
-    global plank_active, plank_session_id  # 添加平板支撐全局變量
-    global taekwondo_detail_active, taekwondo_detail_session_id  # 添加跆拳道詳細檢測全局變量
     
     logger.info(f"開始影像幀處理執行緒，運動類型: {exercise_type}")                  # 記錄執行緒啟動日誌
     
@@ -268,57 +353,62 @@ def frame_processing_thread(exercise_type='squat'):
     
     if exercise_type == 'table-tennis':
         # 現有桌球邏輯...
-        table_tennis_active = True
+        session.table_tennis_active = True
         table_tennis_service = TableTennisService.get_instance()
-        if table_tennis_session_id is None:
-            table_tennis_session_id = str(uuid.uuid4())
+        if session.table_tennis_session_id is None:
+            session.table_tennis_session_id = str(uuid.uuid4())
     elif exercise_type == 'basketball':
         # 現有籃球投籃邏輯...
-        basketball_active = True
+        session.basketball_active = True
         basketball_service = BasketballService.get_instance()
-        if basketball_session_id is None:
-            basketball_session_id = str(uuid.uuid4())
+        if session.basketball_session_id is None:
+            session.basketball_session_id = str(uuid.uuid4())
     elif exercise_type == 'basketball-dribble':  # 新增籃球運球類型
-        basketball_dribble_active = True
+        session.basketball_dribble_active = True
         basketball_dribble_service = BasketballDribbleService.get_instance()
-        if basketball_dribble_session_id is None:
-            basketball_dribble_session_id = str(uuid.uuid4())
+        if session.basketball_dribble_session_id is None:
+            session.basketball_dribble_session_id = str(uuid.uuid4())
     elif exercise_type == 'volleyball-overhand':  # 新增排球高手托球類型
-        volleyball_overhand_active = True
+        session.volleyball_overhand_active = True
         volleyball_service = VolleyballService.get_instance()
-        if volleyball_overhand_session_id is None:
-            volleyball_overhand_session_id = str(uuid.uuid4())
+        if session.volleyball_overhand_session_id is None:
+            session.volleyball_overhand_session_id = str(uuid.uuid4())
     elif exercise_type == 'volleyball-lowhand':  # 新增排球低手接球類型
-        volleyball_lowhand_active = True
+        session.volleyball_lowhand_active = True
         volleyball_service = VolleyballService.get_instance()
-        if volleyball_lowhand_session_id is None:
-            volleyball_lowhand_session_id = str(uuid.uuid4())
+        if session.volleyball_lowhand_session_id is None:
+            session.volleyball_lowhand_session_id = str(uuid.uuid4())
     elif exercise_type == 'alternating-arm-swing':  # 新增雙手輪流擺動熱身運動類型
-        alternating_arm_swing_active = True
-        if alternating_arm_swing_session_id is None:
-            alternating_arm_swing_session_id = str(uuid.uuid4())
+        session.alternating_arm_swing_active = True
+        if session.alternating_arm_swing_session_id is None:
+            session.alternating_arm_swing_session_id = str(uuid.uuid4())
     elif exercise_type == 'plank':  # 新增平板支撐類型
-        plank_active = True
-        if plank_session_id is None:
-            plank_session_id = str(uuid.uuid4())
+        session.plank_active = True
+        if session.plank_session_id is None:
+            session.plank_session_id = str(uuid.uuid4())
     elif exercise_type == 'taekwondo-detail':  # 新增跆拳道詳細檢測類型
-        taekwondo_detail_active = True
-        if taekwondo_detail_session_id is None:
-            taekwondo_detail_session_id = str(uuid.uuid4())
+        session.taekwondo_detail_active = True
+        if session.taekwondo_detail_session_id is None:
+            session.taekwondo_detail_session_id = str(uuid.uuid4())
     
-    while detection_active:
-        if not frame_buffer.empty():
+    while session.detection_active:
+        # 阻塞等待新幀，逾時只為重新檢查檢測狀態
+        item = session.frame_buffer.get(timeout=FRAME_WAIT_TIMEOUT)
+        if item is not None:
+            # 擷取端寫入的影像格在處理期間就地讀取，處理完才釋放給擷取端重用
+            frame_slot = item if isinstance(item, FrameSlot) else None
+            frame = frame_slot.array if frame_slot is not None else item
             try:
-                # 從原始幀緩衝區獲取幀
-                frame = frame_buffer.get()
+                process_start = time.perf_counter()
+                pose_payload_mirrored = None  # 由 exercise_service 處理的幀才可改送關鍵點資料
                 
                 # 根據運動類型處理幀
-                if exercise_type == 'table-tennis' and table_tennis_active:
+                if exercise_type == 'table-tennis' and session.table_tennis_active:
                     # 桌球揮拍模式
                     if table_tennis_detector is None and table_tennis_service is not None:
                         # 初始化檢測器
                         height, width = frame.shape[:2]
-                        table_tennis_detector = table_tennis_service.get_detector(table_tennis_session_id, width, height)
+                        table_tennis_detector = table_tennis_service.get_detector(session.table_tennis_session_id, width, height)
                     
                     # 水平翻轉畫面，使其更直觀
                     frame = cv2.flip(frame, 1)
@@ -332,16 +422,16 @@ def frame_processing_thread(exercise_type='squat'):
                         
                         # 發送揮拍次數到前端
                         if frame_count % 10 == 0:  # 每10幀發送一次，減少網絡負載
-                            socketio.emit('exercise_count', {'count': current_count}, namespace='/exercise')
+                            session.emit('exercise_count', {'count': current_count}, namespace='/exercise')
                     else:
                         processed_frame = frame
 
-                elif exercise_type == 'basketball' and basketball_active:
+                elif exercise_type == 'basketball' and session.basketball_active:
                     # 籃球投籃模式
                     if basketball_detector is None and basketball_service is not None:
                         # 初始化檢測器
                         height, width = frame.shape[:2]
-                        basketball_detector = basketball_service.get_detector(basketball_session_id, width, height)
+                        basketball_detector = basketball_service.get_detector(session.basketball_session_id, width, height)
                     
                     # 使用籃球偵測器處理畫面
                     if basketball_detector:
@@ -352,16 +442,16 @@ def frame_processing_thread(exercise_type='squat'):
                         
                         # 發送投籃次數到前端
                         if frame_count % 10 == 0:  # 每10幀發送一次，減少網絡負載
-                            socketio.emit('exercise_count', {'count': current_count}, namespace='/exercise')
+                            session.emit('exercise_count', {'count': current_count}, namespace='/exercise')
                     else:
                         processed_frame = frame
 
-                elif exercise_type == 'basketball-dribble' and basketball_dribble_active:
+                elif exercise_type == 'basketball-dribble' and session.basketball_dribble_active:
                     # 籃球運球模式
                     if basketball_dribble_detector is None and basketball_dribble_service is not None:
                         # 初始化檢測器
                         height, width = frame.shape[:2]
-                        basketball_dribble_detector = basketball_dribble_service.get_detector(basketball_dribble_session_id, width, height)
+                        basketball_dribble_detector = basketball_dribble_service.get_detector(session.basketball_dribble_session_id, width, height)
                     
                     # 水平翻轉畫面，使其更直觀
                     frame = cv2.flip(frame, 1)
@@ -386,7 +476,7 @@ def frame_processing_thread(exercise_type='squat'):
                                     
                                 # 發送當前模式到前端
                                 if frame_count % 30 == 0:  # 每30幀發送一次
-                                    socketio.emit('dribble_mode', {'mode': basketball_dribble_detector.current_mode}, namespace='/exercise')
+                                    session.emit('dribble_mode', {'mode': basketball_dribble_detector.current_mode}, namespace='/exercise')
                             except Exception as e:
                                 processed_frame = frame
                                 logger.error(f"處理關鍵點時出錯: {e}")
@@ -399,12 +489,12 @@ def frame_processing_thread(exercise_type='squat'):
                     else:
                         processed_frame = frame
 
-                elif exercise_type == 'volleyball-overhand' and volleyball_overhand_active:
+                elif exercise_type == 'volleyball-overhand' and session.volleyball_overhand_active:
                     # 排球高手托球模式
                     if volleyball_detector is None and volleyball_service is not None:
                         # 初始化檢測器
                         height, width = frame.shape[:2]
-                        volleyball_detector = volleyball_service.get_detector(volleyball_overhand_session_id, width, height, 'overhand')
+                        volleyball_detector = volleyball_service.get_detector(session.volleyball_overhand_session_id, width, height, 'overhand')
                     
                     # 水平翻轉畫面，使其更直觀
                     frame = cv2.flip(frame, 1)
@@ -418,16 +508,16 @@ def frame_processing_thread(exercise_type='squat'):
                         
                         # 發送托球次數到前端
                         if frame_count % 10 == 0:  # 每10幀發送一次，減少網絡負載
-                            socketio.emit('exercise_count', {'count': current_count}, namespace='/exercise')
+                            session.emit('exercise_count', {'count': current_count}, namespace='/exercise')
                     else:
                         processed_frame = frame
 
-                elif exercise_type == 'volleyball-lowhand' and volleyball_lowhand_active:
+                elif exercise_type == 'volleyball-lowhand' and session.volleyball_lowhand_active:
                     # 排球低手接球模式
                     if volleyball_detector is None and volleyball_service is not None:
                         # 初始化檢測器
                         height, width = frame.shape[:2]
-                        volleyball_detector = volleyball_service.get_detector(volleyball_lowhand_session_id, width, height, 'lowhand')
+                        volleyball_detector = volleyball_service.get_detector(session.volleyball_lowhand_session_id, width, height, 'lowhand')
                     
                     # 水平翻轉畫面，使其更直觀
                     frame = cv2.flip(frame, 1)
@@ -441,13 +531,13 @@ def frame_processing_thread(exercise_type='squat'):
                         
                         # 發送成功次數到前端
                         if frame_count % 10 == 0:  # 每10幀發送一次，減少網絡負載
-                            socketio.emit('exercise_count', {'count': current_count}, namespace='/exercise')
+                            session.emit('exercise_count', {'count': current_count}, namespace='/exercise')
                         
                         # 發送當前維持時間到前端
                         if frame_count % 30 == 0:  # 每30幀發送一次
                             current_time = volleyball_detector.total_correct_time
                             target_time = volleyball_detector.target_time
-                            socketio.emit('lowhand_progress', {
+                            session.emit('lowhand_progress', {
                                 'current_time': current_time,
                                 'target_time': target_time,
                                 'is_correct': volleyball_detector.is_posture_correct
@@ -455,35 +545,37 @@ def frame_processing_thread(exercise_type='squat'):
                     else:
                         processed_frame = frame
 
-                elif exercise_type == 'alternating-arm-swing' and alternating_arm_swing_active:
+                elif exercise_type == 'alternating-arm-swing' and session.alternating_arm_swing_active:
                     # 雙手輪流擺動熱身運動模式
                     # 水平翻轉畫面，使其更直觀
                     frame = cv2.flip(frame, 1)
                     
                     # 使用原有的處理邏輯
                     processed_frame = exercise_service.process_frame_realtime(frame, exercise_type)
+                    pose_payload_mirrored = True
                     
                     # 發送累積時間到前端
                     if frame_count % 10 == 0:  # 每10幀發送一次，減少網絡負載
                         current_time = exercise_service.get_alternating_arm_swing_time()
-                        socketio.emit('alternating_arm_swing_time', {'time': current_time}, namespace='/exercise')
+                        session.emit('alternating_arm_swing_time', {'time': current_time}, namespace='/exercise')
 
-                elif exercise_type == 'plank' and plank_active:
+                elif exercise_type == 'plank' and session.plank_active:
                     # 平板支撐模式
                     # 水平翻轉畫面，使其更直觀
                     frame = cv2.flip(frame, 1)
                     
                     # 使用平板支撐處理邏輯
                     processed_frame = exercise_service.process_frame_realtime(frame, exercise_type)
+                    pose_payload_mirrored = True
                     
                     # 發送累積時間和品質分數到前端
                     if frame_count % 10 == 0:  # 每10幀發送一次，減少網絡負載
                         current_time = exercise_service.get_plank_time()
                         quality_score = exercise_service.get_plank_quality()
-                        socketio.emit('plank_time', {'time': current_time}, namespace='/exercise')
-                        socketio.emit('pose_quality', {'score': quality_score}, namespace='/exercise')
+                        session.emit('plank_time', {'time': current_time}, namespace='/exercise')
+                        session.emit('pose_quality', {'score': quality_score}, namespace='/exercise')
 
-                elif exercise_type == 'taekwondo-detail' and taekwondo_detail_active:
+                elif exercise_type == 'taekwondo-detail' and session.taekwondo_detail_active:
                     # 跆拳道詳細檢測模式
                     # 水平翻轉畫面，使其更直觀
                     frame = cv2.flip(frame, 1)
@@ -498,7 +590,7 @@ def frame_processing_thread(exercise_type='squat'):
                         # 發送角度數據到前端
                         if frame_count % 5 == 0:  # 每5幀發送一次，提高響應性
                             angles = result['angles']
-                            socketio.emit('taekwondo_angles', {
+                            session.emit('taekwondo_angles', {
                                 'left_elbow': round(angles.get('左手肘', 0), 1),
                                 'right_elbow': round(angles.get('右手肘', 0), 1),
                                 'left_knee': round(angles.get('左膝蓋', 0), 1),
@@ -511,7 +603,7 @@ def frame_processing_thread(exercise_type='squat'):
                             
                             # 發送角速度數據到前端
                             velocities = result['velocities']
-                            socketio.emit('taekwondo_velocities', {
+                            session.emit('taekwondo_velocities', {
                                 'left_elbow': round(velocities.get('左手肘', 0), 1),
                                 'right_elbow': round(velocities.get('右手肘', 0), 1),
                                 'left_knee': round(velocities.get('左膝蓋', 0), 1),
@@ -524,7 +616,7 @@ def frame_processing_thread(exercise_type='squat'):
                             
                             # 發送角加速度數據到前端
                             accelerations = result['accelerations']
-                            socketio.emit('taekwondo_accelerations', {
+                            session.emit('taekwondo_accelerations', {
                                 'left_elbow': round(accelerations.get('左手肘', 0), 1),
                                 'right_elbow': round(accelerations.get('右手肘', 0), 1),
                                 'left_knee': round(accelerations.get('左膝蓋', 0), 1),
@@ -536,7 +628,7 @@ def frame_processing_thread(exercise_type='squat'):
                             }, namespace='/exercise')
                             
                             # 發送動作識別結果到前端
-                            socketio.emit('taekwondo_action', {
+                            session.emit('taekwondo_action', {
                                 'action': result['action'],
                                 'confidence': round(result['confidence'] * 100, 1),
                                 'count': result['count']
@@ -550,33 +642,34 @@ def frame_processing_thread(exercise_type='squat'):
                 else:
                     # 其他運動模式，使用原有的處理邏輯
                     processed_frame = exercise_service.process_frame_realtime(frame, exercise_type)
+                    pose_payload_mirrored = False
                 
-                # 優化幀緩衝區處理
-                try:
-                    processed_frame_buffer.get_nowait()  # 移除舊幀
-                except queue.Empty:
-                    pass
-                processed_frame_buffer.put(processed_frame)
-                
-                # 針對720p影像優化編碼參數
-                encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), 25,  # 進一步降低品質以處理720p
-                               int(cv2.IMWRITE_JPEG_OPTIMIZE), 1]   # 啟用JPEG優化
-                _, buffer = cv2.imencode('.jpg', processed_frame, encode_param)
-                frame_data = buffer.tobytes()
+                pipeline.record_process(time.perf_counter() - process_start)
+
+                if frame_slot is not None and np.may_share_memory(processed_frame, frame_slot.array):
+                    # 處理結果仍指向影像格時先複製，影像格釋放後會被擷取端覆寫
+                    processed_frame = processed_frame.copy()
                 
-                # 移除不必要的雜湊計算
-                frame_base64 = base64.b64encode(frame_data).decode('utf-8')
+                # 提供 MJPEG 串流最新的已處理幀
+                session.processed_frame_buffer.put(processed_frame)
                 
                 # 減少日誌輸出頻率，只在每1000幀記錄一次
                 if frame_count % 1000 == 0:
                     logger.debug(f"已處理 {frame_count} 幀")
                 
-                socketio.emit('video_frame', {'frame': frame_base64}, namespace='/exercise')
+                pose_payload = None
+                if session.stream_mode == 'keypoints' and pose_payload_mirrored is not None:
+                    pose_payload = exercise_service.get_pose_payload(
+                        exercise_type, mirrored=pose_payload_mirrored, seq=frame_count)
                 
-                frame_count += 1
+                if pose_payload is not None:
+                    # 關鍵點串流模式：客戶端已有本地影像，只傳送精簡姿態資料
+                    pipeline.submit_event('pose_frame', pose_payload)
+                else:
+                    # 交給編碼執行緒，落後時丟棄舊幀
+                    pipeline.submit_frame(processed_frame)
                 
-                # 針對720p處理添加幀率控制
-                time.sleep(0.02)
+                frame_count += 1
                 
                 # 處理運動計數（非桌球揮拍模式）
                 if exercise_type != 'table-tennis':
@@ -586,7 +679,7 @@ def frame_processing_thread(exercise_type='squat'):
                             # 減少運動計數日誌輸出頻率
                             if frame_count % 500 == 0:
                                 logger.info(f"運動計數: {count}")
-                            socketio.emit('exercise_count', {'count': count}, namespace='/exercise')
+                            session.emit('exercise_count', {'count': count}, namespace='/exercise')
                     except Exception as e:
                         # 減少錯誤日誌輸出頻率
                         if frame_count % 500 == 0:
@@ -594,30 +687,33 @@ def frame_processing_thread(exercise_type='squat'):
             except Exception as e:
                 logger.error(f"處理幀時出錯: {e}")
                 time.sleep(0.1)
+            finally:
+                if frame_slot is not None:
+                    frame_slot.release()
     
     # 清理資源
-    if exercise_type == 'table-tennis' and table_tennis_service and table_tennis_session_id:
-        table_tennis_service.remove_detector(table_tennis_session_id)
-        table_tennis_active = False
+    if exercise_type == 'table-tennis' and table_tennis_service and session.table_tennis_session_id:
+        table_tennis_service.remove_detector(session.table_tennis_session_id)
+        session.table_tennis_active = False
     
-    if exercise_type == 'basketball' and basketball_service and basketball_session_id:
-        basketball_service.remove_detector(basketball_session_id)
-        basketball_active = False
+    if exercise_type == 'basketball' and basketball_service and session.basketball_session_id:
+        basketball_service.remove_detector(session.basketball_session_id)
+        session.basketball_active = False
     
-    if exercise_type == 'basketball-dribble' and basketball_dribble_service and basketball_dribble_session_id:
-        basketball_dribble_service.remove_detector(basketball_dribble_session_id)
-        basketball_dribble_active = False
+    if exercise_type == 'basketball-dribble' and basketball_dribble_service and session.basketball_dribble_session_id:
+        basketball_dribble_service.remove_detector(session.basketball_dribble_session_id)
+        session.basketball_dribble_active = False
     
-    if exercise_type == 'volleyball-overhand' and volleyball_service and volleyball_overhand_session_id:
-        volleyball_service.remove_detector(volleyball_overhand_session_id)
-        volleyball_overhand_active = False
+    if exercise_type == 'volleyball-overhand' and volleyball_service and session.volleyball_overhand_session_id:
+        volleyball_service.remove_detector(session.volleyball_overhand_session_id)
+        session.volleyball_overhand_active = False
     
-    if exercise_type == 'volleyball-lowhand' and volleyball_service and volleyball_lowhand_session_id:
-        volleyball_service.remove_detector(volleyball_lowhand_session_id)
-        volleyball_lowhand_active = False
+    if exercise_type == 'volleyball-lowhand' and volleyball_service and session.volleyball_lowhand_session_id:
+        volleyball_service.remove_detector(session.volleyball_lowhand_session_id)
+        session.volleyball_lowhand_active = False
     
-    if exercise_type == 'alternating-arm-swing' and alternating_arm_swing_session_id:
-        alternating_arm_swing_active = False
+    if exercise_type == 'alternating-arm-swing' and session.alternating_arm_swing_session_id:
+        session.alternating_arm_swing_active = False
         exercise_service.set_alternating_arm_swing_active(False)
     
     logger.info("幀處理執行緒已停止")
@@ -656,9 +752,11 @@ def record_workout_plan():
                     exercise.get('game_level', 1)
                 )
             )
+            record_exercise(cursor, cursor.lastrowid)
         conn.commit()
         cursor.close()
         conn.close()
+        invalidate_user_stats(student_id)
         return jsonify({'success': True, 'message': '訓練計劃已記錄'})
     except Exception as e:
         print(traceback.format_exc())
@@ -669,10 +767,34 @@ def record_workout_plan():
 @socketio.on('start_detection', namespace='/exercise')
 def handle_start_detection(data):
     """處理開始檢測請求"""
-    global detection_active, table_tennis_active, table_tennis_session_id
-    global basketball_active, basketball_session_id
-    global basketball_dribble_active, basketball_dribble_session_id
-    global taekwondo_detail_active, taekwondo_detail_session_id
+    session = get_session(request.sid)
+    session.touch()
+
+    # 模型仍在背景載入時拒絕開始檢測，由客戶端稍後重試
+    if not model_warmup.is_ready():
+        status = model_warmup.get_status()
+        emit('error', {'message': '模型載入中，請稍後再試', 'code': 'models_not_ready', 'state': status['state']})
+        return
+
+    # 多節點部署：檢測會話固定由持有其計數與追蹤狀態的節點處理，本節點已滿時導向其他節點
+    session_key = data.get('session_key') or request.sid
+    # 寬限期內重新連線：接回斷線前的會話，同一種運動時沿用計數與追蹤狀態
+    retained = resume_session(request.sid, session_key)
+    if retained is not None:
+        session = retained
+    resumed = retained is not None and session.detection_exercise_type == data.get('exercise_type', 'squat')
+    if session.node_session_key not in (None, session_key):
+        get_node_registry().release_session(session.node_session_key)
+    result, node = get_node_registry().claim_session(session_key)
+    if result == 'redirect':
+        logger.info(f"檢測會話 {session_key} 導向節點 {node['node_id']}")
+        emit('redirect_node', {'url': node['url'], 'node_id': node['node_id'], 'session_key': session_key})
+        return
+    if result == 'full':
+        emit('error', {'message': '伺服器忙碌中，請稍後再試', 'code': 'node_full'})
+        return
+    session.node_session_key = session_key
+    session.detection_exercise_type = data.get('exercise_type', 'squat')
     
     try:
         logger.info(f'收到開始檢測請求: {data}')
@@ -683,6 +805,15 @@ def handle_start_detection(data):
         camera_index = data.get('camera_index', None)  # 新增攝像頭索引參數
         description = data.get('description', '')  # 新增運動描述參數
         
+        # 影像傳輸格式：新版客戶端要求二進位 JPEG，舊版客戶端維持 base64
+        session.frame_transport = 'binary' if data.get('frame_transport') == 'binary' else 'base64'
+        # 串流模式：'keypoints' 只回傳關鍵點資料，由客戶端在本地影像上繪製
+        session.stream_mode = 'keypoints' if data.get('stream_mode') == 'keypoints' else 'video'
+        # 影像來源：'client' 由瀏覽器以 client_frame 上傳影像，不開啟伺服器攝影機
+        session.frame_source = 'client' if data.get('frame_source') == 'client' else 'camera'
+        # 新的檢測不沿用上一次的關鍵點歷史
+        session.inference_controller.reset()
+        
         # 獲取訓練計劃參數
         weight = data.get('weight', 0)
         reps = data.get('reps', 10)
@@ -704,7 +835,7 @@ def handle_start_detection(data):
         logger.info(f'處理運動參數 - 學號: {student_id}, 運動類型: {exercise_type}, 重量: {weight}, 次數: {reps}, 組數: {sets}, 攝像頭索引: {camera_index}')
         
         # 記錄訓練計劃到資料庫
-        if student_id and save_to_db:
+        if student_id and save_to_db and not resumed:
             try:
                 connection = get_db_connection()
                 if connection:
@@ -727,12 +858,14 @@ def handle_start_detection(data):
                         0,  # total_count 初始為0
                         data.get('level', 1)  # game_level
                     ))
+                    record_id = cursor.lastrowid
+                    record_exercise(cursor, record_id)
                     
                     connection.commit()
-                    record_id = cursor.lastrowid
                     
                     cursor.close()
                     connection.close()
+                    invalidate_user_stats(student_id)
                     
                     logger.info(f'成功記錄訓練計劃到資料庫，記錄ID: {record_id}')
                     
@@ -755,35 +888,42 @@ def handle_start_detection(data):
                     'status': 'error',
                     'message': f'保存失敗: {str(db_error)}'
                 })
+        elif resumed:
+            logger.info('接續斷線前的檢測，訓練計劃已記錄過')
         elif not student_id:
             logger.warning('未提供學號，跳過資料庫記錄')
         elif not save_to_db:
             logger.info('未要求保存到資料庫，跳過資料庫記錄')
         
         # 重置計數和狀態
-        if exercise_type == 'table-tennis':
+        if resumed:
+            # 接續斷線前的檢測，只把目前的計數與組數送回前端
+            emit('exercise_count', {'count': session.exercise_count})
+            emit('remaining_sets_update', {'sets': session.remaining_sets})
+            emit('pose_quality', {'score': session.latest_quality})
+        elif exercise_type == 'table-tennis':
             # 桌球揮拍模式，重置桌球相關狀態
-            table_tennis_active = True
-            table_tennis_session_id = str(uuid.uuid4())
+            session.table_tennis_active = True
+            session.table_tennis_session_id = str(uuid.uuid4())
             # 發送初始數據到前端
             emit('exercise_count', {'count': 0})
         elif exercise_type == 'basketball':
             # 籃球投籃模式，重置籃球相關狀態
-            basketball_active = True
-            basketball_session_id = str(uuid.uuid4())
+            session.basketball_active = True
+            session.basketball_session_id = str(uuid.uuid4())
             # 發送初始數據到前端
             emit('exercise_count', {'count': 0})
         elif exercise_type == 'basketball-dribble':
             # 籃球運球模式，重置籃球運球相關狀態
-            basketball_dribble_active = True
-            basketball_dribble_session_id = str(uuid.uuid4())
+            session.basketball_dribble_active = True
+            session.basketball_dribble_session_id = str(uuid.uuid4())
             # 發送初始數據到前端
             emit('exercise_count', {'count': 0})
             emit('dribble_mode', {'mode': 'high'})  # 初始模式
         elif exercise_type == 'alternating-arm-swing':
             # 雙手輪流擺動熱身運動模式，基於時間而非次數
-            alternating_arm_swing_active = True
-            alternating_arm_swing_session_id = str(uuid.uuid4())
+            session.alternating_arm_swing_active = True
+            session.alternating_arm_swing_session_id = str(uuid.uuid4())
             
             # 獲取目標時間參數（從前端發送的時間參數）
             target_time = data.get('time', 30)  # 默認30秒
@@ -805,8 +945,8 @@ def handle_start_detection(data):
             emit('alternating_arm_swing_target', {'target_time': target_time})
         elif exercise_type == 'plank':
             # 平板支撐模式，基於時間而非次數
-            plank_active = True
-            plank_session_id = str(uuid.uuid4())
+            session.plank_active = True
+            session.plank_session_id = str(uuid.uuid4())
             
             # 獲取目標時間參數（從前端發送的時間參數）
             target_time = data.get('target_time', 30)  # 默認30秒
@@ -830,8 +970,8 @@ def handle_start_detection(data):
             emit('pose_quality', {'score': 1})  # 初始分數為1分
         elif exercise_type == 'taekwondo-detail':
             # 跆拳道詳細檢測模式
-            taekwondo_detail_active = True
-            taekwondo_detail_session_id = str(uuid.uuid4())
+            session.taekwondo_detail_active = True
+            session.taekwondo_detail_session_id = str(uuid.uuid4())
             
             # 重置跆拳道檢測狀態
             taekwondo_service = get_taekwondo_service()
@@ -875,9 +1015,6 @@ def handle_start_detection(data):
             # 設置檢測線
             exercise_service.set_detection_line(detection_line)
             
-            # 確保 exercise_service 中的 detection_active 也被設置
-            exercise_service.detection_active = True
-            
             # 發送初始數據到前端
             emit('exercise_count', {'count': 0})
             
@@ -898,17 +1035,30 @@ def handle_start_detection(data):
         emit('coach_tip', {'tip': f'已開始{exercise_type}運動檢測，請保持正確姿勢'})
         
         # 啟動檢測執行緒
-        if not detection_active:
-            detection_active = True
+        if not session.detection_active:
+            session.detection_active = True
             
-            # 啟動執行緒 - 使用手動指定的攝影機索引
-            video_thread = threading.Thread(target=video_capture_thread, args=(camera_index,), name="VideoCapture")
-            video_thread.daemon = True
-            video_thread.start()
+            if session.frame_source == 'client':
+                # 客戶端上傳影像，重置序號並清除上一次檢測留下的幀
+                with session.lock:
+                    session.client_frame_seq = -1
+                    session.client_frames_received = 0
+                    session.client_frames_dropped = 0
+                    session.frame_buffer.clear()
+                logger.info("使用客戶端上傳影像，不啟動攝影機擷取執行緒")
+            else:
+                # 啟動執行緒 - 使用手動指定的攝影機索引
+                video_thread = threading.Thread(target=video_capture_thread, args=(session, camera_index),
+                                                name=f"VideoCapture-{request.sid}")
+                video_thread.daemon = True
+                video_thread.start()
+                session.video_thread = video_thread
             
-            process_thread = threading.Thread(target=frame_processing_thread, args=(exercise_type,), name="FrameProcessing")
+            process_thread = threading.Thread(target=frame_processing_thread, args=(session, exercise_type),
+                                              name=f"FrameProcessing-{request.sid}")
             process_thread.daemon = True
             process_thread.start()
+            session.process_thread = process_thread
             
             logger.info(f"已啟動{exercise_type}運動檢測")
             
@@ -927,99 +1077,119 @@ def handle_start_detection(data):
 
 
 
+@socketio.on('client_frame', namespace='/exercise')
+def handle_client_frame(data):
+    """接收客戶端上傳的影像幀
+
+    回傳值作為 Socket.IO 確認回應，客戶端收到後再送出下一幀以控制上傳速率。
+    """
+    session = get_session(request.sid, create=False)
+    if session is None or not session.detection_active or session.frame_source != 'client':
+        return {'accepted': False}
+
+    try:
+        return {'accepted': push_client_frame(session, data)}
+    except Exception as e:
+        logger.error(f"處理客戶端影像幀失敗: {e}")
+        return {'accepted': False}
+
+
+
 @socketio.on('stop_detection', namespace='/exercise')
 def handle_stop_detection(data=None):
     """處理停止檢測請求"""
-    global detection_active, table_tennis_active, table_tennis_session_id
-    global basketball_active, basketball_session_id
-    global basketball_dribble_active, basketball_dribble_session_id  # 添加籃球運球變量
-    global volleyball_overhand_active, volleyball_overhand_session_id  # 添加排球高手托球變量
-    global volleyball_lowhand_active, volleyball_lowhand_session_id  # 添加排球低手接球變量
-    global alternating_arm_swing_active, alternating_arm_swing_session_id  # 添加雙手輪流擺動熱身運動變量
-    global plank_active, plank_session_id  # 添加平板支撐變量
-    global taekwondo_detail_active, taekwondo_detail_session_id  # 添加跆拳道詳細檢測變量
+    session = get_session(request.sid)
+    session.touch()
     
     try:
         logger.info('收到停止檢測請求')
-        detection_active = False
+        session.detection_active = False
+        # 釋放本節點對此檢測會話的歸屬，讓容量給其他會話使用
+        if session.node_session_key is not None:
+            get_node_registry().release_session(session.node_session_key)
+            session.node_session_key = None
+        
+        if session.frame_source == 'client':
+            logger.info(f"客戶端上傳影像統計: 收到 {session.client_frames_received} 幀，"
+                        f"丟棄 {session.client_frames_dropped} 幀")
         
         # 清理桌球揮拍資源
-        if table_tennis_active and table_tennis_session_id:
+        if session.table_tennis_active and session.table_tennis_session_id:
             try:
                 table_tennis_service = TableTennisService.get_instance()
-                table_tennis_service.remove_detector(table_tennis_session_id)
+                table_tennis_service.remove_detector(session.table_tennis_session_id)
             except Exception as e:
                 logger.error(f"清理桌球揮拍資源時出錯: {e}")
             finally:
-                table_tennis_active = False
-                table_tennis_session_id = None
+                session.table_tennis_active = False
+                session.table_tennis_session_id = None
         
         # 清理籃球投籃資源
-        if basketball_active and basketball_session_id:
+        if session.basketball_active and session.basketball_session_id:
             try:
                 basketball_service = BasketballService.get_instance()
-                basketball_service.remove_detector(basketball_session_id)
+                basketball_service.remove_detector(session.basketball_session_id)
             except Exception as e:
                 logger.error(f"清理籃球投籃資源時出錯: {e}")
             finally:
-                basketball_active = False
-                basketball_session_id = None
+                session.basketball_active = False
+                session.basketball_session_id = None
                 
         # 清理籃球運球資源
-        if basketball_dribble_active and basketball_dribble_session_id:
+        if session.basketball_dribble_active and session.basketball_dribble_session_id:
             try:
                 basketball_dribble_service = BasketballDribbleService.get_instance()
-                basketball_dribble_service.remove_detector(basketball_dribble_session_id)
+                basketball_dribble_service.remove_detector(session.basketball_dribble_session_id)
             except Exception as e:
                 logger.error(f"清理籃球運球資源時出錯: {e}")
             finally:
-                basketball_dribble_active = False
-                basketball_dribble_session_id = None
+                session.basketball_dribble_active = False
+                session.basketball_dribble_session_id = None
                 
         # 清理排球高手托球資源
-        if volleyball_overhand_active and volleyball_overhand_session_id:
+        if session.volleyball_overhand_active and session.volleyball_overhand_session_id:
             try:
                 volleyball_service = VolleyballService.get_instance()
-                volleyball_service.remove_detector(volleyball_overhand_session_id)
+                volleyball_service.remove_detector(session.volleyball_overhand_session_id)
             except Exception as e:
                 logger.error(f"清理排球高手托球資源時出錯: {e}")
             finally:
-                volleyball_overhand_active = False
-                volleyball_overhand_session_id = None
+                session.volleyball_overhand_active = False
+                session.volleyball_overhand_session_id = None
                 
         # 清理排球低手接球資源
-        if volleyball_lowhand_active and volleyball_lowhand_session_id:
+        if session.volleyball_lowhand_active and session.volleyball_lowhand_session_id:
             try:
                 volleyball_service = VolleyballService.get_instance()
-                volleyball_service.remove_detector(volleyball_lowhand_session_id)
+                volleyball_service.remove_detector(session.volleyball_lowhand_session_id)
             except Exception as e:
                 logger.error(f"清理排球低手接球資源時出錯: {e}")
             finally:
-                volleyball_lowhand_active = False
-                volleyball_lowhand_session_id = None
+                session.volleyball_lowhand_active = False
+                session.volleyball_lowhand_session_id = None
         
         # 清理雙手輪流擺動熱身運動資源
-        if alternating_arm_swing_active and alternating_arm_swing_session_id:
+        if session.alternating_arm_swing_active and session.alternating_arm_swing_session_id:
             try:
                 exercise_service.set_alternating_arm_swing_active(False)
             except Exception as e:
                 logger.error(f"清理雙手輪流擺動熱身運動資源時出錯: {e}")
             finally:
-                alternating_arm_swing_active = False
-                alternating_arm_swing_session_id = None
+                session.alternating_arm_swing_active = False
+                session.alternating_arm_swing_session_id = None
         
         # 清理平板支撐資源
-        if plank_active and plank_session_id:
+        if session.plank_active and session.plank_session_id:
             try:
                 exercise_service.set_plank_active(False)
             except Exception as e:
                 logger.error(f"清理平板支撐資源時出錯: {e}")
             finally:
-                plank_active = False
-                plank_session_id = None
+                session.plank_active = False
+                session.plank_session_id = None
         
         # 清理跆拳道詳細檢測資源
-        if taekwondo_detail_active and taekwondo_detail_session_id:
+        if session.taekwondo_detail_active and session.taekwondo_detail_session_id:
             try:
                 taekwondo_service = get_taekwondo_service()
                 
@@ -1064,11 +1234,9 @@ def handle_stop_detection(data=None):
             except Exception as e:
                 logger.error(f"清理跆拳道詳細檢測資源時出錯: {e}")
             finally:
-                taekwondo_detail_active = False
-                taekwondo_detail_session_id = None
+                session.taekwondo_detail_active = False
+                session.taekwondo_detail_session_id = None
         
-        # 確保 exercise_service 中的 detection_active 也被設置
-        exercise_service.detection_active = False
         logger.info("已停止運動檢測")
         emit('stop_detection_response', {'status': 'success'})
     except Exception as e:
@@ -1083,14 +1251,15 @@ def handle_stop_detection(data=None):
 @socketio.on('reset_table_tennis', namespace='/exercise')
 def handle_reset_table_tennis():
     """處理重置桌球揮拍請求"""
-    global table_tennis_session_id
+    session = get_session(request.sid)
+    session.touch()
     
     try:
         logger.info('收到重置桌球揮拍請求')
         
-        if table_tennis_session_id:
+        if session.table_tennis_session_id:
             table_tennis_service = TableTennisService.get_instance()
-            result = table_tennis_service.reset_detector(table_tennis_session_id)
+            result = table_tennis_service.reset_detector(session.table_tennis_session_id)
             
             if result:
                 emit('reset_response', {'status': 'success'})
@@ -1117,7 +1286,8 @@ def handle_set_detection_line(data):
 @socketio.on('switch_exercise_fast', namespace='/exercise')
 def handle_switch_exercise_fast(data):
     """處理快速運動切換請求 - 不停止檢測線程"""
-    global detection_active
+    session = get_session(request.sid)
+    session.touch()
     
     try:
         logger.info(f'收到快速運動切換請求: {data}')
@@ -1126,7 +1296,7 @@ def handle_switch_exercise_fast(data):
         detection_line = data.get('detection_line', 0.5)
         
         # 檢查是否正在檢測
-        if not detection_active:
+        if not session.detection_active:
             logger.warning('檢測未啟動，無法進行快速切換')
             emit('switch_exercise_response', {
                 'status': 'error', 
@@ -1177,20 +1347,29 @@ def handle_switch_exercise_fast(data):
 @socketio.on('connect', namespace='/exercise')
 def handle_connect():
     """處理客戶端連接"""
-    logger.info('客戶端已連接')
+    get_session(request.sid)
+    logger.info(f'客戶端已連接: {request.sid}')
+
+@socketio.on('disconnect', namespace='/exercise')
+def handle_disconnect():
+    """處理客戶端斷線 - 停止該連線的影像管線並釋放會話"""
+    session = remove_session(request.sid)
+    if session is not None:
+        logger.info(f'客戶端已斷線，已釋放檢測會話: {request.sid}')
 
 # 確保以下函數在 exercise_routes.py 中正確實現
 
-def get_current_frame():
-    """從 frame_buffer 取得最新影像"""
-    timeout = 5  # 等待 5 秒
-    start_time = time.time()
-    while frame_buffer.empty():
-        if time.time() - start_time > timeout:
-            logger.error("等待影像超時，佇列仍為空")
-            return None
-        time.sleep(0.1)
-    return frame_buffer.get()
+def get_current_frame(session):
+    """從會話的 frame_buffer 取得最新影像"""
+    item = session.frame_buffer.get(timeout=5)  # 等待 5 秒
+    if item is None:
+        logger.error("等待影像超時，信箱仍為空")
+        return None
+    if isinstance(item, FrameSlot):
+        # 影像格會被擷取端重用，複製後立即釋放
+        with item:
+            return item.array.copy()
+    return item
 
 # 在文件末尾添加以下代碼
 
@@ -1227,14 +1406,15 @@ def handle_request_coach_tip():
 @socketio.on('reset_basketball', namespace='/exercise')
 def handle_reset_basketball():
     """處理重置籃球投籃請求"""
-    global basketball_session_id
+    session = get_session(request.sid)
+    session.touch()
     
     try:
         logger.info('收到重置籃球投籃請求')
         
-        if basketball_session_id:
+        if session.basketball_session_id:
             basketball_service = BasketballService.get_instance()
-            result = basketball_service.reset_detector(basketball_session_id)
+            result = basketball_service.reset_detector(session.basketball_session_id)
             
             if result:
                 emit('reset_response', {'status': 'success'})
@@ -1254,14 +1434,15 @@ def handle_reset_basketball():
 @socketio.on('reset_basketball_dribble', namespace='/exercise')
 def handle_reset_basketball_dribble():
     """處理重置籃球運球請求"""
-    global basketball_dribble_session_id
+    session = get_session(request.sid)
+    session.touch()
     
     try:
         logger.info('收到重置籃球運球請求')
         
-        if basketball_dribble_session_id:
+        if session.basketball_dribble_session_id:
             basketball_dribble_service = BasketballDribbleService.get_instance()
-            result = basketball_dribble_service.reset_detector(basketball_dribble_session_id)
+            result = basketball_dribble_service.reset_detector(session.basketball_dribble_session_id)
             
             if result:
                 emit('reset_response', {'status': 'success'})
@@ -1281,14 +1462,15 @@ def handle_reset_basketball_dribble():
 @socketio.on('reset_volleyball_overhand', namespace='/exercise')
 def handle_reset_volleyball_overhand():
     """處理重置排球高手托球請求"""
-    global volleyball_overhand_session_id
+    session = get_session(request.sid)
+    session.touch()
     
     try:
         logger.info('收到重置排球高手托球請求')
         
-        if volleyball_overhand_session_id:
+        if session.volleyball_overhand_session_id:
             volleyball_service = VolleyballService.get_instance()
-            result = volleyball_service.reset_detector(volleyball_overhand_session_id)
+            result = volleyball_service.reset_detector(session.volleyball_overhand_session_id)
             
             if result:
                 emit('reset_response', {'status': 'success'})
@@ -1308,14 +1490,15 @@ def handle_reset_volleyball_overhand():
 @socketio.on('reset_volleyball_lowhand', namespace='/exercise')
 def handle_reset_volleyball_lowhand():
     """處理重置排球低手接球請求"""
-    global volleyball_lowhand_session_id
+    session = get_session(request.sid)
+    session.touch()
     
     try:
         logger.info('收到重置排球低手接球請求')
         
-        if volleyball_lowhand_session_id:
+        if session.volleyball_lowhand_session_id:
             volleyball_service = VolleyballService.get_instance()
-            result = volleyball_service.reset_detector(volleyball_lowhand_session_id)
+            result = volleyball_service.reset_detector(session.volleyball_lowhand_session_id)
             
             if result:
                 emit('reset_response', {'status': 'success'})
@@ -1341,12 +1524,13 @@ def handle_reset_volleyball_lowhand():
 @socketio.on('reset_plank', namespace='/exercise')
 def handle_reset_plank():
     """處理重置平板支撐請求"""
-    global plank_session_id
+    session = get_session(request.sid)
+    session.touch()
     
     try:
         logger.info('收到重置平板支撐請求')
         
-        if plank_session_id:
+        if session.plank_session_id:
             # 重置平板支撐狀態
             exercise_service.reset_plank()
             
@@ -1389,12 +1573,13 @@ def handle_set_plank_target(data):
 @socketio.on('reset_taekwondo_detail', namespace='/exercise')
 def handle_reset_taekwondo_detail():
     """處理重置跆拳道詳細檢測請求"""
-    global taekwondo_detail_session_id
+    session = get_session(request.sid)
+    session.touch()
     
     try:
         logger.info('收到重置跆拳道詳細檢測請求')
         
-        if taekwondo_detail_session_id:
+        if session.taekwondo_detail_session_id:
             # 重置跆拳道檢測狀態
             taekwondo_service = get_taekwondo_service()
             taekwondo_service.reset()
@@ -1479,12 +1664,13 @@ def handle_detect_cameras():
 @socketio.on('start_recording', namespace='/exercise')
 def handle_start_recording():
     """處理開始錄製請求"""
-    global taekwondo_detail_session_id
+    session = get_session(request.sid)
+    session.touch()
     
     try:
         logger.info('收到開始錄製請求')
         
-        if not taekwondo_detail_session_id:
+        if not session.taekwondo_detail_session_id:
             emit('recording_started', {'status': 'error', 'message': '無效的會話'})
             return
         
@@ -1507,12 +1693,13 @@ def handle_start_recording():
 @socketio.on('stop_recording', namespace='/exercise')
 def handle_stop_recording():
     """處理停止錄製請求"""
-    global taekwondo_detail_session_id
+    session = get_session(request.sid)
+    session.touch()
     
     try:
         logger.info('收到停止錄製請求')
         
-        if not taekwondo_detail_session_id:
+        if not session.taekwondo_detail_session_id:
             emit('recording_stopped', {'status': 'error', 'message': '無效的會話'})
             return
         
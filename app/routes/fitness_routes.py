@@ -4,6 +4,7 @@ import logging
 from datetime import datetime, timedelta
 from app.database import get_db_connection
 from app.services.table_tennis_service import TableTennisService
+from app.services.dashboard_service import get_fitness_dashboard
 import uuid
 
 
@@ -79,200 +80,40 @@ MUSCLE_OPTIMAL_FREQUENCY = {
 
 @fitness_bp.route('/api/fitness/dashboard', methods=['GET'])
 def fitness_dashboard():
-    conn = None
-    cursor = None
     try:
         user_id = request.args.get('user_id')
         if not user_id:
             return jsonify({'success': False, 'message': '未提供用戶ID'}), 400
         
-        # 添加詳細日誌記錄
-        logger.info(f"API接收到用戶ID: {user_id} (類型: {type(user_id)})")
-        
         # 確保user_id是字符串類型
         user_id = str(user_id).strip()
         
-        conn = get_db_connection()
-        if not conn:
-            logger.error(f"用戶 {user_id} 的數據庫連接失敗")
+        # 彙總查詢與每位使用者的結果快取見 dashboard_service
+        dashboard = get_fitness_dashboard(user_id)
+        if dashboard is None:
             return jsonify({'success': False, 'message': '數據庫連接失敗'}), 500
-            
-        cursor = conn.cursor(dictionary=True)
-        
-        # 1. 檢查是否有數據 (使用用戶名作為student_id)
-        cursor.execute("SELECT COUNT(*) as count FROM exercise_info WHERE student_id = %s", (user_id,))
-        count_result = cursor.fetchone()
-        record_count = count_result['count'] if count_result else 0
-        logger.info(f"用戶 {user_id} 的運動記錄數量: {record_count}")
-        
-        # 如果沒有找到記錄，嘗試通過users表查找對應的student_id
-        if record_count == 0:
-            cursor.execute("SELECT username FROM users WHERE username = %s", (user_id,))
-            user_result = cursor.fetchone()
-            if user_result:
-                # 用戶存在但沒有運動記錄
-                logger.info(f"用戶 {user_id} 存在但沒有運動記錄")
-            else:
-                logger.warning(f"用戶 {user_id} 不存在於系統中")
-        
-        # 如果沒有數據，返回空結果但仍然成功
-        if record_count == 0:
-            logger.warning(f"用戶 {user_id} 沒有運動記錄")
-            return jsonify({
-                'success': True,
-                'total_weight': 0,
-                'total_calories': 0,
-                'total_training_time': 0,
-                'training_frequency': 0,
-                'calories_trend': [],
-                'muscle_growth': {
-                    'arms': 0, 'chest': 0, 'core': 0, 'legs': 0, 'shoulders': 0
-                },
-                'exercise_stats': [],
-                'recent_exercises': []
-            })
-        
-        # 2. 計算總重量
-        cursor.execute("""
-            SELECT SUM(weight) as total_weight
-            FROM exercise_info
-            WHERE student_id = %s
-        """, (user_id,))
-        total_weight = cursor.fetchone()['total_weight'] or 0
-        logger.info(f"用戶 {user_id} 的總重量計算結果: {total_weight}")
-        
-        # 2. 計算總卡路里
-        cursor.execute("""
-            SELECT SUM(weight * reps * sets * 0.1) as total_calories
-            FROM exercise_info
-            WHERE student_id = %s
-        """, (user_id,))
-        total_calories = cursor.fetchone()['total_calories'] or 0
-
-        # 3. 計算總訓練時間
-        cursor.execute("""
-            SELECT TIMESTAMPDIFF(MINUTE, MIN(timestamp), MAX(timestamp)) as total_duration
-            FROM exercise_info
-            WHERE student_id = %s
-        """, (user_id,))
-        total_training_time = cursor.fetchone()['total_duration'] or 0
-        
-        # 4. 計算訓練頻率
-        cursor.execute("""
-            SELECT COUNT(DISTINCT DATE(timestamp)) as training_days
-            FROM exercise_info
-            WHERE student_id = %s AND timestamp >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-        """, (user_id,))
-        training_frequency = cursor.fetchone()['training_days'] or 0
-        
-        # 5. 計算熱量消耗趨勢
-        cursor.execute("""
-            SELECT DATE(timestamp) as date, 
-                   SUM(weight * reps * sets * 0.1) as daily_calories
-            FROM exercise_info
-            WHERE student_id = %s AND timestamp >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-            GROUP BY DATE(timestamp)
-            ORDER BY date
-        """, (user_id,))
-        
-        calories_result = cursor.fetchall()
-        logger.info(f"用戶 {user_id} 的熱量趨勢查詢結果: {calories_result}")
-
-        # 確保至少有一個數據點
-        if not calories_result:
-            logger.warning(f"用戶 {user_id} 沒有熱量消耗記錄，將使用默認值")
-            calories_trend = [0]  # 至少提供一個默認值
-        else:
-            calories_trend = [float(row['daily_calories'] or 0) for row in calories_result]
-        
-        logger.info(f"用戶 {user_id} 的熱量趨勢數據: {calories_trend}")
-        
-        # 6. 計算肌肉群發展
-        cursor.execute("""
-            SELECT exercise_type, COUNT(*) as count
-            FROM exercise_info
-            WHERE student_id = %s
-            GROUP BY exercise_type
-        """, (user_id,))
-        
-        muscle_growth = {'arms': 0, 'chest': 0, 'legs': 0, 'shoulders': 0, 'core': 0}
-        for row in cursor.fetchall():
-            exercise_type = row['exercise_type']
-            count = row['count']
-            
-            # 根據運動類型映射到肌肉群
-            if exercise_type in ['bicep-curl', 'tricep-extension']:
-                muscle_growth['arms'] += count * 2
-            elif exercise_type in ['push-up', 'bench-press']:
-                muscle_growth['chest'] += count * 3
-            elif exercise_type in ['squat', 'lunge']:
-                muscle_growth['legs'] += count * 4
-            elif exercise_type in ['shoulder-press']:
-                muscle_growth['shoulders'] += count * 3
-            else:
-                muscle_growth['core'] += count * 1
-        
-        # 6. 獲取運動類型統計
-        cursor.execute("""
-            SELECT exercise_type, COUNT(*) as count
-            FROM exercise_info
-            WHERE student_id = %s
-            GROUP BY exercise_type
-            ORDER BY count DESC
-            LIMIT 5
-        """, (user_id,))
-        exercise_stats = [{'name': row['exercise_type'], 'count': row['count']} 
-                         for row in cursor.fetchall()]
-        
-        # 7. 獲取最近訓練記錄
-        cursor.execute("""
-            SELECT exercise_type, timestamp as date, reps, sets
-            FROM exercise_info
-            WHERE student_id = %s
-            ORDER BY timestamp DESC
-            LIMIT 5
-        """, (user_id,))
-        recent_exercises = [{
-            'date': row['date'].strftime('%Y-%m-%d'),
-            'exercise': row['exercise_type'],
-            'reps': row['reps']
-        } for row in cursor.fetchall()]
-        
-        cursor.close()
-        conn.close()
-        
-        # 返回結果前記錄
-        logger.info(f"成功獲取用戶 {user_id} 的健身數據，calories_trend={calories_trend}")
         
         return jsonify({
             'success': True,
-            'total_weight': float(total_weight),
-            'total_calories': float(total_calories),
-            'total_training_time': int(total_training_time),
-            'training_frequency': int(training_frequency),
-            'calories_trend': [float(x) for x in calories_trend],
+            'total_weight': float(dashboard['total_weight']),
+            'total_calories': float(dashboard['total_calories']),
+            'total_training_time': int(dashboard['total_training_time']),
+            'training_frequency': int(dashboard['training_frequency']),
+            'calories_trend': [float(x) for x in dashboard['calories_trend']],
             'muscle_growth': {
-                'arms': int(muscle_growth['arms']),
-                'chest': int(muscle_growth['chest']),
-                'core': int(muscle_growth['core']),
-                'legs': int(muscle_growth['legs']),
-                'shoulders': int(muscle_growth['shoulders'])
+                'arms': int(dashboard['muscle_growth']['arms']),
+                'chest': int(dashboard['muscle_growth']['chest']),
+                'core': int(dashboard['muscle_growth']['core']),
+                'legs': int(dashboard['muscle_growth']['legs']),
+                'shoulders': int(dashboard['muscle_growth']['shoulders'])
             },
-            'exercise_stats': exercise_stats,
-            'recent_exercises': recent_exercises
+            'exercise_stats': dashboard['exercise_stats'],
+            'recent_exercises': dashboard['recent_exercises']
         })
         
     except Exception as e:
         logger.error(f"獲取用戶 {user_id if 'user_id' in locals() else '未知'} 的健身數據失敗: {str(e)}")
         return jsonify({'success': False, 'message': f'獲取數據失敗: {str(e)}'}), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
-
-
-
 
 @fitness_bp.route('/api/fitness/recommendations', methods=['GET'])
 def get_fitness_recommendations():
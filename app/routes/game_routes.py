@@ -1,5 +1,7 @@
 from flask import Blueprint, render_template, jsonify, request, current_app
 from app.database import get_db_connection  # 使用統一的資料庫連接函數
+from app.services.dashboard_service import invalidate_user_stats
+from app.services import stats_rollup
 import mysql.connector
 import logging
 from datetime import datetime
@@ -564,6 +566,7 @@ def complete_game_level():
                 current_time            # completion_time
             )
         )
+        stats_rollup.record_exercise(cursor, cursor.lastrowid)
         
         # 如果用戶進度記錄不存在，創建一個新的
         if not progress:
@@ -603,6 +606,7 @@ def complete_game_level():
         
         # 提交事務
         conn.commit()
+        invalidate_user_stats(user_id)
         
         # 獲取更新後的用戶進度
         cursor.execute("SELECT * FROM user_game_progress WHERE user_id = %s", (user_id,))
@@ -795,9 +799,13 @@ def record_exercise():
             total_count,
             student_id
         ))
+        record_id = cursor.lastrowid
+        inserted = cursor.rowcount
+        stats_rollup.record_exercise(cursor, record_id)
         
         conn.commit()
-        logger.info(f"成功記錄用戶 {student_id} 的運動數據，影響行數: {cursor.rowcount}")
+        logger.info(f"成功記錄用戶 {student_id} 的運動數據，影響行數: {inserted}")
+        invalidate_user_stats(student_id)
         
         cursor.close()
         conn.close()
@@ -805,7 +813,7 @@ def record_exercise():
         return jsonify({
             'success': True,
             'message': '運動記錄已保存',
-            'record_id': cursor.lastrowid
+            'record_id': record_id
         })
         
     except Exception as e:
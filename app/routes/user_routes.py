@@ -4,7 +4,7 @@ from app.database import get_db_connection  # 使用統一的資料庫連接函
 import logging
 import mysql.connector
 from datetime import datetime
-from app.models.user import User
+from app.models.user import User, invalidate_user
 
 # 建立藍圖
 user_bp = Blueprint('user', __name__)
@@ -40,6 +40,7 @@ def edit_profile():
             conn.commit()
             cursor.close()
             conn.close()
+            invalidate_user(current_user.id)
             
             flash('個人資料更新成功', 'success')
             return redirect(url_for('user.profile'))
@@ -174,6 +175,7 @@ def change_password():
         conn.commit()
         cursor.close()
         conn.close()
+        invalidate_user(current_user.id)
         
         flash('密碼修改成功', 'success')
         return redirect(url_for('user.settings'))
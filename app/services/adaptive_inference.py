@@ -0,0 +1,180 @@
+import time
+import logging
+
+from app.config import Config
+from app.services.frame_inference import FrameInference
+from app.services.keypoint_tracker import KeypointTracker
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveInferenceController:
+    """自適應推論解析度與跳幀控制器
+
+    依實際量測的每幀處理時間與目標幀率，調整姿態模型的輸入尺寸與推論間隔：
+    太慢時先降低輸入尺寸，已是最小尺寸再拉大推論間隔；有餘裕時反向恢復。
+    另可用 POSE_INFERENCE_MAX_FPS 限制姿態推論頻率。未推論的幀由
+    KeypointTracker 推算關鍵點，讓角度與計數邏輯每幀都能執行。
+    """
+
+    # 調整後至少經過這麼多幀才再次調整，避免來回震盪
+    COOLDOWN_FRAMES = 30
+    # 平均幀時間超過預算的比例上限 / 低於此比例才恢復品質
+    SLOW_RATIO = 1.1
+    FAST_RATIO = 0.7
+    # 耗時指數移動平均的平滑係數
+    EMA_ALPHA = 0.2
+
+    def __init__(self, target_fps=None, sizes=None, max_stride=None, enabled=None, max_inference_fps=None):
+        """
+        Args:
+            target_fps (float): 目標處理幀率
+            sizes (tuple): 可選的模型輸入尺寸
+            max_stride (int): 最大推論間隔（每幾幀推論一次）
+            enabled (bool): 是否啟用自適應調整，停用時以模型預設尺寸推論
+            max_inference_fps (float): 姿態推論頻率上限，0 表示不限制
+        """
+        self.enabled = getattr(Config, 'ADAPTIVE_INFERENCE', True) if enabled is None else enabled
+        self.target_fps = float(target_fps or getattr(Config, 'ADAPTIVE_TARGET_FPS', 15))
+        self.sizes = tuple(sorted(sizes or getattr(Config, 'ADAPTIVE_IMGSZ_CHOICES', (320, 480, 640))))
+        self.max_stride = max(1, int(max_stride or getattr(Config, 'ADAPTIVE_MAX_STRIDE', 3)))
+        if max_inference_fps is None:
+            max_inference_fps = getattr(Config, 'POSE_INFERENCE_MAX_FPS', 0)
+        self.min_inference_interval = 1.0 / max_inference_fps if max_inference_fps else 0.0
+
+        self.size_index = len(self.sizes) - 1  # 從最大尺寸開始
+        self.stride = 1
+        self.frame_index = 0
+        self._frames_since_change = 0
+        self._infer_ema = None  # 有推論的幀耗時
+        self._skip_ema = None   # 追蹤推算幀耗時
+        self._last_inference_time = 0.0
+        self.tracker = KeypointTracker()
+        self.inferred_frames = 0
+        self.tracked_frames = 0
+
+    @property
+    def imgsz(self):
+        """目前的模型輸入尺寸，停用時返回 None（使用模型預設值）"""
+        return self.sizes[self.size_index] if self.enabled else None
+
+    @property
+    def budget(self):
+        """每幀的時間預算（秒）"""
+        return 1.0 / self.target_fps
+
+    def reset(self):
+        """清除關鍵點追蹤狀態（切換運動或重新開始檢測時使用）"""
+        self.tracker.reset()
+
+    def _should_infer(self, now):
+        """本幀是否執行姿態推論"""
+        if not self.tracker.initialized:
+            return True
+        if self.enabled and self.stride > 1 and self.frame_index % self.stride != 0:
+            return False
+        if now - self._last_inference_time < self.min_inference_interval:
+            return False
+        return True
+
+    def build_inference(self, source, frame, pose_model, exercise_models, pose_conf=0.3):
+        """建立本幀的推論結果包
+
+        Args:
+            source (numpy.ndarray): 原始影像
+            frame (numpy.ndarray): 處理用影像（關鍵點座標以此為準）
+            pose_model: YOLO-Pose 模型
+            exercise_models (dict): 運動分類模型字典
+            pose_conf (float): 姿態模型置信度門檻
+
+        Returns:
+            FrameInference: 推論結果包，跳過推論的幀帶有追蹤器推算的關鍵點
+        """
+        self.frame_index += 1
+        now = time.time()
+        if not self._should_infer(now):
+            predicted = self.tracker.predict(now)
+            if predicted is not None:
+                keypoints, conf = predicted
+                self.tracked_frames += 1
+                return FrameInference(frame, pose_model, exercise_models, pose_conf,
+                                      imgsz=self.imgsz, keypoints=keypoints, keypoint_conf=conf)
+
+        self._last_inference_time = now
+        self.inferred_frames += 1
+        return FrameInference(frame, pose_model, exercise_models, pose_conf,
+                              source=source, imgsz=self.imgsz)
+
+    def observe(self, inference, elapsed):
+        """記錄本幀的結果與處理耗時，並視需要調整解析度與推論間隔
+
+        Args:
+            inference (FrameInference): 本幀的推論結果包
+            elapsed (float): 本幀處理耗時（秒）
+        """
+        if inference.interpolated:
+            self._skip_ema = self._ema(self._skip_ema, elapsed)
+        else:
+            self._infer_ema = self._ema(self._infer_ema, elapsed)
+            # 每次真正推論後重新錨定追蹤器
+            keypoints = inference.keypoints
+            if keypoints is None:
+                self.tracker.reset()
+            else:
+                self.tracker.update(keypoints, inference.keypoint_conf, inference.timestamp)
+
+        if self.enabled:
+            self._adjust()
+
+    def _ema(self, current, value):
+        return value if current is None else current + self.EMA_ALPHA * (value - current)
+
+    def average_frame_time(self):
+        """以目前推論間隔估計的平均每幀耗時（秒）"""
+        if self._infer_ema is None:
+            return None
+        skip = self._skip_ema if self._skip_ema is not None else 0.0
+        return (self._infer_ema + (self.stride - 1) * skip) / self.stride
+
+    def _adjust(self):
+        self._frames_since_change += 1
+        if self._frames_since_change < self.COOLDOWN_FRAMES:
+            return
+
+        frame_time = self.average_frame_time()
+        if frame_time is None:
+            return
+
+        previous = (self.imgsz, self.stride)
+        if frame_time > self.budget * self.SLOW_RATIO:
+            # 太慢：先降低解析度，再拉大推論間隔
+            if self.size_index > 0:
+                self.size_index -= 1
+            elif self.stride < self.max_stride:
+                self.stride += 1
+        elif frame_time < self.budget * self.FAST_RATIO:
+            # 有餘裕：先縮小推論間隔，再提高解析度
+            if self.stride > 1:
+                self.stride -= 1
+            elif self.size_index < len(self.sizes) - 1:
+                self.size_index += 1
+
+        if (self.imgsz, self.stride) != previous:
+            self._frames_since_change = 0
+            logger.info(f"自適應推論調整: imgsz {previous[0]} → {self.imgsz}, "
+                        f"間隔 {previous[1]} → {self.stride} (平均每幀 {frame_time * 1000:.1f}ms)")
+
+    def get_stats(self):
+        """取得目前的控制狀態"""
+        frame_time = self.average_frame_time()
+        return {
+            'enabled': self.enabled,
+            'imgsz': self.imgsz,
+            'stride': self.stride,
+            'target_fps': self.target_fps,
+            'infer_ms': self._infer_ema * 1000.0 if self._infer_ema is not None else None,
+            'skip_ms': self._skip_ema * 1000.0 if self._skip_ema is not None else None,
+            'frame_ms': frame_time * 1000.0 if frame_time is not None else None,
+            'inferred_frames': self.inferred_frames,
+            'tracked_frames': self.tracked_frames,
+        }
@@ -2,7 +2,7 @@ import cv2
 import numpy as np
 import time
 import logging
-from app import socketio
+from app.services.detection_session import session_emit
 
 # 設置日誌
 logger = logging.getLogger(__name__)
@@ -213,7 +213,7 @@ class AlternatingArmSwingService:
             
             # 發送時間更新到前端
             progress = min(self.accumulated_time / self.target_time, 1.0)
-            socketio.emit('timer_update', {
+            session_emit('timer_update', {
                 'accumulated_time': round(self.accumulated_time, 1),
                 'target_time': self.target_time,
                 'progress': round(progress * 100, 1),
@@ -230,7 +230,7 @@ class AlternatingArmSwingService:
     def complete_exercise(self):
         """完成運動"""
         logger.info(f"雙手輪流擺動熱身運動完成！累積時間: {self.accumulated_time:.1f}秒")
-        socketio.emit('exercise_completed', {
+        session_emit('exercise_completed', {
             'message': '恭喜！您已完成雙手輪流擺動熱身運動！',
             'exercise_type': 'Alternating Arm Swing Warmup',
             'accumulated_time': round(self.accumulated_time, 1),
@@ -303,7 +303,7 @@ class AlternatingArmSwingService:
                                left_shoulder_angle, right_shoulder_angle, is_correct_motion)
         
         # 發送品質分數到前端（包含運動類型信息）
-        socketio.emit('pose_quality', {
+        session_emit('pose_quality', {
             'score': self.quality_score,
             'exercise_type': 'Alternating Arm Swing Warmup'
         }, namespace='/exercise')
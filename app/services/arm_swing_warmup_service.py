@@ -2,7 +2,7 @@ import cv2
 import numpy as np
 import time
 import logging
-from app import socketio
+from app.services.detection_session import session_emit
 
 # 設置日誌
 logger = logging.getLogger(__name__)
@@ -185,7 +185,7 @@ class ArmSwingWarmupService:
                 self.exercise_count += 1
                 self.last_swing_time = current_time
                 logger.info(f"手臂擺動完成，計數: {self.exercise_count}")
-                socketio.emit('exercise_count_update', {'count': self.exercise_count}, namespace='/exercise')
+                session_emit('exercise_count_update', {'count': self.exercise_count}, namespace='/exercise')
             
             # 更新狀態
             self.swing_state = current_phase
@@ -196,7 +196,7 @@ class ArmSwingWarmupService:
         self.draw_exercise_info(annotated_frame, left_arm_angle, right_arm_angle, swing_amplitude, symmetry_score)
         
         # 發送品質分數到前端
-        socketio.emit('pose_quality', {'score': self.quality_score}, namespace='/exercise')
+        session_emit('pose_quality', {'score': self.quality_score}, namespace='/exercise')
         
         # 發送角度數據
         angle_data = {
@@ -205,7 +205,7 @@ class ArmSwingWarmupService:
             '擺動幅度': float(swing_amplitude),
             '對稱性分數': float(symmetry_score)
         }
-        socketio.emit('angle_data', angle_data, namespace='/exercise')
+        session_emit('angle_data', angle_data, namespace='/exercise')
     
     def draw_exercise_info(self, frame, left_arm_angle, right_arm_angle, swing_amplitude, symmetry_score):
         """在畫面上繪製運動信息"""
@@ -4,9 +4,9 @@ import time
 import numpy as np
 import math
 import logging
-import torch
-from ultralytics import YOLO
+from .model_registry import get_pose_model
 import os
+from .inference_scheduler import batched_model
 
 # 配置logger
 logger = logging.getLogger(__name__)
@@ -53,9 +53,8 @@ class BasketballService:
     def get_model(cls):
         if cls._model is None:
             try:
-                # 確保模型文件路徑正確
-                model_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'yolov8n-pose.pt')
-                cls._model = YOLO(model_path)
+                # 與其他服務共用同一個姿態模型
+                cls._model = get_pose_model()
                 logger.info("成功載入YOLO-Pose模型")
             except Exception as e:
                 logger.error(f"載入YOLO-Pose模型失敗: {e}")
@@ -111,7 +110,7 @@ class ShootingDetector:
         self.assist_hand_angle_timer = None
         
         # 載入 YOLO-Pose 模型
-        self.pose_model = BasketballService.get_model()
+        self.pose_model = batched_model(BasketballService.get_model())
             
         self.last_shooting_time = 0  # 初始化為 0 而不是 None
         # 新增計時器和模式變數
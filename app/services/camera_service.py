@@ -2,16 +2,16 @@ import cv2
 import logging
 import threading
 import time
-import queue
+
+from app.utils.frame_mailbox import FrameMailbox
+from app.utils.async_runtime import offload
 
 logger = logging.getLogger(__name__)
 
 # 全域變數
 camera = None
-frame_buffer = None  # 幀緩衝
-frame_available = threading.Event()   # 幀可用事件
+frame_mailbox = FrameMailbox()    # 最新幀信箱
 camera_lock = threading.Lock()    # 攝影機鎖
-frame_buffer = queue.Queue(maxsize=2)
 
 def find_available_camera():
     """自動檢測可用的攝影機索引，從索引3開始檢測"""
@@ -80,7 +80,7 @@ def get_camera():
 
 def capture_frames():     # 捕獲幀
     """持續捕獲幀的線程函數"""
-    global camera, frame_buffer
+    global camera
     
     logger.info("開始捕捉視訊幀")
     
@@ -92,8 +92,8 @@ def capture_frames():     # 捕獲幀
                     if camera is not None:
                         camera.release()
                     
-                    # 重新檢測可用的攝影機索引
-                    camera_index = find_available_camera()
+                    # 重新檢測可用的攝影機索引（逐一開啟攝影機，交給作業系統執行緒）
+                    camera_index = offload(find_available_camera)
                     if camera_index is None:
                         logger.error("無法找到可用的攝影機")
                         time.sleep(1)
@@ -112,7 +112,8 @@ def capture_frames():     # 捕獲幀
                     continue
         
         try:
-            ret, frame = camera.read()
+            # 協程模式下此迴圈是協程，read() 依幀率阻塞約一幀時間，須交給作業系統執行緒
+            ret, frame = offload(camera.read)
             if not ret:
                 # 減少無法讀取幀的日誌輸出頻率
                 if not hasattr(capture_frames, 'error_count'):
@@ -124,14 +125,8 @@ def capture_frames():     # 捕獲幀
                 time.sleep(0.1)
                 continue
             
-            # 更新幀緩衝
-            frame_buffer = frame.copy()
-            
-            # 通知等待的線程有新幀可用
-            frame_available.set()
-            
-            # 控制幀率
-            time.sleep(0.01)
+            # 更新最新幀並通知等待的線程，camera.read() 已依攝影機幀率阻塞
+            frame_mailbox.put(frame)
         except Exception as e:
             logger.error(f"捕捉幀時出錯: {e}")
             time.sleep(0.1)
@@ -140,22 +135,20 @@ def capture_frames():     # 捕獲幀
 # 取得當前幀
 def get_current_frame():
     """取得當前幀"""
-    global frame_buffer
-    
-    if frame_buffer is None:
+    seq, frame = frame_mailbox.latest()
+    if frame is None:
         # 等待幀可用
-        if not frame_available.wait(timeout=1.0):
+        seq, frame = frame_mailbox.wait_for_newer(seq, timeout=1.0)
+        if frame is None:
             logger.warning("等待幀逾時")
             return None
-        frame_available.clear()
     
-    return frame_buffer.copy() if frame_buffer is not None else None
+    return frame.copy()
 
 
 def wait_for_frame(timeout=1.0):
     """等待新幀可用"""
-    frame_available.wait(timeout)
-    frame_available.clear()
+    frame_mailbox.wait_for_newer(frame_mailbox.seq, timeout)
 
 def release_camera():
     """釋放攝影機資源"""
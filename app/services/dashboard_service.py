@@ -0,0 +1,166 @@
+import logging
+
+from app.config import Config
+from app.database import get_db_connection
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# 運動類型對應的肌肉群與權重（與原本儀表板的計算一致），未列出的類型計入核心
+MUSCLE_GROUPS = {
+    'bicep-curl': ('arms', 2),
+    'tricep-extension': ('arms', 2),
+    'push-up': ('chest', 3),
+    'bench-press': ('chest', 3),
+    'squat': ('legs', 4),
+    'lunge': ('legs', 4),
+    'shoulder-press': ('shoulders', 3),
+}
+
+# 每位使用者的儀表板結果快取，寫入新的運動紀錄時清除
+_dashboard_cache = TTLCache(maxsize=getattr(Config, 'DASHBOARD_CACHE_SIZE', 512),
+                            ttl=getattr(Config, 'DASHBOARD_CACHE_TTL', 30))
+
+# 依運動類型彙總全部紀錄（student_id 前綴的覆蓋索引，不讀取資料列）
+TYPE_SUMMARY_QUERY = """
+    SELECT exercise_type,
+           COUNT(*) AS count,
+           SUM(weight) AS total_weight,
+           SUM(weight * reps * sets * 0.1) AS total_calories,
+           MIN(timestamp) AS first_at,
+           MAX(timestamp) AS last_at
+    FROM exercise_info
+    WHERE student_id = %s
+    GROUP BY exercise_type
+"""
+
+# 近 7 天每日熱量（student_id + timestamp 範圍掃描）
+RECENT_DAYS_QUERY = """
+    SELECT DATE(timestamp) AS date,
+           SUM(weight * reps * sets * 0.1) AS daily_calories
+    FROM exercise_info
+    WHERE student_id = %s AND timestamp >= DATE_SUB(NOW(), INTERVAL 7 DAY)
+    GROUP BY DATE(timestamp)
+    ORDER BY date
+"""
+
+# 最近 5 筆紀錄（沿索引倒序讀取 5 筆）
+RECENT_RECORDS_QUERY = """
+    SELECT exercise_type, timestamp AS date, reps, sets
+    FROM exercise_info
+    WHERE student_id = %s
+    ORDER BY timestamp DESC
+    LIMIT 5
+"""
+
+
+def empty_dashboard():
+    """沒有運動紀錄時的儀表板資料"""
+    return {
+        'total_weight': 0,
+        'total_calories': 0,
+        'total_training_time': 0,
+        'training_frequency': 0,
+        'calories_trend': [],
+        'muscle_growth': {
+            'arms': 0, 'chest': 0, 'core': 0, 'legs': 0, 'shoulders': 0
+        },
+        'exercise_stats': [],
+        'recent_exercises': []
+    }
+
+
+def build_dashboard(type_rows, day_rows, recent_rows):
+    """由彙總查詢的結果組成儀表板資料"""
+    if not type_rows:
+        return empty_dashboard()
+
+    total_weight = sum(float(row['total_weight'] or 0) for row in type_rows)
+    total_calories = sum(float(row['total_calories'] or 0) for row in type_rows)
+    first_at = min(row['first_at'] for row in type_rows)
+    last_at = max(row['last_at'] for row in type_rows)
+    # 與 TIMESTAMPDIFF(MINUTE, ...) 相同，捨去不足一分鐘的部分
+    total_training_time = int((last_at - first_at).total_seconds() // 60)
+
+    muscle_growth = {'arms': 0, 'chest': 0, 'core': 0, 'legs': 0, 'shoulders': 0}
+    for row in type_rows:
+        group, weight = MUSCLE_GROUPS.get(row['exercise_type'], ('core', 1))
+        muscle_growth[group] += int(row['count']) * weight
+
+    ranked = sorted(type_rows, key=lambda row: row['count'], reverse=True)[:5]
+    exercise_stats = [{'name': row['exercise_type'], 'count': int(row['count'])} for row in ranked]
+
+    # 近 7 天沒有紀錄時至少提供一個資料點
+    calories_trend = [float(row['daily_calories'] or 0) for row in day_rows] or [0.0]
+
+    recent_exercises = [{
+        'date': row['date'].strftime('%Y-%m-%d'),
+        'exercise': row['exercise_type'],
+        'reps': row['reps']
+    } for row in recent_rows]
+
+    return {
+        'total_weight': total_weight,
+        'total_calories': total_calories,
+        'total_training_time': total_training_time,
+        'training_frequency': len(day_rows),
+        'calories_trend': calories_trend,
+        'muscle_growth': muscle_growth,
+        'exercise_stats': exercise_stats,
+        'recent_exercises': recent_exercises
+    }
+
+
+def get_fitness_dashboard(student_id):
+    """取得使用者的健身儀表板資料
+
+    先查快取；未命中時以一次依類型彙總、一次近 7 天範圍掃描與一次最近 5 筆
+    查詢取代原本逐項統計的八個查詢。
+
+    Args:
+        student_id (str): 使用者的學號（exercise_info.student_id）
+
+    Returns:
+        dict: 儀表板資料，資料庫無法連線時返回 None
+    """
+    cached = _dashboard_cache.get(student_id)
+    if cached is not None:
+        return cached
+
+    conn = get_db_connection()
+    if not conn:
+        logger.error(f"用戶 {student_id} 的數據庫連接失敗")
+        return None
+
+    try:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(TYPE_SUMMARY_QUERY, (student_id,))
+            type_rows = cursor.fetchall()
+            if type_rows:
+                cursor.execute(RECENT_DAYS_QUERY, (student_id,))
+                day_rows = cursor.fetchall()
+                cursor.execute(RECENT_RECORDS_QUERY, (student_id,))
+                recent_rows = cursor.fetchall()
+            else:
+                logger.warning(f"用戶 {student_id} 沒有運動記錄")
+                day_rows, recent_rows = [], []
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+
+    dashboard = build_dashboard(type_rows, day_rows, recent_rows)
+    _dashboard_cache.set(student_id, dashboard)
+    return dashboard
+
+
+def invalidate_user_stats(student_id):
+    """使用者寫入新的運動紀錄後清除其統計快取"""
+    if student_id is not None:
+        _dashboard_cache.invalidate(str(student_id).strip())
+
+
+def get_cache_stats():
+    """取得儀表板快取的命中統計"""
+    return _dashboard_cache.get_stats()
@@ -2,11 +2,11 @@ import logging
 import mysql.connector
 from mysql.connector import Error
 from flask import current_app
-from app.database import get_db_connection  # 使用統一的資料庫連接函數
+from app.database import get_db_connection, db_connection, get_pool_stats  # 使用統一的資料庫連接函數（連線池）
 
 logger = logging.getLogger(__name__)
 
-# get_db_connection 函數現在從 app.database 導入，確保所有模組使用相同的資料庫配置
+# get_db_connection 函數現在從 app.database 導入，確保所有模組使用相同的資料庫配置與連線池
 
 def test_db_connection():
     """測試數據庫連接"""
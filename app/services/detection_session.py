@@ -0,0 +1,474 @@
+import time
+import threading
+import logging
+from contextlib import contextmanager
+
+from app import socketio
+from app.config import Config
+from app.utils.frame_mailbox import FrameMailbox
+from app.utils.frame_ring import FrameRing, FrameSlot
+
+logger = logging.getLogger(__name__)
+
+# 所有連線中的檢測會話，以 Socket.IO sid 為鍵
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# 斷線後保留的檢測會話，以客戶端的 session_key 為鍵，值為 (會話, 到期時間)；
+# 寬限期內以相同 session_key 開始檢測時接回原本的計數與追蹤狀態
+_retained = {}
+
+# 執行緒綁定的會話（影像擷取/處理執行緒使用）
+_thread_local = threading.local()
+
+
+class DetectionSession:
+    """單一連線的檢測會話
+
+    保存一個客戶端的所有計數、品質評分、檢測線與影像管線狀態，
+    讓同一個程序可以同時服務多位使用者。以 Socket.IO 的 sid 作為識別，
+    沒有 sid 的會話（HTTP 請求或背景工作）使用預設會話。
+    """
+
+    def __init__(self, sid=None, namespace='/exercise'):
+        """
+        Args:
+            sid (str): Socket.IO 連線 ID，None 表示預設會話
+            namespace (str): 連線所屬的命名空間
+        """
+        self.sid = sid
+        self.namespace = namespace
+        self.created_at = time.time()
+        self.last_active = self.created_at
+        self.lock = threading.RLock()
+
+        # 影像管線狀態
+        self.frame_buffer = FrameMailbox(on_discard=_release_frame)  # 擷取 → 處理（FrameSlot）
+        self.frame_ring = None  # 擷取端寫入的預先配置影像格，見 ensure_frame_ring()
+        self.processed_frame_buffer = FrameMailbox()  # 處理 → MJPEG 串流
+        self.video_thread = None
+        self.process_thread = None
+        self.pipeline = None  # 處理執行緒建立的 FramePipeline（編碼/發送階段）
+        self.frame_transport = 'base64'  # 'binary' 或 'base64'（舊版客戶端）
+        self.stream_mode = 'video'  # 'video' 傳送標註影像，'keypoints' 只傳送關鍵點資料
+        self.frame_source = 'camera'  # 'camera' 伺服器攝影機，'client' 客戶端上傳影像
+        self.node_session_key = None  # 向節點登錄取得的檢測會話識別，見 node_registry
+        self.detection_exercise_type = None  # 目前檢測開始時的運動類型，重新連線時判斷能否接續
+        self.frame_timings = {}  # 最近一幀 process_frame_realtime 各階段耗時（秒）
+        self.client_frame_seq = -1  # 最後接受的客戶端幀序號
+        self.client_frames_received = 0
+        self.client_frames_dropped = 0
+
+        # 各檢測模式的啟用狀態與檢測器會話 ID
+        self.table_tennis_active = False
+        self.table_tennis_session_id = None
+        self.basketball_active = False
+        self.basketball_session_id = None
+        self.basketball_dribble_active = False
+        self.basketball_dribble_session_id = None
+        self.volleyball_overhand_active = False
+        self.volleyball_overhand_session_id = None
+        self.volleyball_lowhand_active = False
+        self.volleyball_lowhand_session_id = None
+        self.alternating_arm_swing_active = False
+        self.alternating_arm_swing_session_id = None
+        self.plank_active = False
+        self.plank_session_id = None
+        self.taekwondo_detail_active = False
+        self.taekwondo_detail_session_id = None
+
+        # 時間型運動服務，每個會話各自一份
+        from app.services.arm_swing_warmup_service import ArmSwingWarmupService
+        from app.services.alternating_arm_swing_service import AlternatingArmSwingService
+        from app.services.plank_service import PlankService
+        self.arm_swing_warmup_service = ArmSwingWarmupService()
+        self.alternating_arm_swing_service = AlternatingArmSwingService()
+        self.plank_service = PlankService()
+
+        # 姿態推論解析度與跳幀控制
+        from app.services.adaptive_inference import AdaptiveInferenceController
+        self.inference_controller = AdaptiveInferenceController()
+
+        self.reset_exercise_state()
+
+    def reset_exercise_state(self):
+        """將運動計數相關狀態恢復為初始值"""
+        self.angles = {}
+        self.detection_active = False
+        self.exercise_count = 0
+        self.last_pose = None
+        self.mid_pose_detected = False
+        self.squat_state = "up"
+        self.last_squat_time = 0
+        self.detection_line_set = False
+        self.detection_line_y = 0
+        self.detection_line = 0.5  # 前端指定的檢測線位置值
+        self.knee_line_coords = None
+        self.squat_quality_score = 0
+        self.detection_line_set_shoulder = False
+        self.detection_line_y_shoulder = 0
+        self.detection_line_set_bicep = False
+        self.elbow_line_coords = None
+        self.bicep_quality_score = 0
+        self.bicep_state = "down"
+        self.last_curl_time = 0
+        self.shoulder_state = "init"
+        self.shoulder_press_state = "down"
+        self.shoulder_quality_score = 0
+        self.last_shoulder_press_time = 0  # 肩推計數時間間隔控制
+        self.current_exercise_type = 'squat'  # 預設運動類型
+        self.target_reps = 10  # 預設目標重複次數
+        self.target_sets = 3   # 預設目標組數
+        self.current_set = 1   # 當前組數
+        self.remaining_sets = 3
+
+        # 伏地挺身、引體向上、啞鈴划船狀態
+        self.pushup_state = "up"
+        self.pullup_state = "down"
+        self.dumbbell_row_state = "start"
+        self.last_pushup_time = 0
+        self.last_pullup_time = 0
+        self.last_dumbbell_row_time = 0
+
+        # 啞鈴划船混合計數系統
+        self.dumbbell_row_pose_score_history = []  # 姿勢分數歷史
+        self.dumbbell_row_pose_state = "low"  # 姿勢分數狀態：'low', 'high', 'transition'
+        self.last_pose_count_time = 0  # 姿勢分數計數時間
+        self.yolo_detected_this_cycle = False  # 當前週期YOLO是否已檢測
+
+        # 智能手臂選擇
+        self.current_active_arm = "right"  # 當前選擇的手臂：'left' 或 'right'
+        self.last_arm_switch_time = 0      # 上次切換時間
+
+        # 伏地挺身、引體向上、啞鈴划船檢測線
+        self.detection_line_set_pushup = False
+        self.detection_line_y_pushup = 0
+        self.detection_line_set_pullup = False
+        self.detection_line_y_pullup = 0
+        self.detection_line_set_dumbbell_row = False
+        self.detection_line_y_dumbbell_row = 0
+        self.back_detection_line_x = 0
+
+        # 品質評分
+        self.pushup_quality_score = 0
+        self.pullup_quality_score = 0
+        self.dumbbell_row_quality_score = 0
+        self.quality_frame_count = 0
+
+        # 前端顯示資料
+        self.current_angles = {
+            '左手肘': 0, '右手肘': 0, '左膝蓋': 0, '右膝蓋': 0,
+            '左肩膀': 0, '右肩膀': 0, '左髖部': 0, '右髖部': 0
+        }
+        self.current_coach_tip = "請保持正確姿勢，開始運動"
+        self.latest_quality = 0
+
+        # 最近一次的單幀推論結果與待套用的檢測線設置
+        self.latest_inference = None
+        self.pending_detection_lines = set()
+
+        self.last_switch_time = 0  # 上次切換運動時間
+
+    def touch(self):
+        """更新最後活動時間"""
+        self.last_active = time.time()
+
+    def _target_sid(self, namespace):
+        """取得此會話在指定命名空間下的 sid"""
+        if namespace == self.namespace:
+            return self.sid
+        # 同一個客戶端在其他命名空間的連線有不同的 sid，透過底層連線換算
+        try:
+            manager = socketio.server.manager
+            eio_sid = manager.eio_sid_from_sid(self.sid, self.namespace)
+            return manager.sid_from_eio_sid(eio_sid, namespace)
+        except Exception:
+            return None
+
+    def emit(self, event, *args, **kwargs):
+        """只發送事件給此會話的客戶端
+
+        預設會話沒有 sid，維持原本的廣播行為。
+        """
+        if self.sid is not None and 'to' not in kwargs and 'room' not in kwargs:
+            target = self._target_sid(kwargs.get('namespace') or '/')
+            if target is None:
+                return
+            kwargs['to'] = target
+        socketio.emit(event, *args, **kwargs)
+
+    def ensure_frame_ring(self, shape):
+        """取得指定影像尺寸的環形緩衝區，尺寸不同時重新配置
+
+        Args:
+            shape (tuple): 影像形狀，例如 (720, 720, 3)
+
+        Returns:
+            FrameRing: 擷取端寫入、處理端就地讀取的影像格
+        """
+        with self.lock:
+            ring = self.frame_ring
+            if ring is None or ring.closed or ring.shape != tuple(shape):
+                if ring is not None:
+                    ring.close()
+                ring = FrameRing(getattr(Config, 'FRAME_RING_SLOTS', 4), shape,
+                                 shared=getattr(Config, 'FRAME_RING_SHARED', True))
+                self.frame_ring = ring
+            return ring
+
+    def reattach(self, sid, namespace='/exercise'):
+        """把斷線後保留的會話接到新的連線
+
+        計數、品質評分、檢測線與推論控制器等狀態沿用，影像管線隨舊連線結束，
+        重新建立空的信箱，由開始檢測時啟動新的執行緒。
+        """
+        with self.lock:
+            self.sid = sid
+            self.namespace = namespace
+            self.frame_buffer = FrameMailbox(on_discard=_release_frame)
+            self.frame_ring = None
+            self.processed_frame_buffer = FrameMailbox()
+            self.video_thread = None
+            self.process_thread = None
+            self.pipeline = None
+            self.client_frame_seq = -1
+            self.client_frames_received = 0
+            self.client_frames_dropped = 0
+        self.touch()
+
+    def stop(self):
+        """停止此會話的影像管線"""
+        self.detection_active = False
+        for thread in (self.video_thread, self.process_thread):
+            if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+                thread.join(timeout=2.0)
+        self.video_thread = None
+        self.process_thread = None
+
+
+def _release_frame(frame):
+    """釋放信箱中未被取走的影像格"""
+    if isinstance(frame, FrameSlot):
+        frame.release()
+
+
+class _SessionStateProxy:
+    """將屬性存取轉發到目前會話的代理物件
+
+    讓服務模組以 `state.exercise_count` 的寫法讀寫目前會話的狀態，
+    不需要在每個函數間傳遞會話物件。
+    """
+
+    def __getattr__(self, name):
+        return getattr(current_session(), name)
+
+    def __setattr__(self, name, value):
+        setattr(current_session(), name, value)
+
+
+state = _SessionStateProxy()
+
+# 預設會話，提供沒有 Socket.IO 連線時使用
+_default_session = None
+
+
+def get_default_session():
+    """取得預設會話"""
+    global _default_session
+    if _default_session is None:
+        with _sessions_lock:
+            if _default_session is None:
+                _default_session = DetectionSession()
+    return _default_session
+
+
+def _request_sid():
+    """取得目前 Socket.IO 請求的 sid 與命名空間，不在事件處理中時返回 (None, None)"""
+    try:
+        from flask import has_request_context, request
+        if has_request_context():
+            return getattr(request, 'sid', None), getattr(request, 'namespace', None)
+    except Exception:
+        pass
+    return None, None
+
+
+def current_session():
+    """取得目前執行緒對應的會話
+
+    依序使用：執行緒綁定的會話、目前 Socket.IO 事件的 sid、預設會話。
+    """
+    session = getattr(_thread_local, 'session', None)
+    if session is not None:
+        return session
+
+    sid, namespace = _request_sid()
+    if sid is not None:
+        return get_session(sid, namespace=namespace or '/exercise')
+
+    return get_default_session()
+
+
+def get_session(sid, create=True, namespace='/exercise'):
+    """依 sid 取得會話，不存在時建立
+
+    Args:
+        sid (str): Socket.IO 連線 ID
+        create (bool): 不存在時是否建立新會話
+        namespace (str): 建立新會話時使用的命名空間
+
+    Returns:
+        DetectionSession: 對應的會話，create 為 False 且不存在時返回 None
+    """
+    if sid is None:
+        return get_default_session()
+
+    session = _sessions.get(sid)
+    if session is None and create:
+        expire_retained_sessions()
+        with _sessions_lock:
+            session = _sessions.get(sid)
+            if session is None:
+                session = DetectionSession(sid, namespace)
+                _sessions[sid] = session
+                logger.info(f"建立檢測會話: {sid} (目前 {len(_sessions)} 個)")
+    return session
+
+
+def retain_grace_seconds():
+    """斷線後保留檢測會話的秒數，未設定時為節點心跳間隔的三倍"""
+    grace = getattr(Config, 'DETECTION_SESSION_GRACE_SECONDS', None)
+    if grace is None:
+        grace = getattr(Config, 'NODE_HEARTBEAT_SECONDS', 5) * 3
+    return max(0.0, float(grace))
+
+
+def _key_attached(session_key):
+    """是否有連線中的會話正使用此 session_key（呼叫端需持有 _sessions_lock）"""
+    return any(session.node_session_key == session_key for session in _sessions.values())
+
+
+def _release_node_claim(session_key):
+    from app.services.node_registry import get_node_registry
+    get_node_registry().release_session(session_key)
+
+
+def remove_session(sid):
+    """停止並移除會話
+
+    會話仍持有節點歸屬（檢測進行中斷線）時，停止影像管線但保留計數與追蹤狀態，
+    歸屬同樣保留到寬限期結束，客戶端重新連線後以相同的 session_key 開始檢測即可接回。
+
+    Returns:
+        DetectionSession: 被移除的會話，不存在時返回 None
+    """
+    with _sessions_lock:
+        session = _sessions.pop(sid, None)
+    if session is not None:
+        # 先關閉信箱喚醒阻塞等待中的執行緒，再等待執行緒結束
+        session.frame_buffer.close()
+        session.processed_frame_buffer.close()
+        session.stop()
+        if session.frame_ring is not None:
+            session.frame_ring.close()
+        # 解除與姿態推論工作程序的綁定
+        from app.services.pose_worker_pool import get_pose_worker_pool
+        pool = get_pose_worker_pool()
+        if pool is not None:
+            pool.release(sid)
+
+        session_key = session.node_session_key
+        if session_key is not None:
+            grace = retain_grace_seconds()
+            with _sessions_lock:
+                # 同一個 session_key 已由新的連線接手時，歸屬交給新連線
+                attached = _key_attached(session_key)
+                retain = grace > 0 and not attached
+                if retain:
+                    _retained[session_key] = (session, time.time() + grace)
+            if retain:
+                timer = threading.Timer(grace + 0.1, expire_retained_sessions)
+                timer.daemon = True
+                timer.start()
+                logger.info(f"保留檢測會話 {session_key} {grace:.0f} 秒等待重新連線")
+            elif not attached:
+                _release_node_claim(session_key)
+        logger.info(f"移除檢測會話: {sid} (剩餘 {len(_sessions)} 個)")
+    expire_retained_sessions()
+    return session
+
+
+def resume_session(sid, session_key, namespace='/exercise'):
+    """以保留的檢測會話取代 sid 目前的會話
+
+    Args:
+        sid (str): 新連線的 Socket.IO sid
+        session_key (str): 客戶端在重新連線間保留的檢測會話識別
+
+    Returns:
+        DetectionSession: 接回的會話，沒有保留的會話或已過期時返回 None
+    """
+    expire_retained_sessions()
+    with _sessions_lock:
+        item = _retained.pop(session_key, None)
+        if item is None:
+            return None
+        session = item[0]
+        replaced = _sessions.get(sid)
+        session.reattach(sid, namespace)
+        _sessions[sid] = session
+    if replaced is not None and replaced is not session:
+        replaced.frame_buffer.close()
+        replaced.processed_frame_buffer.close()
+        if replaced.node_session_key not in (None, session_key):
+            _release_node_claim(replaced.node_session_key)
+    logger.info(f"接回檢測會話 {session_key}: {sid}")
+    return session
+
+
+def expire_retained_sessions():
+    """釋放超過寬限期仍未接回的檢測會話與其節點歸屬"""
+    now = time.time()
+    with _sessions_lock:
+        expired = [key for key, (_, expires_at) in _retained.items() if expires_at <= now]
+        released = []
+        for key in expired:
+            del _retained[key]
+            if not _key_attached(key):
+                released.append(key)
+    for key in released:
+        _release_node_claim(key)
+        logger.info(f"檢測會話 {key} 未在寬限期內重新連線，已釋放")
+
+
+def list_sessions():
+    """取得所有連線中的會話"""
+    with _sessions_lock:
+        return list(_sessions.values())
+
+
+def latest_active_session():
+    """取得最近活動且正在檢測的會話，沒有時返回預設會話"""
+    active = [s for s in list_sessions() if s.detection_active]
+    if not active:
+        return get_default_session()
+    return max(active, key=lambda s: s.last_active)
+
+
+@contextmanager
+def bind_session(session):
+    """在目前執行緒中綁定會話
+
+    用於影像處理等背景執行緒，讓其中呼叫的服務函數存取正確的會話狀態。
+    """
+    previous = getattr(_thread_local, 'session', None)
+    _thread_local.session = session
+    try:
+        yield session
+    finally:
+        _thread_local.session = previous
+
+
+def session_emit(event, *args, **kwargs):
+    """透過目前會話發送事件"""
+    current_session().emit(event, *args, **kwargs)
@@ -0,0 +1,149 @@
+import time
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 各運動分類模型使用的置信度門檻（與原本各處理函數中的設定一致）
+CLASSIFIER_CONF = {
+    'squat': 0.5,
+    'bicep-curl': 0.3,
+    'shoulder-press': 0.3,
+    'dumbbell-row': 0.3,
+}
+DEFAULT_CLASSIFIER_CONF = 0.5
+
+
+class FrameInference:
+    """單幀推論結果包
+
+    每一幀只執行一次姿態模型推論，並將關鍵點、人體框與分類模型結果
+    集中保存，供所有運動處理函數共用。分類模型採延遲執行：
+    只有當前運動真正需要時才會呼叫，且同一幀內同一模型最多執行一次。
+    """
+
+    def __init__(self, frame, pose_model, exercise_models=None, pose_conf=0.3,
+                 source=None, imgsz=None, keypoints=None, keypoint_conf=None):
+        """
+        Args:
+            frame (numpy.ndarray): 處理用的影像幀，關鍵點與人體框都以此幀的座標表示
+            pose_model: YOLO-Pose 模型
+            exercise_models (dict): 運動分類模型字典，鍵為運動類型
+            pose_conf (float): 姿態模型置信度門檻
+            source (numpy.ndarray, optional): 姿態推論使用的原始影像（放大前），結果會換算到 frame 座標
+            imgsz (int, optional): 模型輸入尺寸，None 使用模型預設值
+            keypoints (numpy.ndarray, optional): 直接提供的關鍵點 (17, 2)，提供時不執行姿態推論
+            keypoint_conf (numpy.ndarray, optional): 直接提供的關鍵點置信度
+        """
+        self.frame = frame
+        self.source = source if source is not None else frame
+        self.timestamp = time.time()
+        self.pose_model = pose_model
+        self.exercise_models = exercise_models if exercise_models is not None else {}
+        self.pose_conf = pose_conf
+        self.imgsz = imgsz
+        self._pose_results = None
+        self._pose_done = False
+        self._classifications = {}
+        self._keypoints = keypoints
+        self._keypoint_conf = keypoint_conf
+        self.inference_time = 0.0  # 本幀姿態與分類模型推論的累計耗時（秒）
+
+        # 原始影像到處理影像的縮放比例 (x, y)
+        self._scale = np.array([frame.shape[1] / self.source.shape[1],
+                                frame.shape[0] / self.source.shape[0]], dtype=np.float32)
+
+    @property
+    def interpolated(self):
+        """關鍵點是否為推算值（本幀未執行姿態推論）"""
+        return self._keypoints is not None
+
+    def _model_kwargs(self, conf):
+        kwargs = {'conf': conf, 'verbose': False}
+        if self.imgsz is not None:
+            kwargs['imgsz'] = self.imgsz
+        return kwargs
+
+    @property
+    def pose_results(self):
+        """姿態模型原始結果（首次存取時才執行推論）"""
+        if not self._pose_done:
+            self._pose_done = True
+            if self.pose_model is not None and not self.interpolated:
+                start = time.perf_counter()
+                self._pose_results = self.pose_model(self.source, **self._model_kwargs(self.pose_conf))
+                self.inference_time += time.perf_counter() - start
+        return self._pose_results
+
+    @property
+    def keypoints(self):
+        """第一個人的 17 個關鍵點座標 (17, 2)，未檢測到時返回 None"""
+        if self.interpolated:
+            return self._keypoints
+        results = self.pose_results
+        if not results or len(results) == 0 or results[0].keypoints is None:
+            return None
+        xy = results[0].keypoints.xy.cpu().numpy()
+        if len(xy) == 0:
+            return None
+        # 未檢測到的關鍵點為 (0, 0)，換算後仍為 (0, 0)
+        return xy[0] * self._scale
+
+    @property
+    def keypoint_conf(self):
+        """第一個人 17 個關鍵點的置信度 (17,)，模型未提供時返回 None"""
+        if self.interpolated:
+            return self._keypoint_conf
+        results = self.pose_results
+        if not results or len(results) == 0 or results[0].keypoints is None:
+            return None
+        conf = results[0].keypoints.conf
+        if conf is None or len(conf) == 0:
+            return None
+        return conf.cpu().numpy()[0]
+
+    @property
+    def boxes(self):
+        """姿態模型檢測到的人體框 (N, 4) xyxy 格式"""
+        results = self.pose_results
+        if not results or len(results) == 0 or results[0].boxes is None:
+            return np.zeros((0, 4), dtype=np.float32)
+        return results[0].boxes.xyxy.cpu().numpy() * np.tile(self._scale, 2)
+
+    def has_classifier(self, exercise_type):
+        """檢查該運動是否有可用的分類模型"""
+        return self.exercise_models.get(exercise_type) is not None
+
+    def classify(self, exercise_type, conf=None):
+        """取得指定運動分類模型在本幀的結果
+
+        Args:
+            exercise_type (str): 運動類型
+            conf (float, optional): 置信度門檻，預設使用 CLASSIFIER_CONF
+
+        Returns:
+            list: YOLO 結果列表，模型不存在時返回 None
+        """
+        model = self.exercise_models.get(exercise_type)
+        if model is None:
+            return None
+
+        if conf is None:
+            conf = CLASSIFIER_CONF.get(exercise_type, DEFAULT_CLASSIFIER_CONF)
+
+        key = (exercise_type, conf)
+        if key not in self._classifications:
+            # 分類模型的框直接繪製在處理影像上，因此使用處理影像推論
+            start = time.perf_counter()
+            self._classifications[key] = model(self.frame, **self._model_kwargs(conf))
+            self.inference_time += time.perf_counter() - start
+        return self._classifications[key]
+
+    def class_names(self, exercise_type):
+        """取得分類模型的類別名稱"""
+        model = self.exercise_models.get(exercise_type)
+        return model.names if model is not None else {}
+
+    def is_fresh(self, max_age=1.0):
+        """檢查推論結果是否仍在有效時間內"""
+        return time.time() - self.timestamp <= max_age
@@ -0,0 +1,148 @@
+import time
+import threading
+import logging
+
+import cv2
+
+from app.config import Config
+from app.utils.drop_oldest_queue import DropOldestQueue
+from app.utils.async_runtime import offload
+
+logger = logging.getLogger(__name__)
+
+# 針對720p影像優化編碼參數
+JPEG_ENCODE_PARAM = [int(cv2.IMWRITE_JPEG_QUALITY), 25,  # 進一步降低品質以處理720p
+                     int(cv2.IMWRITE_JPEG_OPTIMIZE), 1]   # 啟用JPEG優化
+
+
+class StageTimer:
+    """單一管線階段的耗時統計"""
+
+    # 指數移動平均的平滑係數
+    EMA_ALPHA = 0.1
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.ema = 0.0
+
+    def record(self, seconds):
+        """記錄一次耗時（秒）"""
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.last = seconds
+            self.max = max(self.max, seconds)
+            self.ema = seconds if self.count == 1 else self.ema + self.EMA_ALPHA * (seconds - self.ema)
+
+    def get_stats(self):
+        """取得統計資料（毫秒）"""
+        with self._lock:
+            return {
+                'count': self.count,
+                'avg_ms': self.total / self.count * 1000.0 if self.count else 0.0,
+                'ema_ms': self.ema * 1000.0,
+                'max_ms': self.max * 1000.0,
+                'last_ms': self.last * 1000.0,
+            }
+
+
+class FramePipeline:
+    """影像處理後段的分段管線
+
+    處理執行緒只負責推論、計數與標註，處理完的影像交給編碼執行緒做 JPEG
+    編碼，再交給發送執行緒透過 Socket.IO 送出。各階段之間以丟棄最舊項目
+    的有界佇列連接，下游落後時丟棄舊幀而不阻塞上游，讓整體幀率接近推論
+    本身的上限。cv2.imencode 執行時會釋放 GIL，因此編碼可與推論平行進行。
+    """
+
+    STAGES = ('process', 'encode', 'emit')
+
+    def __init__(self, session, frame_emitter, queue_size=None):
+        """
+        Args:
+            session (DetectionSession): 所屬的檢測會話
+            frame_emitter (callable): 發送 JPEG 的函數，呼叫方式為 frame_emitter(session, frame_data)
+            queue_size (int): 階段間佇列容量
+        """
+        self.session = session
+        self.frame_emitter = frame_emitter
+        queue_size = queue_size or getattr(Config, 'PIPELINE_QUEUE_SIZE', 2)
+        self.encode_queue = DropOldestQueue(queue_size)
+        self.emit_queue = DropOldestQueue(queue_size)
+        self.timers = {stage: StageTimer() for stage in self.STAGES}
+        self._threads = []
+
+    def start(self):
+        """啟動編碼與發送執行緒"""
+        name = self.session.sid or 'default'
+        for target, label in ((self._encode_loop, 'FrameEncode'), (self._emit_loop, 'FrameEmit')):
+            thread = threading.Thread(target=target, name=f"{label}-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=2.0):
+        """關閉佇列並等待執行緒處理完剩餘項目後結束"""
+        self.encode_queue.close()
+        for thread in self._threads[:1]:
+            thread.join(timeout=timeout)
+        self.emit_queue.close()
+        for thread in self._threads[1:]:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def record_process(self, seconds):
+        """記錄處理階段（推論與標註）耗時"""
+        self.timers['process'].record(seconds)
+
+    def submit_frame(self, frame):
+        """提交已處理的影像，由編碼執行緒編碼後發送"""
+        self.encode_queue.put(frame)
+
+    def submit_event(self, event, payload):
+        """提交可丟棄的即時事件（如 pose_frame），由發送執行緒送出"""
+        self.emit_queue.put((event, payload))
+
+    def _encode_loop(self):
+        while True:
+            frame = self.encode_queue.get()
+            if frame is None:
+                if self.encode_queue.closed:
+                    break
+                continue
+            try:
+                start = time.perf_counter()
+                ok, buffer = offload(cv2.imencode, '.jpg', frame, JPEG_ENCODE_PARAM)
+                self.timers['encode'].record(time.perf_counter() - start)
+                if ok:
+                    self.emit_queue.put((None, buffer.tobytes()))
+            except Exception as e:
+                logger.error(f"影像編碼失敗: {e}")
+
+    def _emit_loop(self):
+        while True:
+            item = self.emit_queue.get()
+            if item is None:
+                if self.emit_queue.closed:
+                    break
+                continue
+            event, payload = item
+            try:
+                start = time.perf_counter()
+                if event is None:
+                    self.frame_emitter(self.session, payload)
+                else:
+                    self.session.emit(event, payload, namespace='/exercise')
+                self.timers['emit'].record(time.perf_counter() - start)
+            except Exception as e:
+                logger.error(f"發送影像資料失敗: {e}")
+
+    def get_stats(self):
+        """取得各階段耗時與丟棄幀數"""
+        stats = {stage: timer.get_stats() for stage, timer in self.timers.items()}
+        stats['encode']['dropped'] = self.encode_queue.dropped
+        stats['emit']['dropped'] = self.emit_queue.dropped
+        return stats
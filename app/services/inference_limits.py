@@ -0,0 +1,157 @@
+import os
+import time
+import threading
+import logging
+from contextlib import contextmanager
+
+from app.config import Config
+from app.utils.async_runtime import offload
+
+logger = logging.getLogger(__name__)
+
+_configured = False
+_configure_lock = threading.Lock()
+
+_semaphore = None
+_semaphore_lock = threading.Lock()
+
+# 各執行緒累計的推論耗時，見 thread_inference_time()
+_thread_local = threading.local()
+
+# 統計資料
+_stats_lock = threading.Lock()
+_stats = {
+    'calls': 0,
+    'in_flight': 0,
+    'max_in_flight': 0,
+    'total_wait': 0.0,
+    'max_wait': 0.0,
+}
+
+
+def max_concurrent_inferences():
+    """同時進行的模型推論數量上限，0 表示不限制"""
+    return max(0, int(getattr(Config, 'MAX_CONCURRENT_INFERENCES', 2)))
+
+
+def configure_torch_threads():
+    """依設定調整 PyTorch 的執行緒池（只執行一次）
+
+    未指定 intra-op 執行緒數時，以 CPU 核心數平均分給同時進行的推論，
+    讓多個推論同時執行時總執行緒數不超過核心數。必須在第一次推論前呼叫，
+    之後 set_num_interop_threads 會失敗。
+
+    Returns:
+        dict: 實際使用的執行緒設定，torch 無法使用時返回 None
+    """
+    global _configured
+
+    with _configure_lock:
+        if _configured:
+            return None
+        _configured = True
+
+        try:
+            import torch
+        except ImportError:
+            return None
+
+        cores = os.cpu_count() or 1
+        concurrency = max_concurrent_inferences() or 1
+        intra = int(getattr(Config, 'TORCH_INTRA_OP_THREADS', 0)) or max(1, cores // concurrency)
+        inter = int(getattr(Config, 'TORCH_INTER_OP_THREADS', 1))
+
+        torch.set_num_threads(intra)
+        if inter > 0:
+            try:
+                torch.set_num_interop_threads(inter)
+            except RuntimeError as e:
+                # 已有平行運算執行過時無法再調整
+                logger.warning(f"無法設定 inter-op 執行緒數: {e}")
+
+        settings = {'intra_op': torch.get_num_threads(), 'inter_op': torch.get_num_interop_threads(),
+                    'cores': cores, 'max_concurrent': concurrency}
+        logger.info(f"PyTorch 執行緒設定: intra-op {settings['intra_op']}, inter-op {settings['inter_op']} "
+                    f"(CPU {cores} 核, 同時推論上限 {concurrency})")
+        return settings
+
+
+def _get_semaphore():
+    global _semaphore
+    if _semaphore is None:
+        with _semaphore_lock:
+            if _semaphore is None:
+                limit = max_concurrent_inferences()
+                _semaphore = threading.BoundedSemaphore(limit) if limit else False
+    return _semaphore
+
+
+@contextmanager
+def inference_slot():
+    """取得一個推論名額，超過 MAX_CONCURRENT_INFERENCES 時等待其他推論完成"""
+    semaphore = _get_semaphore()
+    start = time.perf_counter()
+    if semaphore:
+        semaphore.acquire()
+    waited = time.perf_counter() - start
+
+    with _stats_lock:
+        _stats['calls'] += 1
+        _stats['in_flight'] += 1
+        _stats['max_in_flight'] = max(_stats['max_in_flight'], _stats['in_flight'])
+        _stats['total_wait'] += waited
+        _stats['max_wait'] = max(_stats['max_wait'], waited)
+    acquired = time.perf_counter()
+    try:
+        yield
+    finally:
+        _thread_local.elapsed = getattr(_thread_local, 'elapsed', 0.0) + time.perf_counter() - acquired
+        with _stats_lock:
+            _stats['in_flight'] -= 1
+        if semaphore:
+            semaphore.release()
+
+
+def thread_inference_time():
+    """目前執行緒累計的推論耗時（秒，不含等待名額的時間），用於量測單一步驟中的推論佔比"""
+    return getattr(_thread_local, 'elapsed', 0.0)
+
+
+class LimitedModel:
+    """每次呼叫都先取得推論名額的模型代理，其他屬性直接轉給原模型
+
+    協程模式（eventlet/gevent）下推論交給作業系統執行緒執行，不會卡住其他連線。
+    """
+
+    def __init__(self, model):
+        self._model = model
+
+    @property
+    def wrapped(self):
+        """原始的 YOLO 模型"""
+        return self._model
+
+    def __call__(self, *args, **kwargs):
+        with inference_slot():
+            return offload(self._model, *args, **kwargs)
+
+    def predict(self, *args, **kwargs):
+        with inference_slot():
+            return offload(self._model.predict, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+def get_stats():
+    """取得推論名額的使用統計"""
+    with _stats_lock:
+        calls = _stats['calls']
+        return {
+            'max_concurrent': max_concurrent_inferences(),
+            'calls': calls,
+            'in_flight': _stats['in_flight'],
+            'max_in_flight': _stats['max_in_flight'],
+            'avg_wait_ms': _stats['total_wait'] / calls * 1000.0 if calls else 0.0,
+            'max_wait_ms': _stats['max_wait'] * 1000.0,
+        }
@@ -0,0 +1,230 @@
+import time
+import threading
+import logging
+import numpy as np
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# 已建立的排程器，以模型物件 id 為鍵，確保同一模型只有一個批次佇列
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+class _InferenceRequest:
+    """單一推論請求"""
+
+    __slots__ = ('frame', 'kwargs', 'key', 'event', 'result', 'error')
+
+    def __init__(self, frame, kwargs):
+        self.frame = frame
+        self.kwargs = kwargs
+        self.key = tuple(sorted(kwargs.items()))
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class InferenceScheduler:
+    """批次推論排程器
+
+    收集所有會話送來的影像幀，在達到最大批次數量或等待時間上限時，
+    將參數相同的請求合併成一個批次送入模型，再把結果分發回各呼叫者。
+    模型呼叫全部在排程執行緒中序列化進行，避免多執行緒同時使用同一個
+    YOLO 預測器。
+    """
+
+    # 呼叫者在此時間內（秒）送過請求才視為活躍會話
+    ACTIVE_CALLER_WINDOW = 1.0
+
+    def __init__(self, model, max_batch_size=None, max_wait_ms=None):
+        """
+        Args:
+            model: YOLO 模型
+            max_batch_size (int): 單一批次最多幀數
+            max_wait_ms (float): 第一個請求進入後最多等待的毫秒數
+        """
+        self.model = model
+        self.max_batch_size = max(1, int(max_batch_size or getattr(Config, 'INFERENCE_BATCH_SIZE', 8)))
+        wait_ms = max_wait_ms if max_wait_ms is not None else getattr(Config, 'INFERENCE_BATCH_MAX_WAIT_MS', 8)
+        self.max_wait = max(0.0, float(wait_ms)) / 1000.0
+
+        self._pending = []
+        self._cond = threading.Condition()
+        self._model_lock = threading.Lock()
+        self._recent_callers = {}
+        self._worker = None
+        self._running = False
+
+        # 統計資料
+        self.batches_run = 0
+        self.frames_run = 0
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._running = True
+            self._worker = threading.Thread(target=self._run, name='inference-scheduler', daemon=True)
+            self._worker.start()
+
+    def _active_callers(self, now):
+        """估計目前活躍的呼叫執行緒數量"""
+        expired = [ident for ident, ts in self._recent_callers.items()
+                   if now - ts > self.ACTIVE_CALLER_WINDOW]
+        for ident in expired:
+            del self._recent_callers[ident]
+        return max(1, len(self._recent_callers))
+
+    def infer(self, frame, **kwargs):
+        """送出一幀並等待推論結果
+
+        Returns:
+            Results: 該幀對應的單一 YOLO 結果
+        """
+        request = _InferenceRequest(frame, kwargs)
+        with self._cond:
+            self._ensure_worker()
+            self._recent_callers[threading.get_ident()] = time.time()
+            self._pending.append(request)
+            self._cond.notify()
+
+        request.event.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def call_direct(self, *args, **kwargs):
+        """不經批次直接呼叫模型（仍與批次推論互斥）"""
+        with self._model_lock:
+            return self.model(*args, **kwargs)
+
+    def _collect_batch(self):
+        """等待並取出一個批次的請求"""
+        with self._cond:
+            while self._running and not self._pending:
+                self._cond.wait()
+            if not self._running:
+                return []
+
+            deadline = time.time() + self.max_wait
+            while True:
+                now = time.time()
+                # 所有活躍會話都已送出請求時不必再等待
+                target = min(self.max_batch_size, self._active_callers(now))
+                if len(self._pending) >= target or now >= deadline:
+                    break
+                self._cond.wait(deadline - now)
+
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            # 推論參數不同的請求無法合併，依參數分組
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.key, []).append(request)
+
+            for requests in groups.values():
+                self._run_group(requests)
+
+    def _run_group(self, requests):
+        try:
+            with self._model_lock:
+                results = self.model([r.frame for r in requests], **requests[0].kwargs)
+            self.batches_run += 1
+            self.frames_run += len(requests)
+            for request, result in zip(requests, results):
+                request.result = result
+        except Exception as e:
+            logger.error(f"批次推論失敗: {e}")
+            for request in requests:
+                request.error = e
+        finally:
+            for request in requests:
+                request.event.set()
+
+    def stop(self):
+        """停止排程執行緒，未處理的請求以錯誤返回"""
+        with self._cond:
+            self._running = False
+            pending = self._pending
+            self._pending = []
+            self._cond.notify_all()
+        for request in pending:
+            request.error = RuntimeError("推論排程器已停止")
+            request.event.set()
+
+    def get_stats(self):
+        """取得批次統計"""
+        return {
+            'batches': self.batches_run,
+            'frames': self.frames_run,
+            'avg_batch_size': self.frames_run / self.batches_run if self.batches_run else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+        }
+
+
+class BatchedModel:
+    """與 YOLO 模型呼叫方式相同的代理物件
+
+    `model(frame, conf=0.3, verbose=False)` 會透過排程器批次執行，並回傳
+    只含該幀結果的列表，因此既有的 `results[0]` 與迭代寫法都不需修改。
+    其他屬性（如 `names`）直接轉發給原始模型。
+    """
+
+    def __init__(self, scheduler):
+        self._scheduler = scheduler
+
+    @property
+    def model(self):
+        return self._scheduler.model
+
+    @property
+    def scheduler(self):
+        return self._scheduler
+
+    def __call__(self, source, **kwargs):
+        # 只有單張 numpy 影像可以合併批次，其他來源直接交給模型
+        if isinstance(source, np.ndarray) and source.ndim == 3:
+            return [self._scheduler.infer(source, **kwargs)]
+        return self._scheduler.call_direct(source, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._scheduler.model, name)
+
+
+def batched_model(model):
+    """取得模型的批次推論代理
+
+    Args:
+        model: YOLO 模型
+
+    Returns:
+        BatchedModel: 共用同一排程器的代理；停用批次或模型為 None 時返回原模型
+    """
+    if model is None or isinstance(model, BatchedModel):
+        return model
+    if not getattr(Config, 'INFERENCE_BATCHING', True):
+        return model
+
+    with _schedulers_lock:
+        scheduler = _schedulers.get(id(model))
+        if scheduler is None or scheduler.model is not model:
+            scheduler = InferenceScheduler(model)
+            _schedulers[id(model)] = scheduler
+            logger.info(f"已建立批次推論排程器 (batch={scheduler.max_batch_size}, "
+                        f"wait={scheduler.max_wait * 1000:.0f}ms)")
+    return BatchedModel(scheduler)
+
+
+def get_scheduler_stats():
+    """取得所有排程器的統計資料"""
+    with _schedulers_lock:
+        return [scheduler.get_stats() for scheduler in _schedulers.values()]
@@ -0,0 +1,124 @@
+import time
+
+import numpy as np
+
+
+class KeypointTracker:
+    """17 個 COCO 關鍵點的等速卡爾曼濾波追蹤器
+
+    每個關鍵點的 x、y 各自以 [位置, 速度] 的等速模型追蹤。每次姿態推論
+    以 update() 修正狀態，兩次推論之間以 predict() 推算位置，讓跳過推論
+    的幀仍有平滑且隨動作移動的關鍵點可供角度計算與計數。
+    所有關鍵點以向量化方式一次計算，每幀成本遠小於一次姿態推論。
+    """
+
+    NUM_KEYPOINTS = 17
+
+    # 加速度雜訊（像素/秒²），越大越快跟上速度變化
+    PROCESS_NOISE = 3000.0
+    # 量測雜訊標準差（像素），會再依關鍵點置信度放大
+    MEASUREMENT_NOISE = 4.0
+    # 新出現關鍵點的初始速度變異數
+    INITIAL_VELOCITY_VAR = 500.0 ** 2
+    # 推算的最長時間（秒），超過時停在此時間點的位置
+    MAX_PREDICTION = 0.3
+    # 置信度低於此值的量測視為未檢測到
+    MIN_CONFIDENCE = 0.05
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """清除所有追蹤狀態"""
+        n = self.NUM_KEYPOINTS
+        self.position = np.zeros((n, 2), dtype=np.float64)
+        self.velocity = np.zeros((n, 2), dtype=np.float64)
+        # 每個關鍵點的 [位置, 速度] 共變異數，x 與 y 共用
+        self.covariance = np.zeros((n, 2, 2), dtype=np.float64)
+        self.valid = np.zeros(n, dtype=bool)
+        self.conf = None
+        self.timestamp = None
+
+    @property
+    def initialized(self):
+        """是否已有任何可追蹤的關鍵點"""
+        return self.timestamp is not None and bool(self.valid.any())
+
+    def _predict_state(self, dt):
+        """將狀態推進 dt 秒（修改內部狀態）"""
+        if dt <= 0:
+            return
+        self.position += self.velocity * dt
+
+        # P = F P F^T + Q，F = [[1, dt], [0, 1]]
+        p = self.covariance
+        p00 = p[:, 0, 0] + dt * (p[:, 0, 1] + p[:, 1, 0]) + dt * dt * p[:, 1, 1]
+        p01 = p[:, 0, 1] + dt * p[:, 1, 1]
+        p11 = p[:, 1, 1]
+        q = self.PROCESS_NOISE ** 2
+        p[:, 0, 0] = p00 + q * dt ** 4 / 4
+        p[:, 0, 1] = p01 + q * dt ** 3 / 2
+        p[:, 1, 0] = p[:, 0, 1]
+        p[:, 1, 1] = p11 + q * dt ** 2
+
+    def update(self, keypoints, conf=None, timestamp=None):
+        """以一次姿態推論的結果修正追蹤狀態
+
+        Args:
+            keypoints (numpy.ndarray): 關鍵點座標 (17, 2)，未檢測到的點為 (0, 0)
+            conf (numpy.ndarray, optional): 關鍵點置信度 (17,)
+            timestamp (float, optional): 推論時間，預設為目前時間
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        measured = np.asarray(keypoints, dtype=np.float64)[:self.NUM_KEYPOINTS]
+        detected = measured.any(axis=1)
+        if conf is not None:
+            conf = np.asarray(conf, dtype=np.float64)[:self.NUM_KEYPOINTS]
+            detected &= conf >= self.MIN_CONFIDENCE
+
+        if self.timestamp is not None:
+            self._predict_state(timestamp - self.timestamp)
+        self.timestamp = timestamp
+        self.conf = conf
+
+        # 新出現的關鍵點直接以量測值初始化
+        new = detected & ~self.valid
+        self.position[new] = measured[new]
+        self.velocity[new] = 0.0
+        self.covariance[new] = [[self.MEASUREMENT_NOISE ** 2, 0.0], [0.0, self.INITIAL_VELOCITY_VAR]]
+
+        # 已追蹤的關鍵點做卡爾曼修正，H = [1, 0]
+        tracked = detected & self.valid
+        if tracked.any():
+            r = np.full(self.NUM_KEYPOINTS, self.MEASUREMENT_NOISE ** 2)
+            if conf is not None:
+                r = r / np.clip(conf, self.MIN_CONFIDENCE, 1.0)
+            p = self.covariance[tracked]
+            s = p[:, 0, 0] + r[tracked]
+            k = p[:, :, 0] / s[:, None]  # 卡爾曼增益 (n, 2)
+            residual = measured[tracked] - self.position[tracked]
+            self.position[tracked] += k[:, 0:1] * residual
+            self.velocity[tracked] += k[:, 1:2] * residual
+            # P = (I - K H) P
+            p_new = p - k[:, :, None] * p[:, 0:1, :]
+            self.covariance[tracked] = p_new
+
+        # 本次未檢測到的關鍵點停止追蹤
+        self.valid = detected
+
+    def predict(self, timestamp):
+        """推算指定時間的關鍵點位置（不修改追蹤狀態）
+
+        Args:
+            timestamp (float): 要推算的時間
+
+        Returns:
+            tuple: (關鍵點 (17, 2) float32, 置信度)，尚未初始化時返回 None；
+                   未追蹤的關鍵點為 (0, 0)
+        """
+        if not self.initialized:
+            return None
+        dt = min(max(timestamp - self.timestamp, 0.0), self.MAX_PREDICTION)
+        predicted = self.position + self.velocity * dt
+        predicted[~self.valid] = 0.0
+        return predicted.astype(np.float32), self.conf
@@ -0,0 +1,380 @@
+import os
+import json
+import time
+import threading
+import logging
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from app.config import Config
+from app.services.inference_limits import LimitedModel, configure_torch_threads
+
+logger = logging.getLogger(__name__)
+
+# 預設姿態模型名稱，本地檔案都不存在時交給 ultralytics 自動下載
+DEFAULT_POSE_MODEL = 'yolov8n-pose.pt'
+
+# 匯出模型相對於 .pt 權重的命名（與 ultralytics export 的輸出一致），
+# 例如 best.pt → best.onnx、best_openvino_model/
+BACKEND_SUFFIXES = {
+    'onnx': '.onnx',
+    'openvino': '_openvino_model',
+}
+# INFERENCE_BACKEND = 'auto' 時的優先順序
+AUTO_BACKEND_ORDER = ('openvino', 'onnx')
+
+# INT8 量化姿態模型（OpenVINO）與其校正報告，由 scripts/calibrate_int8.py 產生
+INT8_SUFFIX = '_int8_openvino_model'
+INT8_REPORT_NAME = 'calibration.json'
+
+
+class _ModelEntry:
+    """已載入模型的記錄"""
+
+    __slots__ = ('key', 'model', 'path', 'backend', 'kind', 'pinned', 'size_bytes',
+                 'load_seconds', 'loaded_at', 'last_used', 'hits')
+
+    def __init__(self, key, model, path, backend, kind, pinned, size_bytes, load_seconds):
+        self.key = key
+        self.model = model
+        self.path = path
+        self.backend = backend
+        self.kind = kind
+        self.pinned = pinned
+        self.size_bytes = size_bytes
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.hits = 0
+
+    def get_stats(self):
+        return {
+            'key': self.key,
+            'path': self.path,
+            'backend': self.backend,
+            'kind': self.kind,
+            'pinned': self.pinned,
+            'size_mb': self.size_bytes / (1024 * 1024),
+            'load_ms': self.load_seconds * 1000.0,
+            'idle_seconds': time.time() - self.last_used,
+            'hits': self.hits,
+        }
+
+
+def _model_footprint(model, path):
+    """估計模型佔用的記憶體（位元組）：參數與緩衝區大小，無法取得時以檔案大小代替"""
+    try:
+        module = model.model
+        total = sum(p.numel() * p.element_size() for p in module.parameters())
+        total += sum(b.numel() * b.element_size() for b in module.buffers())
+        if total:
+            return total
+    except Exception:
+        pass
+    try:
+        if os.path.isdir(path):
+            return sum(os.path.getsize(os.path.join(root, name))
+                       for root, _, names in os.walk(path) for name in names)
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def resolve_backend_path(path, backend):
+    """依推論後端取得匯出模型的路徑
+
+    Args:
+        path (str): PyTorch 權重路徑（.pt）
+        backend (str): 'torch'、'onnx'、'openvino' 或 'auto'
+
+    Returns:
+        tuple: (模型路徑, 實際使用的後端)，找不到匯出模型時使用原本的 .pt 權重
+    """
+    if backend == 'torch' or not path.endswith('.pt') or not os.path.exists(path):
+        return path, 'torch'
+    candidates = AUTO_BACKEND_ORDER if backend == 'auto' else (backend,)
+    stem = path[:-len('.pt')]
+    for name in candidates:
+        suffix = BACKEND_SUFFIXES.get(name)
+        if suffix and os.path.exists(stem + suffix):
+            return stem + suffix, name
+    if backend != 'auto':
+        logger.warning(f"找不到 {backend} 匯出模型: {stem + BACKEND_SUFFIXES.get(backend, '')}，"
+                       f"改用 PyTorch 權重（可執行 scripts/export_models.py 匯出）")
+    return path, 'torch'
+
+
+def int8_model_path(path):
+    """取得 .pt 權重對應的 INT8 量化模型路徑"""
+    return path[:-len('.pt')] + INT8_SUFFIX
+
+
+def read_int8_report(model_dir):
+    """讀取 INT8 模型的校正報告
+
+    Returns:
+        dict: 校正報告，不存在或無法解析時返回 None
+    """
+    try:
+        with open(os.path.join(model_dir, INT8_REPORT_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class ClassifierModels(Mapping):
+    """運動分類模型的延遲載入對照表
+
+    以 MODEL_PATHS 中的運動類型為鍵，第一次取用時才由 ModelRegistry 載入。
+    可直接取代原本的 exercise_models 字典傳給 FrameInference。
+    """
+
+    def __init__(self, registry):
+        self._registry = registry
+
+    def __getitem__(self, exercise_type):
+        model = self._registry.get_classifier(exercise_type)
+        if model is None:
+            raise KeyError(exercise_type)
+        return model
+
+    def __iter__(self):
+        return iter(self._registry.classifier_types())
+
+    def __len__(self):
+        return len(self._registry.classifier_types())
+
+
+class ModelRegistry:
+    """全程序共用的模型登錄表
+
+    每個權重檔只載入一次，所有服務與會話共用同一個模型物件（因此也共用
+    同一個批次推論排程器）。姿態模型常駐記憶體；運動分類模型在第一次使用
+    時才載入，超過 MODEL_REGISTRY_MAX_CLASSIFIERS 個時釋放最久未使用的。
+    每個模型載入後先以空白影像推論一次，第一個真實幀不必承擔初始化成本。
+    INFERENCE_BACKEND 指定 onnx / openvino 時改載入同名的匯出模型，呼叫方式
+    與結果格式不變。返回的模型以 LimitedModel 包裝，受 MAX_CONCURRENT_INFERENCES 限制。
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = ModelRegistry()
+        return cls._instance
+
+    def __init__(self, max_classifiers=None):
+        """
+        Args:
+            max_classifiers (int): 同時保留的運動分類模型數量上限，0 表示不限制
+        """
+        if max_classifiers is None:
+            max_classifiers = getattr(Config, 'MODEL_REGISTRY_MAX_CLASSIFIERS', 4)
+        self.max_classifiers = max(0, int(max_classifiers))
+        self.base_dir = Config.BASE_DIR
+        self.model_paths = dict(getattr(Config, 'MODEL_PATHS', {}))
+        self.backend = getattr(Config, 'INFERENCE_BACKEND', 'torch')
+
+        self._entries = OrderedDict()  # 依最近使用時間排序
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.classifiers = ClassifierModels(self)
+        self.loads = 0
+        self.evictions = 0
+
+    def resolve_path(self, *candidates):
+        """取得第一個存在的模型檔案絕對路徑
+
+        Args:
+            candidates: 候選路徑，相對路徑以專案根目錄為準
+
+        Returns:
+            str: 存在的絕對路徑，都不存在時返回 None
+        """
+        for candidate in candidates:
+            if not candidate:
+                continue
+            path = candidate if os.path.isabs(candidate) else os.path.join(self.base_dir, candidate)
+            if os.path.exists(path):
+                return os.path.normpath(path)
+        return None
+
+    def get(self, path, fallback=None, kind='pose', pinned=True):
+        """取得模型，同一權重檔只載入一次
+
+        Args:
+            path (str): 模型檔案路徑，相對路徑以專案根目錄為準
+            fallback (str): path 不存在時使用的模型名稱（由 ultralytics 下載）
+            kind (str): 模型種類，用於統計
+            pinned (bool): 是否常駐，非常駐的模型會依 LRU 釋放
+
+        Returns:
+            YOLO: 共用的模型物件
+        """
+        resolved = self.resolve_path(path)
+        if resolved is None:
+            if not fallback:
+                raise FileNotFoundError(f"模型文件不存在: {path}")
+            logger.warning(f"模型文件不存在: {path}，使用預設模型 {fallback}")
+            resolved = fallback
+        return self._get_or_load(resolved, kind, pinned)
+
+    def get_pose_model(self):
+        """取得共用的 YOLO-Pose 姿態模型"""
+        path = self.resolve_path(self.model_paths.get('pose'), DEFAULT_POSE_MODEL)
+        if path and getattr(Config, 'POSE_INT8', False):
+            int8_path = self._int8_pose_path(path)
+            if int8_path:
+                return self._get_or_load(path, 'pose', True, path=int8_path, backend='openvino-int8')
+        return self._get_or_load(path or DEFAULT_POSE_MODEL, 'pose', True)
+
+    def _int8_pose_path(self, path):
+        """取得通過校正門檻的 INT8 姿態模型路徑，未通過或不存在時返回 None"""
+        int8_path = int8_model_path(path)
+        if not os.path.isdir(int8_path):
+            logger.warning(f"找不到 INT8 姿態模型: {int8_path}，使用浮點模型（可執行 scripts/calibrate_int8.py 產生）")
+            return None
+        if getattr(Config, 'POSE_INT8_REQUIRE_CALIBRATION', True):
+            report = read_int8_report(int8_path)
+            if not report or not report.get('passed'):
+                logger.warning(f"INT8 姿態模型未通過校正門檻: {int8_path}，使用浮點模型")
+                return None
+        return int8_path
+
+    def classifier_types(self):
+        """有權重檔可用的運動分類類型（不會載入模型）"""
+        return [exercise_type for exercise_type, path in self.model_paths.items()
+                if exercise_type != 'pose' and self.resolve_path(path)]
+
+    def get_classifier(self, exercise_type):
+        """取得運動分類模型，第一次使用時才載入
+
+        Args:
+            exercise_type (str): 運動類型（MODEL_PATHS 的鍵）
+
+        Returns:
+            YOLO: 分類模型；未設定或檔案不存在時返回 None
+        """
+        if exercise_type == 'pose':
+            return None
+        path = self.resolve_path(self.model_paths.get(exercise_type))
+        if path is None:
+            return None
+        try:
+            return self._get_or_load(path, 'classifier', False)
+        except Exception as e:
+            logger.error(f"載入{exercise_type}模型時出錯: {e}")
+            return None
+
+    def preload_classifiers(self):
+        """預先載入所有運動分類模型（數量仍受 LRU 上限限制）"""
+        for exercise_type in self.classifier_types():
+            self.get_classifier(exercise_type)
+
+    def _get_or_load(self, key, kind, pinned, path=None, backend=None):
+        entry = self._touch(key)
+        if entry is not None:
+            return entry.model
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # 同一權重檔的載入序列化，其他執行緒等待並共用載入結果
+        with load_lock:
+            entry = self._touch(key)
+            if entry is not None:
+                return entry.model
+
+            # 執行緒池須在第一次推論前設定
+            configure_torch_threads()
+            from ultralytics import YOLO
+            if path is None:
+                path, backend = resolve_backend_path(key, self.backend)
+            start = time.perf_counter()
+            # 匯出模型無法從權重結構判斷任務類型，姿態模型需明確指定
+            model = YOLO(path, task='pose' if kind == 'pose' else None)
+            self._warmup(model, path)
+            load_seconds = time.perf_counter() - start
+            # 所有呼叫都經過同時推論數量上限
+            entry = _ModelEntry(key, LimitedModel(model), path, backend, kind, pinned,
+                                _model_footprint(model, path), load_seconds)
+            logger.info(f"已載入{kind}模型 [{backend}]: {path} ({entry.size_bytes / (1024 * 1024):.1f}MB, "
+                        f"{load_seconds * 1000:.0f}ms)")
+
+            with self._lock:
+                self._entries[key] = entry
+                self.loads += 1
+                self._evict_locked()
+            return entry.model
+
+    def _warmup(self, model, key):
+        """以空白影像執行一次推論，讓權重搬移與運算核心初始化在交給呼叫者前完成"""
+        if not getattr(Config, 'MODEL_WARMUP_INFERENCE', True):
+            return
+        try:
+            import numpy as np
+            size = int(getattr(Config, 'MODEL_WARMUP_IMGSZ', 640))
+            model(np.zeros((size, size, 3), dtype=np.uint8), verbose=False)
+        except Exception as e:
+            logger.warning(f"模型預熱推論失敗: {key}: {e}")
+
+    def _touch(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.last_used = time.time()
+                entry.hits += 1
+            return entry
+
+    def _evict_locked(self):
+        if not self.max_classifiers:
+            return
+        unpinned = [key for key, entry in self._entries.items() if not entry.pinned]
+        # OrderedDict 由舊到新排列，超過上限時從最久未使用的開始釋放
+        for key in unpinned[:max(0, len(unpinned) - self.max_classifiers)]:
+            entry = self._entries.pop(key)
+            self.evictions += 1
+            logger.info(f"釋放久未使用的模型: {key} (閒置 {time.time() - entry.last_used:.0f}s)")
+
+    def evict(self, key):
+        """手動釋放非常駐模型
+
+        Returns:
+            bool: 是否有模型被釋放
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.pinned:
+                return False
+            del self._entries[key]
+            self.evictions += 1
+            return True
+
+    def get_stats(self):
+        """取得已載入模型與記憶體使用量統計"""
+        with self._lock:
+            entries = [entry.get_stats() for entry in self._entries.values()]
+            total = sum(entry.size_bytes for entry in self._entries.values())
+            return {
+                'models': entries,
+                'total_mb': total / (1024 * 1024),
+                'backend': self.backend,
+                'max_classifiers': self.max_classifiers,
+                'loads': self.loads,
+                'evictions': self.evictions,
+            }
+
+
+def get_model_registry():
+    """取得全程序共用的模型登錄表"""
+    return ModelRegistry.get_instance()
+
+
+def get_pose_model():
+    """取得共用的 YOLO-Pose 姿態模型"""
+    return ModelRegistry.get_instance().get_pose_model()
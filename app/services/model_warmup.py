@@ -0,0 +1,117 @@
+import time
+import threading
+import multiprocessing
+import logging
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# 預熱狀態：pending（尚未開始）→ loading → ready / failed
+_state = 'pending'
+_error = None
+_started_at = None
+_finished_at = None
+_thread = None
+_ready_event = threading.Event()
+_lock = threading.Lock()
+
+
+def _run_warmup(app):
+    global _state, _error, _finished_at
+
+    try:
+        with app.app_context():
+            # 在背景執行緒中才匯入視覺相關模組，避免拖慢應用啟動
+            from app.services.pose_detection import load_models
+            from app.services import exercise_service
+
+            load_models()
+            if not exercise_service.init_models():
+                raise RuntimeError("運動檢測模型初始化失敗")
+
+            # 啟用多程序推論池時等待所有工作程序載入模型
+            from app.services.pose_worker_pool import get_pose_worker_pool
+            pool = get_pose_worker_pool()
+            if pool is not None and not pool.start():
+                raise RuntimeError("姿態推論工作程序啟動失敗")
+
+        _state = 'ready'
+        logger.info(f"模型預熱完成，耗時 {time.time() - _started_at:.1f}s")
+    except Exception as e:
+        _state = 'failed'
+        _error = str(e)
+        logger.error(f"模型預熱失敗: {e}", exc_info=True)
+    finally:
+        _finished_at = time.time()
+        _ready_event.set()
+
+
+def start_model_warmup(app, background=None):
+    """啟動模型載入與預熱
+
+    Args:
+        app (Flask): 應用實例，預熱在其應用上下文中執行
+        background (bool): 是否在背景執行緒中進行，預設依 MODEL_WARMUP_BACKGROUND
+
+    Returns:
+        bool: 是否啟動了新的預熱（已啟動過時返回 False）
+    """
+    global _state, _error, _started_at, _thread
+
+    # 推論工作程序以 spawn 啟動時會重新匯入主模組，子程序不做預熱
+    if multiprocessing.parent_process() is not None:
+        return False
+
+    with _lock:
+        if _state != 'pending' and _state != 'failed':
+            return False
+        _state = 'loading'
+        _error = None
+        _started_at = time.time()
+        _ready_event.clear()
+
+    if background is None:
+        background = getattr(Config, 'MODEL_WARMUP_BACKGROUND', True)
+    if not background:
+        _run_warmup(app)
+        return True
+
+    _thread = threading.Thread(target=_run_warmup, args=(app,), name='ModelWarmup', daemon=True)
+    _thread.start()
+    logger.info("已在背景開始載入模型")
+    return True
+
+
+def is_ready():
+    """模型是否已載入並完成預熱"""
+    return _state == 'ready'
+
+
+def wait_until_ready(timeout=None):
+    """等待預熱結束
+
+    Args:
+        timeout (float): 最長等待秒數，None 表示一直等待
+
+    Returns:
+        bool: 模型是否已就緒
+    """
+    _ready_event.wait(timeout)
+    return is_ready()
+
+
+def get_status():
+    """取得預熱狀態與已載入模型的統計"""
+    status = {
+        'state': _state,
+        'ready': _state == 'ready',
+        'error': _error,
+        'elapsed_seconds': None,
+    }
+    if _started_at is not None:
+        status['elapsed_seconds'] = (_finished_at or time.time()) - _started_at
+    if _state == 'ready':
+        from app.services.model_registry import get_model_registry
+        status['models'] = get_model_registry().get_stats()
+    return status
@@ -0,0 +1,273 @@
+import os
+import json
+import time
+import socket
+import threading
+import logging
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'ai-fitness'
+
+
+class InMemoryNodeStore:
+    """程序內的節點資料儲存，提供與 Redis 相同的 get/set/delete/scan 子集
+
+    單節點部署與測試時使用；多個節點必須共用 Redis 才能互相看到對方。
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _expired(self, key, now):
+        item = self._data.get(key)
+        if item is not None and item[1] is not None and item[1] <= now:
+            del self._data[key]
+            return True
+        return item is None
+
+    def get(self, key):
+        with self._lock:
+            if self._expired(key, time.time()):
+                return None
+            return self._data[key][0]
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            now = time.time()
+            if nx and not self._expired(key, now):
+                return False
+            self._data[key] = (value, now + ex if ex else None)
+            return True
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if self._expired(key, time.time()):
+                return False
+            self._data[key] = (self._data[key][0], time.time() + seconds)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def scan_iter(self, match):
+        prefix = match.rstrip('*')
+        with self._lock:
+            now = time.time()
+            keys = [key for key in list(self._data) if key.startswith(prefix)]
+            return [key for key in keys if not self._expired(key, now)]
+
+
+def create_node_store(url=None):
+    """依網址建立節點資料儲存
+
+    Args:
+        url (str): 'redis://...' 使用 Redis，None 或 'memory://' 使用程序內儲存
+    """
+    if not url or url.startswith('memory://'):
+        return InMemoryNodeStore()
+    import redis
+    return redis.Redis.from_url(url, decode_responses=True)
+
+
+class NodeRegistry:
+    """多節點部署的節點登錄與檢測會話歸屬
+
+    每個節點定期寫入自己的資訊（網址、會話數、容量），並以帶有效期限的鍵
+    記錄哪個檢測會話由哪個節點處理。客戶端重新連線到其他節點時，依歸屬
+    導回持有該會話模型狀態的節點；本節點已達 NODE_MAX_SESSIONS 時改導向
+    有空位的節點。
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = NodeRegistry()
+        return cls._instance
+
+    def __init__(self, store=None, node_id=None, public_url=None, max_sessions=None):
+        """
+        Args:
+            store: 節點資料儲存（Redis 或 InMemoryNodeStore）
+            node_id (str): 節點識別，預設為主機名稱與程序 ID
+            public_url (str): 客戶端可直接連到本節點的網址
+            max_sessions (int): 本節點同時處理的檢測會話上限，0 表示不限制
+        """
+        self.store = store if store is not None else create_node_store(getattr(Config, 'NODE_REGISTRY_URL', None))
+        self.node_id = node_id or getattr(Config, 'NODE_ID', None) or f"{socket.gethostname()}-{os.getpid()}"
+        self.public_url = public_url or getattr(Config, 'NODE_PUBLIC_URL', None)
+        if max_sessions is None:
+            max_sessions = getattr(Config, 'NODE_MAX_SESSIONS', 0)
+        self.max_sessions = max(0, int(max_sessions))
+        self.heartbeat_interval = float(getattr(Config, 'NODE_HEARTBEAT_SECONDS', 5))
+        self.ttl = max(1, int(self.heartbeat_interval * 3))
+
+        self._sessions = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.redirects = 0
+        self.rejections = 0
+
+    def _node_key(self, node_id):
+        return f"{KEY_PREFIX}:node:{node_id}"
+
+    def _session_key(self, session_key):
+        return f"{KEY_PREFIX}:session:{session_key}"
+
+    @property
+    def session_count(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def has_capacity(self):
+        """本節點是否還能接受新的檢測會話"""
+        return not self.max_sessions or self.session_count < self.max_sessions
+
+    def start(self):
+        """寫入節點資訊並開始定期更新"""
+        if self._thread is not None:
+            return
+        self._heartbeat()
+        self._thread = threading.Thread(target=self._heartbeat_loop, name='NodeHeartbeat', daemon=True)
+        self._thread.start()
+        logger.info(f"節點已登錄: {self.node_id} (容量 {self.max_sessions or '不限'})")
+
+    def stop(self):
+        """停止更新並移除節點資訊"""
+        self._stop.set()
+        try:
+            self.store.delete(self._node_key(self.node_id))
+        except Exception as e:
+            logger.warning(f"移除節點資訊失敗: {e}")
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self._heartbeat()
+            except Exception as e:
+                logger.warning(f"更新節點資訊失敗: {e}")
+
+    def _heartbeat(self):
+        info = {
+            'node_id': self.node_id,
+            'url': self.public_url,
+            'sessions': self.session_count,
+            'max_sessions': self.max_sessions,
+            'updated_at': time.time(),
+        }
+        self.store.set(self._node_key(self.node_id), json.dumps(info), ex=self.ttl)
+        # 延長本節點持有的會話歸屬
+        with self._lock:
+            sessions = list(self._sessions)
+        for session_key in sessions:
+            self.store.expire(self._session_key(session_key), self.ttl)
+
+    def list_nodes(self):
+        """列出所有仍在更新的節點"""
+        nodes = []
+        for key in self.store.scan_iter(match=f"{KEY_PREFIX}:node:*"):
+            value = self.store.get(key)
+            if value:
+                nodes.append(json.loads(value))
+        return sorted(nodes, key=lambda node: node['node_id'])
+
+    def get_node(self, node_id):
+        value = self.store.get(self._node_key(node_id))
+        return json.loads(value) if value else None
+
+    def pick_node(self, exclude=None):
+        """選出會話數最少且仍有空位的其他節點，沒有時返回 None"""
+        candidates = [node for node in self.list_nodes()
+                      if node['node_id'] != exclude and node.get('url')
+                      and (not node['max_sessions'] or node['sessions'] < node['max_sessions'])]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda node: node['sessions'] / (node['max_sessions'] or float('inf')))
+
+    def claim_session(self, session_key):
+        """為檢測會話決定處理節點
+
+        Args:
+            session_key (str): 客戶端在重新連線間保留的檢測會話識別
+
+        Returns:
+            tuple: (結果, 節點資訊)。結果為 'local'（由本節點處理）、
+                   'redirect'（應改連到節點資訊中的節點）或 'full'（沒有節點有空位）
+        """
+        with self._lock:
+            if session_key in self._sessions:
+                return 'local', None
+
+        owner = self.store.get(self._session_key(session_key))
+        if owner and owner != self.node_id:
+            node = self.get_node(owner)
+            if node and node.get('url'):
+                # 模型狀態（計數、追蹤器）留在原節點，導回原節點
+                self.redirects += 1
+                return 'redirect', node
+
+        # 容量檢查與佔用名額在同一個鎖內完成，同時開始的檢測不會超過 NODE_MAX_SESSIONS
+        with self._lock:
+            if session_key in self._sessions:
+                return 'local', None
+            reserved = not self.max_sessions or len(self._sessions) < self.max_sessions
+            if reserved:
+                self._sessions.add(session_key)
+
+        if not reserved:
+            node = self.pick_node(exclude=self.node_id)
+            if node is None:
+                self.rejections += 1
+                return 'full', None
+            self.redirects += 1
+            return 'redirect', node
+
+        key = self._session_key(session_key)
+        # 只在沒有節點持有時寫入歸屬，兩個節點同時接手同一會話時只有一個成功
+        if self.store.set(key, self.node_id, ex=self.ttl, nx=True):
+            return 'local', None
+        owner = self.store.get(key)
+        if owner and owner != self.node_id:
+            node = self.get_node(owner)
+            if node and node.get('url'):
+                with self._lock:
+                    self._sessions.discard(session_key)
+                self.redirects += 1
+                return 'redirect', node
+        # 歸屬已是本節點，或原節點已離線、歸屬剛好過期：由本節點接手
+        self.store.set(key, self.node_id, ex=self.ttl)
+        return 'local', None
+
+    def release_session(self, session_key):
+        """釋放本節點持有的檢測會話"""
+        with self._lock:
+            if session_key not in self._sessions:
+                return
+            self._sessions.discard(session_key)
+        if self.store.get(self._session_key(session_key)) == self.node_id:
+            self.store.delete(self._session_key(session_key))
+
+    def get_stats(self):
+        return {
+            'node_id': self.node_id,
+            'url': self.public_url,
+            'sessions': self.session_count,
+            'max_sessions': self.max_sessions,
+            'redirects': self.redirects,
+            'rejections': self.rejections,
+        }
+
+
+def get_node_registry():
+    """取得本節點的登錄物件"""
+    return NodeRegistry.get_instance()
@@ -2,7 +2,7 @@ import cv2
 import numpy as np
 import time
 import logging
-from app import socketio
+from app.services.detection_session import session_emit
 
 # 設置日誌
 logger = logging.getLogger(__name__)
@@ -289,7 +289,7 @@ class PlankService:
     def complete_exercise(self):
         """完成運動"""
         logger.info(f"平板支撐運動完成！累積時間: {self.accumulated_time:.1f}秒")
-        socketio.emit('exercise_completed', {
+        session_emit('exercise_completed', {
             'message': '恭喜！您已完成平板支撐運動！',
             'exercise_type': 'Plank',
             'accumulated_time': round(self.accumulated_time, 1),
@@ -319,7 +319,7 @@ class PlankService:
         self.draw_exercise_info(annotated_frame, body_angle, is_correct_plank)
         
         # 發送實時數據
-        socketio.emit('plank_data', {
+        session_emit('plank_data', {
             'is_correct_plank': is_correct_plank,
             'body_angle': body_angle if body_angle is not None else 0,
             'quality_score': self.quality_score,
@@ -1,11 +1,8 @@
 import cv2
 import numpy as np
 import logging
-import torch
-from ultralytics import YOLO
-from flask import current_app
 from app import socketio
-import os
+from app.services.model_registry import get_model_registry
 
 logger = logging.getLogger(__name__)
 
@@ -14,30 +11,12 @@ models = {}  # 這個字典只用於存其他輔助模型
 pose_model = None  # 專門用於姿態檢測的模型
 pose_model_loaded = False  # 姿態檢測模型載入標誌
 
-# 修改 setup_models 函數，不依賴 current_app
 def setup_models():
-    """設置模型"""
+    """設置模型（姿態模型由 ModelRegistry 共用）"""
     global models
     
     try:
-        # 使用硬編碼的模型路徑，而不是從 current_app.config 獲取
-        model_paths = {
-            'pose': 'yolov8n-pose.pt',
-            # 其他模型...
-        }
-        
-        # 檢查本地模型文件
-        for model_name, model_path in model_paths.items():
-            # 嘗試加載本地模型文件
-            local_path = os.path.join(os.path.dirname(__file__), '..', '..', model_path)
-            if os.path.exists(local_path):
-                models[model_name] = YOLO(local_path)
-                logger.info(f"已加載本地模型: {model_name} 從 {local_path}")
-            else:
-                # 如果本地文件不存在，從網絡下載
-                models[model_name] = YOLO(model_path)
-                logger.info(f"已從網絡加載模型: {model_name}")
-        
+        models['pose'] = get_model_registry().get_pose_model()
         return True
     except Exception as e:
         logger.error(f"設置模型時出錯: {e}", exc_info=True)
@@ -126,19 +105,9 @@ def load_models():
         return
     
     try:
-        # 從配置獲取模型路徑
-        base_dir = current_app.config['BASE_DIR']
-        
-        # 加載姿態檢測模型模型
+        # 加載姿態檢測模型，與其他服務共用同一個實例
         logger.info("正在加載姿態檢測模型...")
-        pose_path = os.path.join(base_dir, 'static', 'models', 'YOLO_MODLE', 'pose', 'yolov8n-pose.pt')
-        
-        # 如果文件不存在，使用默認路徑
-        if not os.path.exists(pose_path):
-            logger.warning(f"姿態檢測模型文件不存在: {pose_path}，使用默認模型")
-            pose_model = YOLO('yolov8n-pose.pt')
-        else:
-            pose_model = YOLO(pose_path)
+        pose_model = get_model_registry().get_pose_model()
         
         # 設置載入標誌
         pose_model_loaded = True
@@ -2,7 +2,8 @@ import cv2
 import numpy as np
 import time
 import logging
-from ultralytics import YOLO
+from .model_registry import get_pose_model
+from .inference_scheduler import batched_model
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +36,7 @@ class VolleyballService:
     def get_model(cls):
         if cls._model is None:
             try:
-                cls._model = YOLO('yolov8n-pose.pt')
+                cls._model = get_pose_model()
                 logger.info("YOLO-Pose 模型載入成功")
             except Exception as e:
                 logger.error(f"載入 YOLO-Pose 模型失敗: {e}")
@@ -60,7 +61,7 @@ class PoseDetectorBase:
     def __init__(self, width, height):
         self.width = width
         self.height = height
-        self.pose_model = VolleyballService.get_model()
+        self.pose_model = batched_model(VolleyballService.get_model())
         
     def get_yolo_keypoints(self, frame):
         """共用的 YOLO-Pose 關節點檢測函數"""
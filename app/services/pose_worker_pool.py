@@ -0,0 +1,451 @@
+import os
+import time
+import queue
+import threading
+import logging
+import itertools
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from app.config import Config
+from app.utils.async_runtime import is_green
+
+logger = logging.getLogger(__name__)
+
+# 工作程序一次最多合併的請求數
+WORKER_BATCH_SIZE = 8
+
+
+def _worker_main(index, shm_name, slot_bytes, request_queue, response_queue, intra_threads):
+    """姿態推論工作程序
+
+    從共享記憶體讀取影像、在本程序的模型上推論，只把框與關鍵點陣列送回主程序。
+    佇列中同時有多個參數相同的請求時合併成一個批次。
+    """
+    # 每個工作程序只分到部分核心，避免多個程序同時推論時執行緒超額
+    Config.TORCH_INTRA_OP_THREADS = intra_threads
+    Config.MAX_CONCURRENT_INFERENCES = 1
+
+    from app.services.model_registry import get_pose_model
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        model = get_pose_model()
+        response_queue.put(('ready', index, None))
+    except Exception as e:
+        response_queue.put(('failed', index, str(e)))
+        shm.close()
+        return
+
+    while True:
+        item = request_queue.get()
+        if item is None:
+            break
+        requests = [item]
+        # 取出已在佇列中的請求一起處理
+        while len(requests) < WORKER_BATCH_SIZE:
+            try:
+                item = request_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                request_queue.put(None)
+                break
+            requests.append(item)
+
+        groups = {}
+        for request in requests:
+            groups.setdefault(tuple(sorted(request[4].items())), []).append(request)
+
+        for group in groups.values():
+            frames = []
+            for request_id, slot, shape, dtype, kwargs in group:
+                offset = slot * slot_bytes
+                frames.append(np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset))
+            try:
+                results = model(frames, **group[0][4])
+                for request, result in zip(group, results):
+                    boxes = result.boxes.data.cpu().numpy() if result.boxes is not None else None
+                    keypoints = result.keypoints.data.cpu().numpy() if result.keypoints is not None else None
+                    response_queue.put(('result', request[0], (boxes, keypoints, result.names)))
+            except Exception as e:
+                for request in group:
+                    response_queue.put(('error', request[0], str(e)))
+            finally:
+                del frames
+
+    shm.close()
+
+
+def build_results(frame, payload):
+    """把工作程序送回的陣列重建為 ultralytics Results
+
+    工作程序以 NumPy 陣列傳回框與關鍵點，Boxes/Keypoints 的 xyxy、xy、conf 直接切取
+    原始資料，必須先轉成 Tensor，呼叫端的 .cpu().numpy() 才能與本地推論一致。
+
+    Args:
+        frame (numpy.ndarray): 推論的影像
+        payload (tuple): (boxes, keypoints, names)
+    """
+    import torch
+    from ultralytics.engine.results import Results
+
+    boxes, keypoints, names = payload
+    boxes = torch.from_numpy(boxes) if boxes is not None else None
+    keypoints = torch.from_numpy(keypoints) if keypoints is not None else None
+    return Results(frame, path='', names=names, boxes=boxes, keypoints=keypoints)
+
+
+class _PendingRequest:
+    __slots__ = ('event', 'result', 'error', 'slot', 'worker', 'generation')
+
+    def __init__(self, slot, worker, generation):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.slot = slot
+        self.worker = worker
+        self.generation = generation
+
+
+class _Worker:
+    """主程序中對應一個工作程序的狀態"""
+
+    def __init__(self, index, slots, slot_bytes, ctx):
+        self.index = index
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.ctx = ctx
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        # 程序重新啟動時遞增，舊世代的共享記憶體格不再歸還，避免同一格被重複分配
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.free_slots = queue.Queue()
+        for slot in range(slots):
+            self.free_slots.put(slot)
+        self.request_queue = None
+        self.process = None
+        self.ready = threading.Event()
+        self.error = None
+        self.sessions = set()
+        self.requests = 0
+
+    def start(self, response_queue, intra_threads):
+        self.ready.clear()
+        self.error = None
+        self.request_queue = self.ctx.Queue()
+        self.process = self.ctx.Process(
+            target=_worker_main,
+            args=(self.index, self.shm.name, self.slot_bytes, self.request_queue, response_queue, intra_threads),
+            name=f"PoseWorker-{self.index}",
+            daemon=True,
+        )
+        self.process.start()
+
+    def acquire_slot(self, timeout):
+        """取得一個可用的共享記憶體格，返回 (格編號, 世代)"""
+        with self.lock:
+            free_slots, generation = self.free_slots, self.generation
+        return free_slots.get(timeout=timeout), generation
+
+    def release_slot(self, slot, generation):
+        """歸還共享記憶體格，程序重新啟動前取得的格直接丟棄"""
+        with self.lock:
+            if generation == self.generation:
+                self.free_slots.put(slot)
+
+    def reset_slots(self):
+        """程序重新啟動時進入新世代並重建可用清單"""
+        with self.lock:
+            self.generation += 1
+            self.free_slots = queue.Queue()
+            for slot in range(self.slots):
+                self.free_slots.put(slot)
+
+    def stop(self, timeout=2.0):
+        if self.process is not None and self.process.is_alive():
+            self.request_queue.put(None)
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class PoolPoseModel:
+    """與 YOLO 呼叫方式相同的代理，把一個會話的影像送到固定的工作程序推論"""
+
+    def __init__(self, pool, session_key, fallback=None):
+        self._pool = pool
+        self._session_key = session_key
+        self._fallback = fallback
+
+    def __call__(self, source, **kwargs):
+        if self._fallback is not None and not self._pool.accepts(source):
+            return self._fallback(source, **kwargs)
+        return [self._pool.infer(self._session_key, source, kwargs)]
+
+    def __getattr__(self, name):
+        if self._fallback is None:
+            raise AttributeError(name)
+        return getattr(self._fallback, name)
+
+
+class PoseWorkerPool:
+    """多程序姿態推論池
+
+    每個工作程序各自載入姿態模型，主程序把影像複製到與該程序共用的記憶體
+    區塊，只透過佇列傳遞請求資訊與推論後的框/關鍵點陣列，避免序列化整張
+    影像。同一會話固定送到同一個工作程序（會話親和），新會話分配給目前
+    會話數最少的程序。推論結果在主程序重建為 ultralytics Results，呼叫端
+    （FrameInference、繪圖）不需修改。計數等會話狀態仍留在主程序。
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = PoseWorkerPool()
+        return cls._instance
+
+    def __init__(self, workers=None, slots=None, max_frame_bytes=None, timeout=None):
+        """
+        Args:
+            workers (int): 工作程序數量，0 表示 CPU 核心數的一半
+            slots (int): 每個工作程序的共享記憶體影像格數（同時送出的影像上限）
+            max_frame_bytes (int): 單一影像的大小上限
+            timeout (float): 等待推論結果的秒數
+        """
+        cores = os.cpu_count() or 1
+        workers = workers if workers is not None else getattr(Config, 'POSE_WORKER_COUNT', 0)
+        self.worker_count = max(1, int(workers) or cores // 2)
+        self.slots = max(1, int(slots or getattr(Config, 'POSE_WORKER_SLOTS', 4)))
+        self.slot_bytes = int(max_frame_bytes or getattr(Config, 'POSE_WORKER_MAX_FRAME_BYTES', 1920 * 1080 * 3))
+        self.timeout = float(timeout or getattr(Config, 'POSE_WORKER_TIMEOUT', 5.0))
+        self.intra_threads = max(1, cores // self.worker_count)
+
+        self._ctx = mp.get_context('spawn')
+        self._workers = []
+        self._response_queue = None
+        self._pending = {}
+        self._orphaned = {}  # 逾時請求佔用的共享記憶體格，收到遲到的回應後才歸還
+        self._pending_lock = threading.Lock()
+        self._affinity = {}
+        self._affinity_lock = threading.Lock()
+        self._request_ids = itertools.count(1)
+        self._reader = None
+        self._monitor = None
+        self._running = False
+        self.restarts = 0
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self, wait=True):
+        """啟動所有工作程序
+
+        Args:
+            wait (bool): 是否等待所有程序載入模型完成
+
+        Returns:
+            bool: 是否全部就緒
+        """
+        if self._running:
+            return True
+        self._running = True
+        self._response_queue = self._ctx.Queue()
+        self._workers = [_Worker(index, self.slots, self.slot_bytes, self._ctx) for index in range(self.worker_count)]
+        for worker in self._workers:
+            worker.start(self._response_queue, self.intra_threads)
+
+        self._reader = threading.Thread(target=self._read_responses, name='PoseWorkerReader', daemon=True)
+        self._reader.start()
+        self._monitor = threading.Thread(target=self._monitor_workers, name='PoseWorkerMonitor', daemon=True)
+        self._monitor.start()
+        logger.info(f"已啟動 {self.worker_count} 個姿態推論工作程序 "
+                    f"(每個 {self.intra_threads} 執行緒, {self.slots} 格共享記憶體)")
+        return self.wait_until_ready() if wait else True
+
+    def wait_until_ready(self, timeout=120.0):
+        """等待所有工作程序載入模型"""
+        deadline = time.time() + timeout
+        for worker in self._workers:
+            if not worker.ready.wait(max(0.0, deadline - time.time())):
+                return False
+        return all(worker.error is None for worker in self._workers)
+
+    def stop(self):
+        """停止所有工作程序並釋放共享記憶體"""
+        if not self._running:
+            return
+        self._running = False
+        for worker in self._workers:
+            worker.stop()
+        self._response_queue.put(None)
+        self._fail_pending(lambda request: True, RuntimeError("姿態推論池已停止"))
+
+    def accepts(self, frame):
+        """影像是否能放入共享記憶體格"""
+        return self._running and frame.nbytes <= self.slot_bytes
+
+    def model_for(self, session_key, fallback=None):
+        """取得綁定到會話的模型代理
+
+        Args:
+            session_key (str): 會話識別（Socket.IO sid）
+            fallback: 影像過大或推論池未啟動時使用的本地模型
+        """
+        return PoolPoseModel(self, session_key or 'default', fallback)
+
+    def _assign(self, session_key):
+        with self._affinity_lock:
+            worker = self._affinity.get(session_key)
+            if worker is None:
+                worker = min(self._workers, key=lambda w: (len(w.sessions), w.requests))
+                worker.sessions.add(session_key)
+                self._affinity[session_key] = worker
+                logger.info(f"會話 {session_key} 分配到姿態推論程序 {worker.index}")
+            return worker
+
+    def release(self, session_key):
+        """解除會話與工作程序的綁定"""
+        with self._affinity_lock:
+            worker = self._affinity.pop(session_key or 'default', None)
+            if worker is not None:
+                worker.sessions.discard(session_key or 'default')
+
+    def infer(self, session_key, frame, kwargs):
+        """在會話綁定的工作程序上推論一幀
+
+        Returns:
+            Results: ultralytics 推論結果
+        """
+        if not self._running:
+            raise RuntimeError("姿態推論池尚未啟動")
+        frame = np.ascontiguousarray(frame)
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"影像過大 ({frame.nbytes} bytes)，超過 POSE_WORKER_MAX_FRAME_BYTES")
+
+        worker = self._assign(session_key)
+        try:
+            slot, generation = worker.acquire_slot(self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"姿態推論程序 {worker.index} 忙碌中")
+
+        request_id = next(self._request_ids)
+        request = _PendingRequest(slot, worker, generation)
+        try:
+            # 與 reset_slots() 互斥：重新啟動後舊世代的格可能已分配給其他請求，不能再寫入
+            with worker.lock:
+                if generation != worker.generation:
+                    raise RuntimeError(f"姿態推論程序 {worker.index} 已重新啟動")
+                view = np.ndarray(frame.shape, dtype=frame.dtype, buffer=worker.shm.buf, offset=slot * self.slot_bytes)
+                view[...] = frame
+                del view
+                with self._pending_lock:
+                    self._pending[request_id] = request
+                worker.requests += 1
+                worker.request_queue.put((request_id, slot, frame.shape, frame.dtype.str, kwargs))
+
+            if not request.event.wait(self.timeout):
+                raise TimeoutError(f"姿態推論程序 {worker.index} 逾時")
+        finally:
+            with self._pending_lock:
+                submitted = self._pending.pop(request_id, None) is not None
+                # 工作程序可能仍在讀取該格，等遲到的回應抵達後才歸還
+                if submitted and not request.event.is_set():
+                    self._orphaned[request_id] = (worker, slot, generation)
+            if request.event.is_set() or not submitted:
+                worker.release_slot(slot, generation)
+
+        if request.error is not None:
+            raise request.error
+        return build_results(frame, request.result)
+
+    def _read_responses(self):
+        while True:
+            item = self._response_queue.get()
+            if item is None:
+                break
+            kind, key, payload = item
+            if kind in ('ready', 'failed'):
+                worker = self._workers[key]
+                worker.error = payload if kind == 'failed' else None
+                worker.ready.set()
+                if kind == 'failed':
+                    logger.error(f"姿態推論程序 {key} 載入模型失敗: {payload}")
+                continue
+
+            # 在鎖內喚醒請求，infer() 的 finally 才能一致地判斷是否需要等待遲到的回應
+            with self._pending_lock:
+                request = self._pending.get(key)
+                orphan = self._orphaned.pop(key, None) if request is None else None
+                if request is not None:
+                    if kind == 'result':
+                        request.result = payload
+                    else:
+                        request.error = RuntimeError(payload)
+                    request.event.set()
+            if orphan is not None:
+                worker, slot, generation = orphan
+                worker.release_slot(slot, generation)
+
+    def _fail_pending(self, predicate, error):
+        with self._pending_lock:
+            for request in self._pending.values():
+                if predicate(request):
+                    request.error = error
+                    request.event.set()
+
+    def _monitor_workers(self):
+        """工作程序意外結束時重新啟動，並讓等待中的請求立即失敗"""
+        while self._running:
+            time.sleep(1.0)
+            for worker in self._workers:
+                if not self._running or worker.process is None or worker.process.is_alive():
+                    continue
+                logger.error(f"姿態推論程序 {worker.index} 已結束 (exit={worker.process.exitcode})，重新啟動")
+                # 先進入新世代，等待中的請求被喚醒後歸還的舊格會被丟棄
+                worker.reset_slots()
+                self._fail_pending(lambda request, w=worker: request.worker is w,
+                                   RuntimeError(f"姿態推論程序 {worker.index} 已結束"))
+                with self._pending_lock:
+                    self._orphaned = {key: value for key, value in self._orphaned.items() if value[0] is not worker}
+                worker.start(self._response_queue, self.intra_threads)
+                self.restarts += 1
+
+    def get_stats(self):
+        """取得各工作程序的會話數與請求數"""
+        return {
+            'workers': [{
+                'index': worker.index,
+                'alive': worker.process is not None and worker.process.is_alive(),
+                'ready': worker.ready.is_set() and worker.error is None,
+                'sessions': len(worker.sessions),
+                'requests': worker.requests,
+                'free_slots': worker.free_slots.qsize(),
+            } for worker in self._workers],
+            'intra_threads': self.intra_threads,
+            'restarts': self.restarts,
+        }
+
+
+def get_pose_worker_pool():
+    """取得姿態推論池，POSE_WORKER_POOL 停用或以協程模式執行時返回 None
+
+    協程模式下推論已由 offload() 交給作業系統執行緒並行執行，且推論池的
+    讀取執行緒會阻塞協程迴圈，因此不使用推論池。
+    """
+    if not getattr(Config, 'POSE_WORKER_POOL', False) or is_green():
+        return None
+    return PoseWorkerPool.get_instance()
@@ -0,0 +1,156 @@
+import logging
+
+from app.database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_TABLE = 'exercise_daily_rollup'
+
+# 每位使用者、每天、每種運動的彙總，分析頁面讀取 O(天數) 列而非全部紀錄
+CREATE_ROLLUP_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+    student_id VARCHAR(50) NOT NULL,
+    day DATE NOT NULL,
+    exercise_type VARCHAR(50) NOT NULL,
+    record_count INT NOT NULL DEFAULT 0,
+    total_reps BIGINT NOT NULL DEFAULT 0,
+    total_sets BIGINT NOT NULL DEFAULT 0,
+    total_weight BIGINT NOT NULL DEFAULT 0,
+    weighted_reps BIGINT NOT NULL DEFAULT 0,
+    calories DOUBLE NOT NULL DEFAULT 0,
+    first_at DATETIME NOT NULL,
+    last_at DATETIME NOT NULL,
+    PRIMARY KEY (student_id, day, exercise_type)
+)
+"""
+
+# 增量更新與重建共用的彙總欄位，weighted_reps = Σ reps × weight，
+# calories 使用與儀表板相同的 weight × reps × sets × 0.1
+_ROLLUP_COLUMNS = ("student_id, day, exercise_type, record_count, total_reps, total_sets, "
+                   "total_weight, weighted_reps, calories, first_at, last_at")
+
+_UPSERT_SUFFIX = """
+ON DUPLICATE KEY UPDATE
+    record_count = record_count + VALUES(record_count),
+    total_reps = total_reps + VALUES(total_reps),
+    total_sets = total_sets + VALUES(total_sets),
+    total_weight = total_weight + VALUES(total_weight),
+    weighted_reps = weighted_reps + VALUES(weighted_reps),
+    calories = calories + VALUES(calories),
+    first_at = LEAST(first_at, VALUES(first_at)),
+    last_at = GREATEST(last_at, VALUES(last_at))
+"""
+
+RECORD_UPSERT = f"""
+INSERT INTO {ROLLUP_TABLE} ({_ROLLUP_COLUMNS})
+SELECT student_id, DATE(timestamp), exercise_type, 1, reps, sets,
+       weight, reps * weight, weight * reps * sets * 0.1, timestamp, timestamp
+FROM exercise_info
+WHERE id = %s
+""" + _UPSERT_SUFFIX
+
+REBUILD_SELECT = f"""
+INSERT INTO {ROLLUP_TABLE} ({_ROLLUP_COLUMNS})
+SELECT student_id, DATE(timestamp), exercise_type, COUNT(*), SUM(reps), SUM(sets),
+       SUM(weight), SUM(reps * weight), SUM(weight * reps * sets * 0.1), MIN(timestamp), MAX(timestamp)
+FROM exercise_info
+WHERE student_id = %s
+GROUP BY student_id, DATE(timestamp), exercise_type
+"""
+
+
+def ensure_rollup_table(cursor):
+    """建立彙總表（已存在時不做任何事）
+
+    Returns:
+        bool: 是否為新建立的表（新表需要以 backfill() 補上既有紀錄）
+    """
+    cursor.execute(f"SHOW TABLES LIKE '{ROLLUP_TABLE}'")
+    if cursor.fetchall():
+        return False
+    cursor.execute(CREATE_ROLLUP_TABLE)
+    return True
+
+
+def record_exercise(cursor, record_id):
+    """把剛寫入的一筆 exercise_info 紀錄累加到彙總表
+
+    必須與寫入紀錄使用同一個 cursor，並在同一個交易中提交，
+    紀錄與彙總才會一起成功或一起回滾。
+
+    Args:
+        cursor: 寫入紀錄的資料庫 cursor
+        record_id (int): 剛寫入的紀錄 ID（cursor.lastrowid）
+    """
+    if record_id:
+        cursor.execute(RECORD_UPSERT, (record_id,))
+
+
+def rebuild_student(cursor, student_id):
+    """以 exercise_info 重新計算一位使用者的彙總（由呼叫端提交）
+
+    Returns:
+        int: 寫入的彙總列數
+    """
+    cursor.execute(f"DELETE FROM {ROLLUP_TABLE} WHERE student_id = %s", (student_id,))
+    cursor.execute(REBUILD_SELECT, (student_id,))
+    return cursor.rowcount
+
+
+def backfill(student_ids=None):
+    """重建彙總表
+
+    每位使用者各自在一個交易中刪除並重新計算，重建期間該使用者新寫入的紀錄
+    會等待交易結束，不會被重複或遺漏計算。
+
+    Args:
+        student_ids (list): 要重建的使用者，None 表示 exercise_info 中的所有使用者
+
+    Returns:
+        dict: 重建的使用者數與彙總列數，無法連線時返回 None
+    """
+    conn = get_db_connection()
+    if not conn:
+        logger.error("無法連接到數據庫")
+        return None
+
+    try:
+        cursor = conn.cursor()
+        ensure_rollup_table(cursor)
+        if student_ids is None:
+            cursor.execute("SELECT DISTINCT student_id FROM exercise_info")
+            student_ids = [row[0] for row in cursor.fetchall()]
+        conn.commit()
+
+        rows = 0
+        for index, student_id in enumerate(student_ids, 1):
+            try:
+                rows += rebuild_student(cursor, student_id)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"重建用戶 {student_id} 的彙總失敗: {e}")
+                raise
+            if index % 100 == 0:
+                logger.info(f"已重建 {index}/{len(student_ids)} 位用戶的彙總")
+        cursor.close()
+        return {'students': len(student_ids), 'rows': rows}
+    finally:
+        conn.close()
+
+
+def fetch_rollup(cursor, student_id):
+    """讀取一位使用者的全部彙總列（依日期排序）
+
+    Returns:
+        list: 每列包含 day、exercise_type、record_count、total_reps、total_sets、
+              total_weight、weighted_reps、calories、first_at、last_at
+    """
+    cursor.execute(f"""
+        SELECT day, exercise_type, record_count, total_reps, total_sets, total_weight,
+               weighted_reps, calories, first_at, last_at
+        FROM {ROLLUP_TABLE}
+        WHERE student_id = %s
+        ORDER BY day
+    """, (student_id,))
+    return cursor.fetchall()
@@ -3,9 +3,9 @@ import time
 import numpy as np
 import math
 import logging
-import torch
-from ultralytics import YOLO
+from .model_registry import get_pose_model
 import os
+from .inference_scheduler import batched_model
 
 # 配置logger
 logger = logging.getLogger(__name__)
@@ -49,9 +49,8 @@ class TableTennisService:
     def get_model(cls):
         if cls._model is None:
             try:
-                # 確保模型文件路徑正確
-                model_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'yolov8n-pose.pt')
-                cls._model = YOLO(model_path)
+                # 與其他服務共用同一個姿態模型
+                cls._model = get_pose_model()
                 logger.info("成功載入YOLO-Pose模型")
             except Exception as e:
                 logger.error(f"載入YOLO-Pose模型失敗: {e}")
@@ -110,7 +109,7 @@ class HandDominanceDetector:
         self.assist_hand_angle_timer = None  # 初始化 assist_hand_angle_timer
         
         # 使用共享模型實例
-        self.pose_model = TableTennisService.get_model()
+        self.pose_model = batched_model(TableTennisService.get_model())
 
     # 從 Table_Tennis.py 複製所有方法，但移除 __init__ 中的模型加載部分
     def record_hand_coordinates(self, wrist_point):
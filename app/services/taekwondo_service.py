@@ -4,7 +4,8 @@ import time
 import logging
 from collections import deque
 from app.services.pose_detection import calculate_angle, get_pose_angles
-from ultralytics import YOLO
+from app.services.model_registry import get_pose_model
+from app.services.inference_scheduler import batched_model
 import os
 import threading
 from datetime import datetime
@@ -63,15 +64,9 @@ class TaekwondoDetailService:
     def load_pose_model(self):
         """載入姿態檢測模型"""
         try:
-            # 嘗試載入本地模型
-            model_path = os.path.join('static', 'models', 'YOLO_MODLE', 'pose', 'yolov8n-pose.pt')
-            if os.path.exists(model_path):
-                self.pose_model = YOLO(model_path)
-                logger.info(f"已載入本地姿態檢測模型: {model_path}")
-            else:
-                # 使用預設模型
-                self.pose_model = YOLO('yolov8n-pose.pt')
-                logger.info("已載入預設姿態檢測模型")
+            # 與其他服務共用同一個姿態模型
+            self.pose_model = batched_model(get_pose_model())
+            logger.info("已載入姿態檢測模型")
         except Exception as e:
             logger.error(f"載入姿態檢測模型失敗: {e}")
             raise
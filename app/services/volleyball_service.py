@@ -3,11 +3,11 @@ import time
 import numpy as np
 import math
 import logging
-import torch
-from ultralytics import YOLO
+from .model_registry import get_model_registry
 import os
 from .Volleyball_Overhand import OverhandDetector
 from .Volleyball_lowhand import LowhandDetector
+from .inference_scheduler import batched_model
 
 # 配置logger
 logger = logging.getLogger(__name__)
@@ -39,13 +39,9 @@ class VolleyballService:
         """載入YOLO-Pose模型"""
         try:
             if VolleyballService._model is None:
-                if os.path.exists(self.model_path):
-                    VolleyballService._model = YOLO(self.model_path)
-                    logger.info(f"成功載入YOLO-Pose模型: {self.model_path}")
-                else:
-                    # 如果本地模型不存在，使用預訓練模型
-                    VolleyballService._model = YOLO('yolo11n-pose.pt')
-                    logger.info("使用預訓練YOLO-Pose模型")
+                # 本地模型不存在時使用預訓練模型
+                VolleyballService._model = get_model_registry().get(self.model_path, fallback='yolo11n-pose.pt')
+                logger.info("成功載入YOLO-Pose模型")
         except Exception as e:
             logger.error(f"載入YOLO-Pose模型失敗: {e}")
             raise
@@ -68,7 +64,7 @@ class VolleyballService:
                 raise ValueError(f"不支援的檢測器類型: {detector_type}")
             
             # 設置模型
-            detector.pose_model = VolleyballService._model
+            detector.pose_model = batched_model(VolleyballService._model)
             self.detectors[session_id] = detector
             logger.info(f"創建新的排球檢測器 - 會話ID: {session_id}, 類型: {detector_type}")
         
@@ -0,0 +1,74 @@
+import os
+import logging
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+ASYNC_MODES = ('threading', 'eventlet', 'gevent')
+
+
+def async_mode():
+    """目前的 Socket.IO 非同步模式（'threading'、'eventlet' 或 'gevent'）"""
+    mode = getattr(Config, 'SOCKETIO_ASYNC_MODE', 'threading') or 'threading'
+    if mode not in ASYNC_MODES:
+        raise ValueError(f"不支援的非同步模式: {mode}，可用: {', '.join(ASYNC_MODES)}")
+    return mode
+
+
+def is_green():
+    """是否以協程（eventlet/gevent）模式執行
+
+    協程模式下 threading 已被替換為協程，長時間佔用 CPU 或呼叫 C 擴充套件的
+    阻塞操作會卡住所有連線，必須以 offload() 交給真正的作業系統執行緒。
+    """
+    return async_mode() != 'threading'
+
+
+def configure_offload_threads():
+    """依 OFFLOAD_THREADS 設定協程模式下的作業系統執行緒池大小"""
+    threads = int(getattr(Config, 'OFFLOAD_THREADS', 8))
+    mode = async_mode()
+    if mode == 'eventlet':
+        from eventlet import tpool
+        tpool.set_num_threads(threads)
+    elif mode == 'gevent':
+        from gevent import get_hub
+        get_hub().threadpool.maxsize = threads
+    else:
+        return None
+    logger.info(f"{mode} 模式：阻塞操作交給 {threads} 個作業系統執行緒")
+    return threads
+
+
+def offload(func, *args, **kwargs):
+    """在作業系統執行緒中執行阻塞操作並等待結果
+
+    threading 模式下直接呼叫；協程模式下只暫停目前的協程，其他連線照常處理。
+    PyTorch 推論與 OpenCV 運算會釋放 GIL，因此能與協程並行。
+    """
+    mode = async_mode()
+    if mode == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute(func, *args, **kwargs)
+    if mode == 'gevent':
+        from gevent import get_hub
+        return get_hub().threadpool.apply(func, args, kwargs)
+    return func(*args, **kwargs)
+
+
+def os_thread_count():
+    """目前程序的作業系統執行緒數（僅 Linux，其他平台返回 None）"""
+    try:
+        return len(os.listdir('/proc/self/task'))
+    except OSError:
+        return None
+
+
+def get_stats():
+    """取得非同步模式與執行緒統計"""
+    return {
+        'async_mode': async_mode(),
+        'os_threads': os_thread_count(),
+        'offload_threads': int(getattr(Config, 'OFFLOAD_THREADS', 8)) if is_green() else None,
+    }
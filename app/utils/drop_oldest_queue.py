@@ -0,0 +1,68 @@
+import threading
+from collections import deque
+
+
+class DropOldestQueue:
+    """有界的丟棄最舊項目佇列
+
+    佇列已滿時 put() 不會阻塞生產者，而是丟棄最舊的項目，讓下游階段
+    落後時永遠處理最新的資料。get() 以條件變數阻塞等待。
+    """
+
+    def __init__(self, maxsize=2):
+        """
+        Args:
+            maxsize (int): 佇列容量，至少為 1
+        """
+        self.maxsize = max(1, int(maxsize))
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0  # 因佇列已滿被丟棄的項目數
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def put(self, item):
+        """放入項目，佇列已滿時丟棄最舊的項目
+
+        Returns:
+            bool: 是否有項目被丟棄
+        """
+        with self._cond:
+            if self._closed:
+                return False
+            dropped = len(self._items) >= self.maxsize
+            if dropped:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+            return dropped
+
+    def get(self, timeout=None):
+        """取出最舊的項目，沒有時阻塞等待
+
+        Args:
+            timeout (float): 最長等待秒數，None 表示一直等待
+
+        Returns:
+            項目；逾時或佇列已關閉且為空時返回 None
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                return None
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def close(self):
+        """關閉佇列，喚醒所有等待中的執行緒；已放入的項目仍可取出"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
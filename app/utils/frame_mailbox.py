@@ -0,0 +1,131 @@
+import threading
+
+
+class FrameMailbox:
+    """單格最新幀信箱
+
+    生產者以 put() 放入影像幀時直接覆蓋尚未取走的舊幀，消費者以阻塞的
+    get() 等待新幀，不需以固定 sleep 輪詢。每次 put() 都會遞增序號，
+    多個只讀的觀察者（如 MJPEG 串流）可用 wait_for_newer() 等待比自己
+    已看過的序號更新的幀，而不會搶走處理執行緒要取的幀。
+
+    放入的是需要釋放的參照（如 FrameSlot）時，以 on_discard 指定釋放方式：
+    未被取走就被覆蓋、清除或關閉時丟棄的幀會交給 on_discard，以 get() 取走
+    的幀則由取走者負責釋放。此時只應以 get() 取幀。
+    """
+
+    def __init__(self, on_discard=None):
+        """
+        Args:
+            on_discard (callable): 未被取走就被丟棄的幀的處理函數
+        """
+        self._on_discard = on_discard
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._unread = False
+        self._closed = False
+        self.overwritten = 0  # 尚未被取走就被覆蓋的幀數
+
+    @property
+    def seq(self):
+        """最後一次放入的幀序號"""
+        return self._seq
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def put(self, frame):
+        """放入新幀並喚醒等待中的執行緒
+
+        Returns:
+            bool: 是否覆蓋了尚未被取走的舊幀
+        """
+        with self._cond:
+            if self._closed:
+                # 已關閉的信箱不再接收新幀
+                overwritten = False
+                discarded = frame
+            else:
+                overwritten = self._unread
+                discarded = self._frame if overwritten else None
+                if overwritten:
+                    self.overwritten += 1
+                self._frame = frame
+                self._seq += 1
+                self._unread = True
+                self._cond.notify_all()
+        self._discard(discarded)
+        return overwritten
+
+    def _discard(self, frame):
+        if frame is not None and self._on_discard is not None:
+            self._on_discard(frame)
+
+    def get(self, timeout=None):
+        """取走最新的未讀幀，沒有時阻塞等待
+
+        Args:
+            timeout (float): 最長等待秒數，None 表示一直等待
+
+        Returns:
+            影像幀；逾時或信箱已關閉時返回 None
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._unread or self._closed, timeout):
+                return None
+            if not self._unread:
+                return None
+            self._unread = False
+            return self._frame
+
+    def get_nowait(self):
+        """取走最新的未讀幀，沒有時立即返回 None"""
+        with self._cond:
+            if not self._unread:
+                return None
+            self._unread = False
+            return self._frame
+
+    def wait_for_newer(self, seq, timeout=None):
+        """等待序號大於 seq 的幀，不會標記為已讀
+
+        Args:
+            seq (int): 呼叫者已看過的序號
+            timeout (float): 最長等待秒數
+
+        Returns:
+            tuple: (序號, 影像幀)；逾時或信箱已關閉時影像幀為 None
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > seq or self._closed, timeout):
+                return seq, None
+            if self._seq <= seq:
+                return seq, None
+            return self._seq, self._frame
+
+    def latest(self):
+        """不等待地取得最新幀（不標記為已讀）
+
+        Returns:
+            tuple: (序號, 影像幀)，尚未放入任何幀時影像幀為 None
+        """
+        with self._cond:
+            return self._seq, self._frame
+
+    def clear(self):
+        """丟棄尚未被取走的幀"""
+        with self._cond:
+            discarded = self._frame if self._unread else None
+            self._unread = False
+        self._discard(discarded)
+
+    def close(self):
+        """關閉信箱並喚醒所有等待中的執行緒"""
+        with self._cond:
+            self._closed = True
+            discarded = self._frame if self._unread else None
+            self._unread = False
+            self._cond.notify_all()
+        self._discard(discarded)
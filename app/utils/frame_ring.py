@@ -0,0 +1,184 @@
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class FrameSlot:
+    """環形緩衝區中一格影像的參照
+
+    每個 FrameSlot 物件代表一份參照，使用完畢必須呼叫 release()（重複呼叫
+    無作用）。需要把同一格交給其他使用者時以 retain() 取得新的參照。
+    所有參照都釋放後，該格才會再被寫入。
+    """
+
+    __slots__ = ('ring', 'index', 'array', '_released')
+
+    def __init__(self, ring, index):
+        self.ring = ring
+        self.index = index
+        self.array = ring.view(index)
+        self._released = False
+
+    @property
+    def descriptor(self):
+        """跨程序存取此格所需的資訊 (共享記憶體名稱, 格索引)"""
+        return self.ring.name, self.index
+
+    def retain(self):
+        """取得同一格的另一份參照"""
+        self.ring.retain(self.index)
+        return FrameSlot(self.ring, self.index)
+
+    def release(self):
+        """釋放此參照"""
+        if not self._released:
+            self._released = True
+            self.ring.release(self.index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class FrameRing:
+    """預先配置的影像環形緩衝區
+
+    固定數量、固定尺寸的影像格在建立時一次配置，擷取端直接把影像寫入空閒
+    的格（如 cv2.resize 的 dst），處理端就地讀取，不需每幀配置與複製影像。
+    每格有參照計數，只有計數歸零的格才能再被寫入，讀取中的影像不會被覆蓋。
+    以共享記憶體建立時，其他程序可用 attach() 依名稱存取同一塊影像資料
+    （參照計數只存在建立者的程序中，跨程序使用時由建立者代為保留參照）。
+    """
+
+    def __init__(self, slots, shape, dtype=np.uint8, shared=True):
+        """
+        Args:
+            slots (int): 影像格數，至少為 2
+            shape (tuple): 單一影像的形狀，例如 (720, 720, 3)
+            dtype: 影像資料型態
+            shared (bool): 是否配置在共享記憶體，讓其他程序可存取
+        """
+        self.slots = max(2, int(slots))
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slot_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+
+        self._shm = None
+        self._owner = True
+        if shared:
+            self._shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+            buffer = self._shm.buf
+        else:
+            buffer = bytearray(self.slots * self.slot_bytes)
+        self._frames = np.ndarray((self.slots,) + self.shape, dtype=self.dtype, buffer=buffer)
+
+        self._refcounts = [0] * self.slots
+        self._cond = threading.Condition()
+        self._next = 0
+        self._closed = False
+        self.stalls = 0  # 沒有空閒格而必須等待的次數
+
+    @classmethod
+    def attach(cls, name, slots, shape, dtype=np.uint8):
+        """在其他程序中依名稱存取已建立的共享記憶體環形緩衝區（只讀取，不管理參照計數）"""
+        ring = cls.__new__(cls)
+        ring.slots = slots
+        ring.shape = tuple(shape)
+        ring.dtype = np.dtype(dtype)
+        ring.slot_bytes = int(np.prod(ring.shape)) * ring.dtype.itemsize
+        ring._shm = shared_memory.SharedMemory(name=name)
+        ring._owner = False
+        ring._frames = np.ndarray((slots,) + ring.shape, dtype=ring.dtype, buffer=ring._shm.buf)
+        ring._refcounts = [0] * slots
+        ring._cond = threading.Condition()
+        ring._next = 0
+        ring._closed = False
+        ring.stalls = 0
+        return ring
+
+    @property
+    def name(self):
+        """共享記憶體名稱，非共享時為 None"""
+        return self._shm.name if self._shm is not None else None
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def view(self, index):
+        """取得指定格的影像陣列（不複製）"""
+        return self._frames[index]
+
+    def acquire(self, timeout=None):
+        """取得一個空閒格供寫入
+
+        依序輪流使用各格；沒有空閒格時等待其他參照釋放。
+
+        Args:
+            timeout (float): 最長等待秒數，None 表示一直等待
+
+        Returns:
+            FrameSlot: 參照計數為 1 的格；逾時或已關閉時返回 None
+        """
+        with self._cond:
+            index = self._find_free()
+            if index is None:
+                self.stalls += 1
+                if not self._cond.wait_for(lambda: self._closed or self._find_free() is not None, timeout):
+                    return None
+                index = self._find_free()
+            if self._closed or index is None:
+                return None
+            self._refcounts[index] = 1
+            self._next = (index + 1) % self.slots
+        return FrameSlot(self, index)
+
+    def _find_free(self):
+        for offset in range(self.slots):
+            index = (self._next + offset) % self.slots
+            if self._refcounts[index] == 0:
+                return index
+        return None
+
+    def retain(self, index):
+        """增加指定格的參照計數"""
+        with self._cond:
+            self._refcounts[index] += 1
+
+    def release(self, index):
+        """減少指定格的參照計數，歸零時喚醒等待寫入的執行緒"""
+        with self._cond:
+            if self._refcounts[index] > 0:
+                self._refcounts[index] -= 1
+                if self._refcounts[index] == 0:
+                    self._cond.notify_all()
+
+    def in_use(self):
+        """目前被參照的格數"""
+        with self._cond:
+            return sum(1 for count in self._refcounts if count)
+
+    def close(self):
+        """關閉環形緩衝區並釋放共享記憶體，喚醒所有等待中的執行緒"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        # 釋放共享記憶體前須先放開指向它的陣列
+        self._frames = None
+        if self._shm is not None:
+            # 先移除名稱，即使下面 close() 失敗也不會把區段留在 /dev/shm
+            if self._owner:
+                try:
+                    self._shm.unlink()
+                except FileNotFoundError:
+                    pass
+            try:
+                self._shm.close()
+            except BufferError:
+                # 仍有陣列指向共享記憶體時交給程序結束時回收
+                pass
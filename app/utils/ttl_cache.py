@@ -0,0 +1,83 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+    """有存活時間與容量上限的 LRU 快取（執行緒安全）
+
+    項目超過 ttl 秒即視為過期；超過 maxsize 時移除最久未使用的項目。
+    只存在目前程序中，多程序或多節點部署時各自快取，修改資料後的
+    invalidate() 只影響目前程序，其他程序最多在 ttl 秒後更新。
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0):
+        """
+        Args:
+            maxsize (int): 最多保留的項目數
+            ttl (float): 項目的存活秒數
+        """
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = ttl
+        self._data = OrderedDict()  # 鍵 → (值, 過期時間)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, default=None):
+        """取得未過期的項目，並標記為最近使用"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                if item[1] > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return item[0]
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """加入或更新項目，超過容量時移除最久未使用的項目"""
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """移除指定項目，返回是否存在"""
+        with self._lock:
+            if self._data.pop(key, None) is None:
+                return False
+            self.invalidations += 1
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def get_stats(self):
+        """取得命中統計"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
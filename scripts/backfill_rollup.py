@@ -0,0 +1,46 @@
+"""重建每日運動彙總表 - 以 exercise_info 的全部紀錄重新計算 exercise_daily_rollup
+
+第一次部署彙總表、手動修改或刪除過 exercise_info 紀錄後執行。
+每位使用者在各自的交易中重建，可在服務運行時執行。
+
+使用方式:
+    python scripts/backfill_rollup.py
+    python scripts/backfill_rollup.py --student 411234567 --student 411234568
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.stats_rollup import backfill  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='重建每日運動彙總表')
+    parser.add_argument('--student', action='append', dest='students',
+                        help='只重建指定使用者的彙總（可重複指定），預設為全部使用者')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = backfill(args.students)
+    if result is None:
+        sys.exit(1)
+    logger.info(f"完成重建: {result['students']} 位用戶, {result['rows']} 筆彙總, "
+                f"耗時 {time.perf_counter() - start:.1f} 秒")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+"""影像處理基準測試 - 以錄影檔重播完整的逐幀處理流程，不需攝影機
+
+每段錄影依序經過解碼、縮放、process_frame_realtime（或各球類/跆拳道檢測器）
+與 JPEG 編碼，回報各階段耗時百分位數、幀率、峰值記憶體與最終計數。
+指定 --baseline 時與先前的報告比較，幀率下降、延遲上升超過容許值或計數不同時
+以非零狀態結束，可作為效能修改的回歸檢查。
+
+錄影檔對應的運動類型依 manifest.json（{"檔名": {"exercise": "squat", "expected_count": 10}}）
+決定；沒有 manifest 時依檔名前綴判斷（例如 squat_01.mp4、basketball-dribble_02.mp4）。
+
+使用方式:
+    python scripts/benchmark_pipeline.py clips/ --output baseline.json
+    python scripts/benchmark_pipeline.py clips/ --baseline baseline.json --tolerance 0.1
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from app.services import exercise_service, inference_limits, model_warmup  # noqa: E402
+from app.services.detection_session import DetectionSession, bind_session  # noqa: E402
+from app.services.frame_pipeline import JPEG_ENCODE_PARAM  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+STAGES = ('decode', 'resize', 'inference', 'counting', 'annotation', 'encode', 'total')
+PERCENTILES = (50, 95, 99)
+
+# 由 process_frame_realtime 處理的運動
+EXERCISE_TYPES = ('squat', 'bicep-curl', 'shoulder-press', 'push-up', 'pull-up', 'dumbbell-row',
+                  'arm-swing-warmup', 'alternating-arm-swing', 'plank')
+# 使用各自檢測器的運動
+SPORT_TYPES = ('table-tennis', 'basketball', 'basketball-dribble', 'volleyball-overhand',
+               'volleyball-lowhand', 'taekwondo-detail')
+# 與即時檢測相同，這些模式先水平翻轉畫面
+MIRRORED_TYPES = ('table-tennis', 'basketball-dribble', 'volleyball-overhand', 'volleyball-lowhand',
+                  'alternating-arm-swing', 'plank', 'taekwondo-detail')
+
+
+def find_clips(path):
+    """列出目錄中的錄影檔（也接受單一檔案）"""
+    if os.path.isfile(path):
+        return [path]
+    clips = []
+    for ext in VIDEO_EXTENSIONS:
+        clips.extend(glob.glob(os.path.join(path, f'*{ext}')))
+    return sorted(clips)
+
+
+def load_manifest(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def clip_exercise(clip, manifest, default=None):
+    """決定錄影檔的運動類型與預期計數"""
+    entry = manifest.get(os.path.basename(clip), {})
+    if entry.get('exercise'):
+        return entry['exercise'], entry.get('expected_count')
+    name = os.path.basename(clip).lower()
+    # 較長的名稱優先，避免 basketball-dribble 被判為 basketball
+    for exercise_type in sorted(EXERCISE_TYPES + SPORT_TYPES, key=len, reverse=True):
+        if name.startswith(exercise_type) or name.startswith(exercise_type.replace('-', '_')):
+            return exercise_type, entry.get('expected_count')
+    return default, entry.get('expected_count')
+
+
+def peak_rss_mb():
+    """目前程序的峰值常駐記憶體（MB），無法取得時返回 None"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            info = psutil.Process().memory_info()
+            return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+        except ImportError:
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 為單位，macOS 以 byte 為單位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def summarize(samples):
+    """計算各階段耗時的百分位數（毫秒）"""
+    summary = {}
+    for stage in STAGES:
+        values = samples.get(stage)
+        if not values:
+            continue
+        values = np.asarray(values) * 1000.0
+        summary[stage] = {f'p{pct}': float(np.percentile(values, pct)) for pct in PERCENTILES}
+        summary[stage]['mean'] = float(values.mean())
+    return summary
+
+
+class SportRunner:
+    """以即時檢測相同的方式建立並呼叫球類/跆拳道檢測器"""
+
+    def __init__(self, exercise_type, width, height):
+        self.exercise_type = exercise_type
+        self.session_id = f'benchmark-{uuid.uuid4()}'
+        self.service = None
+        self.detector = None
+
+        if exercise_type == 'table-tennis':
+            from app.services.table_tennis_service import TableTennisService
+            self.service = TableTennisService.get_instance()
+            self.detector = self.service.get_detector(self.session_id, width, height)
+        elif exercise_type == 'basketball':
+            from app.services.basketball_service import BasketballService
+            self.service = BasketballService.get_instance()
+            self.detector = self.service.get_detector(self.session_id, width, height)
+        elif exercise_type == 'basketball-dribble':
+            from app.services.basketball_dribble_service import BasketballDribbleService
+            self.service = BasketballDribbleService.get_instance()
+            self.detector = self.service.get_detector(self.session_id, width, height)
+        elif exercise_type in ('volleyball-overhand', 'volleyball-lowhand'):
+            from app.services.volleyball_service import VolleyballService
+            self.service = VolleyballService.get_instance()
+            self.detector = self.service.get_detector(self.session_id, width, height,
+                                                      exercise_type.split('-')[1])
+        elif exercise_type == 'taekwondo-detail':
+            from app.services.taekwondo_service import get_taekwondo_service
+            self.detector = get_taekwondo_service()
+            self.detector.reset()
+
+    def process(self, frame):
+        if self.exercise_type == 'taekwondo-detail':
+            return self.detector.process_frame(frame)['frame']
+        if self.exercise_type == 'basketball-dribble':
+            results = self.detector.pose_model(frame, conf=0.3, verbose=False)
+            if len(results) > 0 and results[0].keypoints is not None and len(results[0].keypoints.xy) > 0:
+                keypoints = results[0].keypoints.xy[0].cpu().numpy()
+                if self.detector.dominant_hand:
+                    return self.detector.process_frame(frame, keypoints, time.time())
+                return self.detector.detect_dominant_hand(frame)
+            return frame
+        return self.detector.detect_and_display_landmarks(frame)
+
+    def count(self):
+        if self.exercise_type == 'basketball':
+            return self.detector.shooting_count
+        if self.exercise_type == 'volleyball-lowhand':
+            return self.detector.success_count
+        if self.exercise_type == 'taekwondo-detail':
+            return self.detector.action_count
+        return self.detector.stroke_count
+
+    def close(self):
+        if self.service is not None:
+            self.service.remove_detector(self.session_id)
+
+
+def exercise_count(exercise_type):
+    """process_frame_realtime 處理的運動在目前會話中的最終計數"""
+    if exercise_type == 'alternating-arm-swing':
+        return exercise_service.get_alternating_arm_swing_time()
+    if exercise_type == 'plank':
+        return exercise_service.get_plank_time()
+    return exercise_service.state.exercise_count
+
+
+def benchmark_clip(clip, exercise_type, stream_mode='video', adaptive=False, max_frames=None, capture_size=720):
+    """重播一段錄影並量測各階段耗時
+
+    Args:
+        clip (str): 錄影檔路徑
+        exercise_type (str): 運動類型
+        stream_mode (str): 'video' 標註並編碼影像，'keypoints' 只計算關鍵點（不編碼）
+        adaptive (bool): 是否保留自適應推論（依實際耗時跳過推論，結果會隨機器不同）
+        max_frames (int): 最多處理的幀數
+        capture_size (int): 與即時檢測相同的擷取正方形尺寸
+
+    Returns:
+        dict: 該段錄影的統計
+    """
+    cap = cv2.VideoCapture(clip)
+    if not cap.isOpened():
+        logger.error(f"無法開啟錄影檔: {clip}")
+        return None
+
+    session = DetectionSession(f'benchmark-{uuid.uuid4()}')
+    session.stream_mode = stream_mode
+    session.detection_active = True
+    if not adaptive:
+        # 每幀都推論，計數結果不受機器速度影響
+        session.inference_controller.enabled = False
+        session.inference_controller.min_inference_interval = 0.0
+
+    samples = {stage: [] for stage in STAGES}
+    captured = np.empty((capture_size, capture_size, 3), dtype=np.uint8)
+    runner = None
+    frames = 0
+    started = time.perf_counter()
+
+    try:
+        with bind_session(session):
+            while max_frames is None or frames < max_frames:
+                frame_start = time.perf_counter()
+                ok, raw = cap.read()
+                decoded = time.perf_counter()
+                if not ok:
+                    break
+
+                cv2.resize(raw, (capture_size, capture_size), dst=captured)
+                resized = time.perf_counter()
+                frame = cv2.flip(captured, 1) if exercise_type in MIRRORED_TYPES else captured
+
+                if exercise_type in SPORT_TYPES:
+                    if runner is None:
+                        runner = SportRunner(exercise_type, frame.shape[1], frame.shape[0])
+                    inference_before = inference_limits.thread_inference_time()
+                    processed = runner.process(frame)
+                    processed_at = time.perf_counter()
+                    inference_time = inference_limits.thread_inference_time() - inference_before
+                    timings = {
+                        'resize': 0.0,
+                        'inference': inference_time,
+                        # 檢測器內的計數與標註無法分開，合併計入計數階段
+                        'counting': (processed_at - resized) - inference_time,
+                    }
+                else:
+                    processed = exercise_service.process_frame_realtime(frame, exercise_type)
+                    processed_at = time.perf_counter()
+                    timings = dict(session.frame_timings)
+
+                encode_time = None
+                if stream_mode == 'video' and processed is not None:
+                    ok, _ = cv2.imencode('.jpg', processed, JPEG_ENCODE_PARAM)
+                    encode_time = time.perf_counter() - processed_at
+
+                samples['decode'].append(decoded - frame_start)
+                samples['resize'].append((resized - decoded) + timings.get('resize', 0.0))
+                for stage in ('inference', 'counting', 'annotation'):
+                    if stage in timings:
+                        samples[stage].append(timings[stage])
+                if encode_time is not None:
+                    samples['encode'].append(encode_time)
+                samples['total'].append(time.perf_counter() - frame_start)
+                frames += 1
+
+            count = runner.count() if runner is not None else exercise_count(exercise_type)
+    finally:
+        cap.release()
+        if runner is not None:
+            runner.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        'clip': os.path.basename(clip),
+        'exercise': exercise_type,
+        'frames': frames,
+        'seconds': elapsed,
+        'fps': frames / elapsed if elapsed > 0 else 0.0,
+        'count': count,
+        'stages': summarize(samples),
+        'inference': session.inference_controller.get_stats(),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def compare(report, baseline, tolerance):
+    """與基準報告比較，返回回歸項目列表"""
+    regressions = []
+    previous = {clip['clip']: clip for clip in baseline.get('clips', [])}
+    for clip in report['clips']:
+        base = previous.get(clip['clip'])
+        if base is None:
+            continue
+        name = clip['clip']
+        if clip['fps'] < base['fps'] * (1 - tolerance):
+            regressions.append(f"{name}: 幀率 {base['fps']:.1f} → {clip['fps']:.1f}")
+        base_p95 = base['stages'].get('total', {}).get('p95')
+        p95 = clip['stages'].get('total', {}).get('p95')
+        if base_p95 and p95 and p95 > base_p95 * (1 + tolerance):
+            regressions.append(f"{name}: 每幀 p95 {base_p95:.1f}ms → {p95:.1f}ms")
+        if clip['count'] != base['count']:
+            regressions.append(f"{name}: 計數 {base['count']} → {clip['count']}")
+
+    base_rss = baseline.get('peak_rss_mb')
+    if base_rss and report['peak_rss_mb'] and report['peak_rss_mb'] > base_rss * (1 + tolerance):
+        regressions.append(f"峰值記憶體 {base_rss:.0f}MB → {report['peak_rss_mb']:.0f}MB")
+    return regressions
+
+
+def print_report(report):
+    for clip in report['clips']:
+        expected = f" (預期 {clip['expected_count']})" if clip.get('expected_count') is not None else ''
+        print(f"\n{clip['clip']} [{clip['exercise']}] {clip['frames']} 幀, {clip['fps']:.1f} fps, "
+              f"計數 {clip['count']}{expected}")
+        print(f"  {'階段':<12} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)")
+        for stage, values in clip['stages'].items():
+            print(f"  {stage:<12} {values['p50']:>8.2f} {values['p95']:>8.2f} {values['p99']:>8.2f}")
+    if report['peak_rss_mb'] is not None:
+        print(f"\n峰值記憶體: {report['peak_rss_mb']:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='以錄影檔量測逐幀處理的效能')
+    parser.add_argument('clips', help='錄影檔或包含錄影檔的目錄')
+    parser.add_argument('--manifest', help='運動類型與預期計數（預設為目錄中的 manifest.json）')
+    parser.add_argument('--exercise', help='無法由檔名判斷時使用的運動類型')
+    parser.add_argument('--stream-mode', choices=['video', 'keypoints'], default='video')
+    parser.add_argument('--adaptive', action='store_true', help='保留自適應推論（結果會隨機器速度不同）')
+    parser.add_argument('--max-frames', type=int, default=None, help='每段錄影最多處理的幀數')
+    parser.add_argument('--output', help='將報告寫入 JSON 檔')
+    parser.add_argument('--baseline', help='與先前的 JSON 報告比較')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='幀率、延遲與記憶體的容許變化比例')
+    args = parser.parse_args()
+
+    clips = find_clips(args.clips)
+    if not clips:
+        logger.error(f"找不到錄影檔: {args.clips}")
+        return 1
+    manifest_path = args.manifest
+    if manifest_path is None and os.path.isdir(args.clips):
+        manifest_path = os.path.join(args.clips, 'manifest.json')
+    manifest = load_manifest(manifest_path)
+
+    # 使用與伺服器相同的啟動流程載入模型
+    create_app()
+    if not model_warmup.wait_until_ready():
+        logger.error(f"模型載入失敗: {model_warmup.get_status()['error']}")
+        return 1
+
+    results = []
+    mismatches = []
+    for clip in clips:
+        exercise_type, expected = clip_exercise(clip, manifest, args.exercise)
+        if exercise_type is None:
+            logger.warning(f"無法判斷運動類型，略過: {clip}")
+            continue
+        logger.info(f"重播 {os.path.basename(clip)} ({exercise_type})")
+        result = benchmark_clip(clip, exercise_type, args.stream_mode, args.adaptive, args.max_frames)
+        if result is None:
+            continue
+        result['expected_count'] = expected
+        if expected is not None and result['count'] != expected:
+            mismatches.append(f"{result['clip']}: 計數 {result['count']}，預期 {expected}")
+        results.append(result)
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'stream_mode': args.stream_mode,
+        'adaptive': args.adaptive,
+        'clips': results,
+        'peak_rss_mb': peak_rss_mb(),
+        'models': model_warmup.get_status().get('models'),
+    }
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        logger.info(f"報告已寫入 {args.output}")
+
+    failures = list(mismatches)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            failures.extend(compare(report, json.load(f), args.tolerance))
+    if failures:
+        print("\n回歸檢查未通過:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\n回歸檢查通過")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
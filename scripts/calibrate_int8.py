@@ -0,0 +1,306 @@
+"""以錄製的檢測影片校正 INT8 量化姿態模型，並檢查關鍵點誤差與計數一致性
+
+1. 從錄影中抽取影像作為量化校正資料，匯出 OpenVINO INT8 模型
+   （yolov8n-pose.pt → yolov8n-pose_int8_openvino_model/）
+2. 在同一批錄影上逐幀比對 INT8 與浮點模型的關鍵點，並以關節角度計算次數
+3. 將結果寫入模型目錄中的 calibration.json；POSE_INT8 = True 時，
+   只有 passed 為 true 的模型才會被 ModelRegistry 載入
+
+使用方式:
+    python scripts/calibrate_int8.py recordings/squat_*.mp4 --exercise squat
+    python scripts/calibrate_int8.py clips/*.mp4 --exercise bicep-curl --skip-export
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config  # noqa: E402
+from app.services.model_registry import (  # noqa: E402
+    DEFAULT_POSE_MODEL, INT8_REPORT_NAME, int8_model_path,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# 以關節角度估計次數：(左側三點, 右側三點, 低點角度, 高點角度)
+# 角度低於低點再回到高點以上算一次，與各運動的主要判斷關節一致
+REP_ANGLE_RULES = {
+    'squat': ((11, 13, 15), (12, 14, 16), 100, 160),
+    'bicep-curl': ((5, 7, 9), (6, 8, 10), 60, 140),
+    'shoulder-press': ((5, 7, 9), (6, 8, 10), 90, 150),
+    'push-up': ((5, 7, 9), (6, 8, 10), 90, 150),
+    'pull-up': ((5, 7, 9), (6, 8, 10), 90, 150),
+    'dumbbell-row': ((5, 7, 9), (6, 8, 10), 90, 150),
+}
+# 關鍵點置信度低於此值時不用於角度與誤差計算
+MIN_KEYPOINT_CONF = 0.5
+
+
+def read_frames(path, stride=1, max_frames=None):
+    """逐幀讀取錄影檔
+
+    Args:
+        path (str): 錄影檔路徑
+        stride (int): 每幾幀取一幀
+        max_frames (int): 最多取幾幀
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        logger.error(f"無法開啟錄影檔: {path}")
+        return
+    index = taken = 0
+    try:
+        while max_frames is None or taken < max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            if index % stride == 0:
+                taken += 1
+                yield frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def build_calibration_dataset(clips, output_dir, samples):
+    """從錄影抽取影像並建立 ultralytics 校正用的資料集設定
+
+    Returns:
+        str: 資料集 yaml 路徑
+    """
+    image_dir = os.path.join(output_dir, 'images')
+    os.makedirs(image_dir, exist_ok=True)
+
+    per_clip = max(1, samples // max(1, len(clips)))
+    count = 0
+    for clip_index, clip in enumerate(clips):
+        cap = cv2.VideoCapture(clip)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or per_clip
+        cap.release()
+        stride = max(1, total // per_clip)
+        for frame_index, frame in enumerate(read_frames(clip, stride=stride, max_frames=per_clip)):
+            cv2.imwrite(os.path.join(image_dir, f"{clip_index:03d}_{frame_index:05d}.jpg"), frame)
+            count += 1
+    logger.info(f"已抽取 {count} 張校正影像")
+
+    yaml_path = os.path.join(output_dir, 'calibration.yaml')
+    with open(yaml_path, 'w', encoding='utf-8') as f:
+        f.write(f"path: {output_dir}\ntrain: images\nval: images\n"
+                f"kpt_shape: [17, 3]\nnames:\n  0: person\n")
+    return yaml_path
+
+
+def export_int8(pt_path, clips, samples, imgsz):
+    """以錄影影像校正並匯出 OpenVINO INT8 模型"""
+    from ultralytics import YOLO
+
+    work_dir = tempfile.mkdtemp(prefix='int8_calib_')
+    try:
+        data = build_calibration_dataset(clips, work_dir, samples)
+        exported = YOLO(pt_path, task='pose').export(format='openvino', int8=True, data=data,
+                                                     imgsz=imgsz, dynamic=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    target = int8_model_path(pt_path)
+    if exported and os.path.normpath(str(exported)) != os.path.normpath(target):
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        shutil.move(str(exported), target)
+    return target
+
+
+def _largest_person(result):
+    """取出畫面中最大的人（與即時檢測相同，只追蹤主要使用者）
+
+    Returns:
+        tuple: (關鍵點 (17, 2), 置信度 (17,), 框對角線長度)，未偵測到時返回 None
+    """
+    if result.keypoints is None or result.boxes is None or len(result.boxes) == 0:
+        return None
+    boxes = result.boxes.xyxy.cpu().numpy()
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    index = int(areas.argmax())
+    keypoints = result.keypoints.xy.cpu().numpy()[index]
+    conf = result.keypoints.conf
+    conf = conf.cpu().numpy()[index] if conf is not None else np.ones(len(keypoints))
+    diagonal = float(np.hypot(boxes[index, 2] - boxes[index, 0], boxes[index, 3] - boxes[index, 1]))
+    return keypoints, conf, diagonal
+
+
+def _joint_angle(keypoints, conf, joints):
+    a, b, c = joints
+    if min(conf[a], conf[b], conf[c]) < MIN_KEYPOINT_CONF:
+        return None
+    ba = keypoints[a] - keypoints[b]
+    bc = keypoints[c] - keypoints[b]
+    norm = np.linalg.norm(ba) * np.linalg.norm(bc)
+    if norm == 0:
+        return None
+    return float(np.degrees(np.arccos(np.clip(np.dot(ba, bc) / norm, -1.0, 1.0))))
+
+
+class RepCounter:
+    """以關節角度的低點/高點遲滯估計次數"""
+
+    def __init__(self, exercise_type):
+        self.left, self.right, self.low, self.high = REP_ANGLE_RULES[exercise_type]
+        self.count = 0
+        self.down = False
+
+    def update(self, person):
+        if person is None:
+            return
+        keypoints, conf, _ = person
+        angles = [angle for angle in (_joint_angle(keypoints, conf, self.left),
+                                      _joint_angle(keypoints, conf, self.right)) if angle is not None]
+        if not angles:
+            return
+        angle = sum(angles) / len(angles)
+        if not self.down and angle < self.low:
+            self.down = True
+        elif self.down and angle > self.high:
+            self.down = False
+            self.count += 1
+
+
+def evaluate(pt_path, int8_path, clips, exercise_type, imgsz, stride):
+    """逐幀比對 INT8 與浮點模型
+
+    Returns:
+        dict: 每段錄影與整體的關鍵點誤差、次數與耗時
+    """
+    from ultralytics import YOLO
+
+    float_model = YOLO(pt_path, task='pose')
+    int8_model = YOLO(int8_path, task='pose')
+
+    errors = []
+    detection_mismatch = 0
+    frames = 0
+    timings = {'float': [], 'int8': []}
+    clip_reports = []
+    for clip in clips:
+        counters = {'float': RepCounter(exercise_type), 'int8': RepCounter(exercise_type)}
+        for frame in read_frames(clip, stride=stride):
+            people = {}
+            for label, model in (('float', float_model), ('int8', int8_model)):
+                start = time.perf_counter()
+                result = model(frame, imgsz=imgsz, verbose=False)[0]
+                if frames > 0:
+                    timings[label].append(time.perf_counter() - start)
+                people[label] = _largest_person(result)
+                counters[label].update(people[label])
+            frames += 1
+
+            reference, candidate = people['float'], people['int8']
+            if (reference is None) != (candidate is None):
+                detection_mismatch += 1
+            elif reference is not None:
+                # 關鍵點誤差以人物框對角線正規化，與距離鏡頭遠近無關
+                visible = (reference[1] >= MIN_KEYPOINT_CONF) & (candidate[1] >= MIN_KEYPOINT_CONF)
+                if visible.any() and reference[2] > 0:
+                    distance = np.linalg.norm(reference[0][visible] - candidate[0][visible], axis=1)
+                    errors.extend((distance / reference[2]).tolist())
+
+        clip_reports.append({
+            'clip': os.path.basename(clip),
+            'float_reps': counters['float'].count,
+            'int8_reps': counters['int8'].count,
+        })
+        logger.info(f"{os.path.basename(clip)}: 浮點 {counters['float'].count} 次 / "
+                    f"INT8 {counters['int8'].count} 次")
+
+    errors = np.asarray(errors) if errors else np.zeros(1)
+    return {
+        'frames': frames,
+        'clips': clip_reports,
+        'keypoint_error_mean': float(errors.mean()),
+        'keypoint_error_p95': float(np.percentile(errors, 95)),
+        'detection_mismatch_rate': detection_mismatch / frames if frames else 0.0,
+        'max_rep_diff': max((abs(c['float_reps'] - c['int8_reps']) for c in clip_reports), default=0),
+        'float_ms': float(np.mean(timings['float']) * 1000) if timings['float'] else None,
+        'int8_ms': float(np.mean(timings['int8']) * 1000) if timings['int8'] else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='校正 INT8 姿態模型並檢查與浮點模型的一致性')
+    parser.add_argument('clips', nargs='+', help='錄製的檢測影片')
+    parser.add_argument('--exercise', default='squat', choices=sorted(REP_ANGLE_RULES), help='錄影中的運動類型')
+    parser.add_argument('--model', help='浮點姿態模型（預設使用 MODEL_PATHS 的 pose）')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--samples', type=int, default=300, help='校正影像數量')
+    parser.add_argument('--stride', type=int, default=2, help='評估時每幾幀取一幀')
+    parser.add_argument('--max-keypoint-error', type=float, default=0.03,
+                        help='關鍵點 95 百分位誤差上限（相對人物框對角線）')
+    parser.add_argument('--max-rep-diff', type=int, default=0, help='每段錄影允許的次數差異')
+    parser.add_argument('--max-detection-mismatch', type=float, default=0.02, help='偵測有無不一致的幀比例上限')
+    parser.add_argument('--skip-export', action='store_true', help='使用已匯出的 INT8 模型，只重新評估')
+    args = parser.parse_args()
+
+    pt_path = args.model or os.path.join(Config.BASE_DIR, Config.MODEL_PATHS['pose'])
+    if not os.path.exists(pt_path):
+        pt_path = os.path.join(Config.BASE_DIR, DEFAULT_POSE_MODEL)
+    if not os.path.exists(pt_path):
+        logger.error(f"找不到浮點姿態模型: {pt_path}")
+        return 1
+
+    clips = [clip for clip in args.clips if os.path.exists(clip)]
+    if not clips:
+        logger.error("找不到任何錄影檔")
+        return 1
+
+    int8_path = int8_model_path(pt_path)
+    if not args.skip_export:
+        logger.info(f"以 {len(clips)} 段錄影校正並匯出 INT8 模型...")
+        int8_path = export_int8(pt_path, clips, args.samples, args.imgsz)
+    if not os.path.isdir(int8_path):
+        logger.error(f"找不到 INT8 模型: {int8_path}")
+        return 1
+
+    report = evaluate(pt_path, int8_path, clips, args.exercise, args.imgsz, args.stride)
+    thresholds = {
+        'max_keypoint_error_p95': args.max_keypoint_error,
+        'max_rep_diff': args.max_rep_diff,
+        'max_detection_mismatch_rate': args.max_detection_mismatch,
+    }
+    report.update({
+        'exercise_type': args.exercise,
+        'imgsz': args.imgsz,
+        'thresholds': thresholds,
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'passed': (report['keypoint_error_p95'] <= args.max_keypoint_error
+                   and report['max_rep_diff'] <= args.max_rep_diff
+                   and report['detection_mismatch_rate'] <= args.max_detection_mismatch),
+    })
+
+    with open(os.path.join(int8_path, INT8_REPORT_NAME), 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    logger.info(f"關鍵點誤差 平均 {report['keypoint_error_mean']:.4f} / P95 {report['keypoint_error_p95']:.4f}, "
+                f"次數最大差異 {report['max_rep_diff']}, 偵測不一致 {report['detection_mismatch_rate']:.2%}, "
+                f"浮點 {report['float_ms'] or 0:.1f}ms vs INT8 {report['int8_ms'] or 0:.1f}ms")
+    logger.info(f"{'通過' if report['passed'] else '未通過'}校正門檻，報告已寫入 {int8_path}")
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""將 YOLO 權重匯出為 ONNX / OpenVINO，並與 PyTorch 輸出比對一致性
+
+匯出的模型放在原權重旁（best.pt → best.onnx、best_openvino_model/），
+設定 INFERENCE_BACKEND = 'onnx' / 'openvino' / 'auto' 後由 ModelRegistry 載入。
+
+使用方式:
+    python scripts/export_models.py --formats onnx openvino
+    python scripts/export_models.py --check-only --formats onnx --images samples/
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config  # noqa: E402
+from app.services.model_registry import BACKEND_SUFFIXES, DEFAULT_POSE_MODEL  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# 各格式的匯出參數；dynamic 讓匯出模型支援自適應推論尺寸與批次推論
+EXPORT_OPTIONS = {
+    'onnx': {'dynamic': True, 'simplify': True},
+    'openvino': {'dynamic': True},
+}
+
+
+def find_weights(names=None):
+    """列出 MODEL_PATHS 與專案根目錄中存在的 .pt 權重
+
+    Args:
+        names (list): 只處理這些 MODEL_PATHS 鍵，None 表示全部
+
+    Returns:
+        list: (名稱, 絕對路徑)
+    """
+    weights = []
+    for name, rel_path in Config.MODEL_PATHS.items():
+        if names and name not in names:
+            continue
+        path = os.path.join(Config.BASE_DIR, rel_path)
+        if os.path.exists(path):
+            weights.append((name, path))
+        else:
+            logger.warning(f"模型文件不存在: {path}")
+
+    # 部分服務過去使用專案根目錄的姿態模型
+    root_pose = os.path.join(Config.BASE_DIR, DEFAULT_POSE_MODEL)
+    if (not names or 'pose' in names) and os.path.exists(root_pose):
+        weights.append(('pose-root', root_pose))
+    return weights
+
+
+def load_images(image_dir, limit=20):
+    """載入比對用的影像，未指定目錄時使用 ultralytics 附帶的範例影像"""
+    if image_dir:
+        paths = sorted(glob.glob(os.path.join(image_dir, '*.jpg')) + glob.glob(os.path.join(image_dir, '*.png')))
+    else:
+        from ultralytics.utils import ASSETS
+        paths = sorted(glob.glob(os.path.join(str(ASSETS), '*.jpg')))
+    images = [cv2.imread(path) for path in paths[:limit]]
+    return [image for image in images if image is not None]
+
+
+def _box_iou(a, b):
+    """計算兩組框 (N, 4)、(M, 4) 的 IoU 矩陣"""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(axis=2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(axis=1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def compare_results(reference, candidate):
+    """比對單張影像的兩組推論結果
+
+    Returns:
+        dict: 框數量、最小匹配 IoU、類別不一致數與關鍵點最大偏差（像素）
+    """
+    ref_boxes = reference.boxes.xyxy.cpu().numpy() if reference.boxes is not None else np.zeros((0, 4))
+    cand_boxes = candidate.boxes.xyxy.cpu().numpy() if candidate.boxes is not None else np.zeros((0, 4))
+    diff = {'ref_boxes': len(ref_boxes), 'boxes': len(cand_boxes),
+            'min_iou': 1.0, 'class_mismatch': 0, 'max_keypoint_px': 0.0}
+    if len(ref_boxes) == 0 or len(cand_boxes) == 0:
+        return diff
+
+    iou = _box_iou(ref_boxes, cand_boxes)
+    matches = iou.argmax(axis=1)
+    diff['min_iou'] = float(iou.max(axis=1).min())
+
+    ref_cls = reference.boxes.cls.cpu().numpy()
+    cand_cls = candidate.boxes.cls.cpu().numpy()
+    diff['class_mismatch'] = int((ref_cls != cand_cls[matches]).sum())
+
+    if reference.keypoints is not None and candidate.keypoints is not None:
+        ref_kp = reference.keypoints.xy.cpu().numpy()
+        cand_kp = candidate.keypoints.xy.cpu().numpy()[matches]
+        diff['max_keypoint_px'] = float(np.abs(ref_kp - cand_kp).max()) if ref_kp.size else 0.0
+    return diff
+
+
+def check_parity(pt_path, exported_path, images, imgsz, task, tolerance, min_iou):
+    """比對匯出模型與 PyTorch 權重的輸出與耗時
+
+    Returns:
+        bool: 是否在容許誤差內
+    """
+    from ultralytics import YOLO
+
+    reference_model = YOLO(pt_path, task=task)
+    exported_model = YOLO(exported_path, task=task)
+
+    timings = {'torch': [], 'exported': []}
+    worst = {'min_iou': 1.0, 'class_mismatch': 0, 'max_keypoint_px': 0.0, 'count_mismatch': 0}
+    for index, image in enumerate(images):
+        results = []
+        for label, model in (('torch', reference_model), ('exported', exported_model)):
+            start = time.perf_counter()
+            result = model(image, imgsz=imgsz, verbose=False)[0]
+            # 第一張影像包含初始化成本，不列入耗時
+            if index > 0:
+                timings[label].append(time.perf_counter() - start)
+            results.append(result)
+
+        diff = compare_results(*results)
+        worst['min_iou'] = min(worst['min_iou'], diff['min_iou'])
+        worst['class_mismatch'] += diff['class_mismatch']
+        worst['max_keypoint_px'] = max(worst['max_keypoint_px'], diff['max_keypoint_px'])
+        worst['count_mismatch'] += int(diff['ref_boxes'] != diff['boxes'])
+
+    ok = (worst['min_iou'] >= min_iou and worst['class_mismatch'] == 0
+          and worst['count_mismatch'] == 0 and worst['max_keypoint_px'] <= tolerance)
+
+    torch_ms = np.mean(timings['torch']) * 1000 if timings['torch'] else float('nan')
+    exported_ms = np.mean(timings['exported']) * 1000 if timings['exported'] else float('nan')
+    logger.info(f"{'通過' if ok else '未通過'} {os.path.basename(exported_path)}: "
+                f"最小 IoU {worst['min_iou']:.3f}, 關鍵點最大偏差 {worst['max_keypoint_px']:.2f}px, "
+                f"數量不一致 {worst['count_mismatch']}, 類別不一致 {worst['class_mismatch']}; "
+                f"PyTorch {torch_ms:.1f}ms vs 匯出 {exported_ms:.1f}ms")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='匯出 YOLO 模型並檢查與 PyTorch 輸出的一致性')
+    parser.add_argument('--formats', nargs='+', default=['onnx'], choices=sorted(BACKEND_SUFFIXES))
+    parser.add_argument('--models', nargs='*', help='只處理這些 MODEL_PATHS 鍵（預設全部）')
+    parser.add_argument('--imgsz', type=int, default=640, help='匯出與比對使用的輸入尺寸')
+    parser.add_argument('--images', help='比對用的影像目錄（預設使用 ultralytics 範例影像）')
+    parser.add_argument('--tolerance', type=float, default=2.0, help='關鍵點最大容許偏差（像素）')
+    parser.add_argument('--min-iou', type=float, default=0.9, help='匹配框的最小 IoU')
+    parser.add_argument('--check-only', action='store_true', help='不重新匯出，只比對已存在的匯出模型')
+    parser.add_argument('--skip-check', action='store_true', help='只匯出，不做一致性比對')
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+
+    images = [] if args.skip_check else load_images(args.images)
+    if not args.skip_check and not images:
+        logger.error("找不到比對用的影像")
+        return 1
+
+    failed = []
+    for name, pt_path in find_weights(args.models):
+        task = 'pose' if name.startswith('pose') else None
+        stem = pt_path[:-len('.pt')]
+        for fmt in args.formats:
+            exported_path = stem + BACKEND_SUFFIXES[fmt]
+            if not args.check_only:
+                logger.info(f"匯出 {name} → {fmt}")
+                try:
+                    YOLO(pt_path, task=task).export(format=fmt, imgsz=args.imgsz, **EXPORT_OPTIONS[fmt])
+                except Exception as e:
+                    logger.error(f"匯出 {name} ({fmt}) 失敗: {e}")
+                    failed.append((name, fmt))
+                    continue
+            if not os.path.exists(exported_path):
+                logger.error(f"找不到匯出模型: {exported_path}")
+                failed.append((name, fmt))
+                continue
+            if not args.skip_check and not check_parity(pt_path, exported_path, images, args.imgsz,
+                                                        task, args.tolerance, args.min_iou):
+                failed.append((name, fmt))
+
+    if failed:
+        logger.error(f"未通過: {', '.join(f'{name} ({fmt})' for name, fmt in failed)}")
+        return 1
+    logger.info("全部完成")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
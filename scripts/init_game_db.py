@@ -4,6 +4,7 @@ import sys
 import os
 from app.config import Config  # 引入 Config 類
 from app.database import get_db_connection
+from app.services.stats_rollup import ensure_rollup_table, backfill
 # 添加專案根目錄到Python路徑
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -313,10 +314,36 @@ def ensure_exercise_info_table():
                 cursor.execute("ALTER TABLE exercise_info ADD COLUMN total_count INT NOT NULL DEFAULT 0")
                 logger.info("添加 total_count 列到 exercise_info 表")
         
+        # 儀表板統計的覆蓋索引：依使用者與時間範圍查詢，彙總用到的欄位都在索引中，不必讀取資料列
+        cursor.execute("SHOW INDEX FROM exercise_info WHERE Key_name = 'idx_student_time_type'")
+        if not cursor.fetchall():
+            cursor.execute("""
+            CREATE INDEX idx_student_time_type
+            ON exercise_info (student_id, timestamp, exercise_type, weight, reps, sets)
+            """)
+            logger.info("添加 idx_student_time_type 索引到 exercise_info 表")
+
+        # /api/dashboard_data 依 (timestamp, id) 倒序的 keyset 分頁，InnoDB 二級索引隱含主鍵 id，
+        # 全部紀錄與依學號篩選時都能沿索引讀取一頁。idx_student_time_type 在 timestamp 之後
+        # 還有 exercise_type 等欄位，id 排在最後，依學號篩選時無法依 (timestamp, id) 順序讀取
+        for index_name, index_columns in (('idx_timestamp', 'timestamp'),
+                                          ('idx_student_timestamp', 'student_id, timestamp')):
+            cursor.execute(f"SHOW INDEX FROM exercise_info WHERE Key_name = '{index_name}'")
+            if not cursor.fetchall():
+                cursor.execute(f"CREATE INDEX {index_name} ON exercise_info ({index_columns})")
+                logger.info(f"添加 {index_name} 索引到 exercise_info 表")
+
+        # 分析頁面讀取的每日彙總表，第一次建立時以既有紀錄回填
+        rollup_created = ensure_rollup_table(cursor)
+        
         conn.commit()
         cursor.close()
         conn.close()
         
+        if rollup_created:
+            logger.info("創建 exercise_daily_rollup 表，回填既有運動記錄")
+            backfill()
+        
         return True
         
     except Exception as e:
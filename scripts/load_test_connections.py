@@ -0,0 +1,168 @@
+"""閒置連線擴充測試 - 逐步增加 Socket.IO 連線數，觀察伺服器執行緒數與回應延遲
+
+分別以 run.py（threading）與 serve.py（eventlet/gevent）啟動伺服器後執行，
+比較每增加一批閒置連線時伺服器的作業系統執行緒數與 HTTP 回應延遲。
+
+使用方式:
+    pip install "python-socketio[asyncio_client]"
+    python scripts/load_test_connections.py --url http://127.0.0.1:5000 --steps 100 500 1000 2000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+import urllib.request
+
+import socketio
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = '/exercise'
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def fetch_json(url, timeout=10):
+    """以 HTTP GET 取得 JSON，返回 (內容, 耗時秒數)，失敗時內容為 None"""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            body = json.loads(response.read().decode('utf-8'))
+    except Exception as e:
+        logger.warning(f"請求失敗 {url}: {e}")
+        body = None
+    return body, time.perf_counter() - start
+
+
+async def open_client(url, transports, timeout):
+    """建立一個閒置的 Socket.IO 連線，返回 (客戶端, 連線耗時)，失敗時客戶端為 None"""
+    client = socketio.AsyncClient(reconnection=False)
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(client.connect(url, namespaces=[NAMESPACE], transports=transports), timeout)
+    except Exception:
+        return None, time.perf_counter() - start
+    return client, time.perf_counter() - start
+
+
+async def probe_http(url, samples):
+    """在連線保持期間量測 HTTP 回應延遲與伺服器執行緒數"""
+    loop = asyncio.get_running_loop()
+    latencies = []
+    for _ in range(samples):
+        _, elapsed = await loop.run_in_executor(None, fetch_json, f"{url}/api/ready")
+        latencies.append(elapsed)
+    nodes, _ = await loop.run_in_executor(None, fetch_json, f"{url}/api/nodes")
+    runtime = (nodes or {}).get('runtime', {})
+    return latencies, runtime
+
+
+async def run_load_test(url, steps, batch, transports, timeout, samples, hold):
+    """逐步增加閒置連線並記錄每一步的結果
+
+    Args:
+        url (str): 伺服器網址
+        steps (list): 每一步要達到的累計連線數
+        batch (int): 同時建立的連線數
+        transports (list): Socket.IO 傳輸方式
+        timeout (float): 單一連線的逾時秒數
+        samples (int): 每一步量測 HTTP 延遲的次數
+        hold (float): 每一步達到連線數後等待的秒數
+
+    Returns:
+        list: 每一步的統計
+    """
+    clients = []
+    results = []
+    failed = 0
+
+    for target in steps:
+        connect_times = []
+        while len(clients) + failed < target:
+            count = min(batch, target - len(clients) - failed)
+            opened = await asyncio.gather(*(open_client(url, transports, timeout) for _ in range(count)))
+            for client, elapsed in opened:
+                connect_times.append(elapsed)
+                if client is None:
+                    failed += 1
+                else:
+                    clients.append(client)
+
+        await asyncio.sleep(hold)
+        connected = sum(1 for client in clients if client.connected)
+        latencies, runtime = await probe_http(url, samples)
+
+        result = {
+            'target': target,
+            'connected': connected,
+            'failed': failed,
+            'connect_p50_ms': (percentile(connect_times, 50) or 0) * 1000.0,
+            'connect_p95_ms': (percentile(connect_times, 95) or 0) * 1000.0,
+            'http_p50_ms': statistics.median(latencies) * 1000.0 if latencies else None,
+            'http_max_ms': max(latencies) * 1000.0 if latencies else None,
+            'async_mode': runtime.get('async_mode'),
+            'os_threads': runtime.get('os_threads'),
+        }
+        results.append(result)
+        logger.info(f"{target} 個連線: 成功 {connected}, 失敗 {failed}, 伺服器執行緒 {result['os_threads']}, "
+                    f"HTTP p50 {result['http_p50_ms']:.1f}ms")
+
+    await asyncio.gather(*(client.disconnect() for client in clients), return_exceptions=True)
+    return results
+
+
+def print_report(results):
+    header = f"{'連線數':>8} {'成功':>8} {'失敗':>6} {'連線p50':>9} {'連線p95':>9} {'HTTP p50':>9} {'HTTP max':>9} {'執行緒':>7}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        http_p50 = f"{r['http_p50_ms']:.1f}" if r['http_p50_ms'] is not None else '-'
+        http_max = f"{r['http_max_ms']:.1f}" if r['http_max_ms'] is not None else '-'
+        print(f"{r['target']:>8} {r['connected']:>8} {r['failed']:>6} {r['connect_p50_ms']:>9.1f} "
+              f"{r['connect_p95_ms']:>9.1f} {http_p50:>9} {http_max:>9} {str(r['os_threads']):>7}")
+    if results:
+        print(f"\n伺服器模式: {results[-1]['async_mode']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='閒置連線擴充測試')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='伺服器網址')
+    parser.add_argument('--steps', type=int, nargs='+', default=[100, 250, 500, 1000],
+                        help='每一步的累計連線數')
+    parser.add_argument('--batch', type=int, default=50, help='同時建立的連線數')
+    parser.add_argument('--transport', choices=['websocket', 'polling'], default='websocket')
+    parser.add_argument('--timeout', type=float, default=10.0, help='單一連線的逾時秒數')
+    parser.add_argument('--samples', type=int, default=20, help='每一步量測 HTTP 延遲的次數')
+    parser.add_argument('--hold', type=float, default=2.0, help='每一步達到連線數後等待的秒數')
+    parser.add_argument('--json', dest='json_path', help='將結果寫入 JSON 檔')
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load_test(args.url.rstrip('/'), sorted(args.steps), args.batch,
+                                        [args.transport], args.timeout, args.samples, args.hold))
+    print_report(results)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        logger.info(f"結果已寫入 {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""以錄影檔模擬瀏覽器上傳影像，無需攝影機即可測試完整檢測管線
+
+使用方式:
+    python scripts/replay_clip.py clip.mp4 --exercise squat --url http://127.0.0.1:5000
+"""
+import argparse
+import logging
+import sys
+import threading
+import time
+
+import cv2
+import socketio
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = '/exercise'
+
+
+def replay_clip(path, url, exercise_type, stream_mode='keypoints', fps=None, quality=70, loop=False):
+    """將錄影檔逐幀以 client_frame 事件送到伺服器
+
+    Args:
+        path (str): 錄影檔路徑
+        url (str): 伺服器網址
+        exercise_type (str): 運動類型
+        stream_mode (str): 'keypoints' 或 'video'
+        fps (float): 上傳幀率，預設使用錄影檔本身的幀率
+        quality (int): JPEG 壓縮品質
+        loop (bool): 播放完畢後是否重頭播放
+
+    Returns:
+        dict: 上傳與回應統計
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        logger.error(f"無法開啟錄影檔: {path}")
+        return None
+
+    fps = fps or cap.get(cv2.CAP_PROP_FPS) or 30
+    interval = 1.0 / fps
+
+    stats = {'sent': 0, 'accepted': 0, 'received': {}, 'last_count': 0}
+    started = threading.Event()
+    sio = socketio.Client()
+
+    def count_event(event):
+        def handler(data=None):
+            stats['received'][event] = stats['received'].get(event, 0) + 1
+            if event == 'exercise_count' and isinstance(data, dict):
+                stats['last_count'] = data.get('count', stats['last_count'])
+        sio.on(event, handler, namespace=NAMESPACE)
+
+    for event in ('video_frame', 'pose_frame', 'exercise_count', 'pose_quality', 'angle_data'):
+        count_event(event)
+
+    @sio.on('start_detection_response', namespace=NAMESPACE)
+    def on_start(data):
+        if data.get('status') == 'success':
+            started.set()
+        else:
+            logger.error(f"啟動檢測失敗: {data}")
+
+    sio.connect(url, namespaces=[NAMESPACE])
+    sio.emit('start_detection', {
+        'exercise_type': exercise_type,
+        'frame_source': 'client',
+        'stream_mode': stream_mode,
+        'frame_transport': 'binary',
+    }, namespace=NAMESPACE)
+
+    if not started.wait(timeout=30):
+        logger.error("等待啟動檢測回應逾時")
+        sio.disconnect()
+        return None
+
+    seq = 0
+    start_time = time.time()
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                if loop:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                break
+
+            frame_start = time.time()
+            _, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+            seq += 1
+            # 與瀏覽器上傳器相同：等待確認後才送下一幀
+            ack = sio.call('client_frame', {'frame': buffer.tobytes(), 'seq': seq, 'ts': time.time() * 1000},
+                           namespace=NAMESPACE, timeout=5)
+            stats['sent'] += 1
+            if ack and ack.get('accepted'):
+                stats['accepted'] += 1
+
+            time.sleep(max(0.0, interval - (time.time() - frame_start)))
+    except KeyboardInterrupt:
+        logger.info("已中斷播放")
+    finally:
+        elapsed = time.time() - start_time
+        sio.emit('stop_detection', {}, namespace=NAMESPACE)
+        time.sleep(0.5)
+        sio.disconnect()
+        cap.release()
+
+    stats['elapsed'] = elapsed
+    stats['upload_fps'] = stats['sent'] / elapsed if elapsed > 0 else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='以錄影檔測試客戶端上傳影像的檢測管線')
+    parser.add_argument('clip', help='錄影檔路徑')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='伺服器網址')
+    parser.add_argument('--exercise', default='squat', help='運動類型')
+    parser.add_argument('--stream-mode', default='keypoints', choices=['keypoints', 'video'])
+    parser.add_argument('--fps', type=float, default=None, help='上傳幀率，預設使用錄影檔幀率')
+    parser.add_argument('--quality', type=int, default=70, help='JPEG 壓縮品質')
+    parser.add_argument('--loop', action='store_true', help='重複播放')
+    args = parser.parse_args()
+
+    stats = replay_clip(args.clip, args.url, args.exercise, args.stream_mode,
+                        args.fps, args.quality, args.loop)
+    if stats is None:
+        sys.exit(1)
+
+    logger.info(f"上傳 {stats['sent']} 幀（接受 {stats['accepted']}），"
+                f"{stats['upload_fps']:.1f} fps，最終計數 {stats['last_count']}")
+    for event, count in sorted(stats['received'].items()):
+        logger.info(f"  收到 {event}: {count}")
+
+
+if __name__ == '__main__':
+    main()
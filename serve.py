@@ -0,0 +1,69 @@
+"""正式環境入口 - 以 eventlet/gevent 協程處理連線
+
+run.py 使用 Werkzeug 開發伺服器與 threading 模式，每個連線都佔用一個作業系統
+執行緒；本入口改用協程，大量閒置的儀表板與 Socket.IO 連線只佔用少量記憶體，
+模型推論、影像編解碼等阻塞操作則交給作業系統執行緒池（見 app/utils/async_runtime.py）。
+
+使用方式:
+    pip install eventlet            # 或 pip install gevent gevent-websocket
+    python serve.py --worker eventlet --host 0.0.0.0 --port 5000
+"""
+import argparse
+import os
+import sys
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='以協程伺服器啟動應用')
+    parser.add_argument('--worker', choices=['eventlet', 'gevent'],
+                        default=os.environ.get('SOCKETIO_ASYNC_MODE', 'eventlet'),
+                        help='協程函式庫（預設 eventlet）')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)))
+    parser.add_argument('--config', choices=['production', 'development'], default='production',
+                        help='使用的設定類別')
+    parser.add_argument('--offload-threads', type=int, default=None,
+                        help='執行阻塞操作的作業系統執行緒數（預設依 OFFLOAD_THREADS）')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    # 必須在匯入應用（及 threading、socket 等模組）之前替換標準函式庫
+    os.environ['SOCKETIO_ASYNC_MODE'] = args.worker
+    if args.offload_threads:
+        os.environ['OFFLOAD_THREADS'] = str(args.offload_threads)
+    # （匯入 app 套件會連帶匯入 Flask，因此直接在這裡替換）
+    if args.worker == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    else:
+        from gevent import monkey
+        monkey.patch_all()
+
+    import logging
+    import traceback
+
+    from app.utils.logging_config import configure_logging
+    configure_logging()
+    logger = logging.getLogger(__name__)
+
+    from app import create_app, socketio
+    from app.utils.async_runtime import configure_offload_threads
+
+    try:
+        configure_offload_threads()
+        app = create_app(args.config)
+        app.static_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+        app.static_url_path = '/static'
+
+        from app.utils.db_init import init_game_database
+        init_game_database()
+
+        logger.info(f"啟動服務器 ({args.worker}) - http://{args.host}:{args.port}")
+        socketio.run(app, host=args.host, port=args.port, debug=False, use_reloader=False)
+    except Exception as e:
+        logger.error(f"應用啟動失敗: {str(e)}")
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,148 @@
+/**
+ * 客戶端影像上傳器
+ * 擷取本地攝影機畫面，壓縮為 JPEG/WebP 後以 client_frame 事件上傳，
+ * 讓伺服器不需連接實體攝影機即可進行檢測
+ */
+class ClientFrameUploader {
+    /**
+     * @param {Object} socket Socket.IO 連線（/exercise 命名空間）
+     * @param {Object} options 上傳設定
+     * @param {number} options.maxFps 最高上傳幀率
+     * @param {number} options.size 上傳影像的邊長（像素）
+     * @param {number} options.quality 壓縮品質 0~1
+     * @param {string} options.mimeType 'image/jpeg' 或 'image/webp'
+     */
+    constructor(socket, options = {}) {
+        this.socket = socket;
+        this.maxFps = options.maxFps || 15;
+        this.size = options.size || 720;
+        this.quality = options.quality || 0.7;
+        this.mimeType = options.mimeType || 'image/jpeg';
+
+        this.video = null;
+        this.ownsVideo = false;
+        this.stream = null;
+        this.canvas = document.createElement('canvas');
+        this.canvas.width = this.size;
+        this.canvas.height = this.size;
+        this.ctx = this.canvas.getContext('2d');
+
+        this.running = false;
+        this.inFlight = false;
+        this.inFlightSince = 0;
+        this.ackTimeout = options.ackTimeout || 2000;  // 超過此時間未確認視為遺失
+        this.seq = 0;
+        this.timer = null;
+        this.sentCount = 0;
+        this.rejectedCount = 0;
+    }
+
+    /**
+     * 開始上傳
+     * @param {HTMLVideoElement} video 已在播放本地攝影機的影像元素，未提供時自行開啟攝影機
+     */
+    async start(video = null) {
+        if (this.running) return true;
+
+        if (video) {
+            this.video = video;
+            this.ownsVideo = false;
+        } else {
+            if (!navigator.mediaDevices || !navigator.mediaDevices.getUserMedia) {
+                console.error('ClientFrameUploader: 瀏覽器不支援 getUserMedia');
+                return false;
+            }
+            try {
+                this.stream = await navigator.mediaDevices.getUserMedia({
+                    video: { width: { ideal: 1280 }, height: { ideal: 720 } },
+                    audio: false
+                });
+            } catch (e) {
+                console.error('ClientFrameUploader: 無法開啟本地攝影機:', e);
+                return false;
+            }
+            this.video = document.createElement('video');
+            this.video.muted = true;
+            this.video.playsInline = true;
+            this.video.srcObject = this.stream;
+            await this.video.play();
+            this.ownsVideo = true;
+        }
+
+        this.running = true;
+        this.inFlight = false;
+        this.seq = 0;
+        this.scheduleNext(0);
+        return true;
+    }
+
+    /**
+     * 停止上傳並釋放自行開啟的攝影機
+     */
+    stop() {
+        this.running = false;
+        if (this.timer) {
+            clearTimeout(this.timer);
+            this.timer = null;
+        }
+        if (this.ownsVideo) {
+            if (this.stream) {
+                this.stream.getTracks().forEach(track => track.stop());
+                this.stream = null;
+            }
+            this.video.srcObject = null;
+        }
+        this.video = null;
+    }
+
+    scheduleNext(delay) {
+        if (!this.running) return;
+        this.timer = setTimeout(() => this.captureAndSend(), delay);
+    }
+
+    /**
+     * 擷取一幀並上傳；上一幀尚未確認時不送出新幀，避免伺服器端累積延遲
+     */
+    captureAndSend() {
+        if (!this.running) return;
+        const interval = 1000 / this.maxFps;
+
+        if (this.inFlight && performance.now() - this.inFlightSince > this.ackTimeout) {
+            this.inFlight = false;
+        }
+        if (this.inFlight || !this.video || this.video.readyState < 2 || !this.socket || !this.socket.connected) {
+            this.scheduleNext(interval);
+            return;
+        }
+
+        const startTime = performance.now();
+        this.ctx.drawImage(this.video, 0, 0, this.size, this.size);
+        this.canvas.toBlob(blob => {
+            if (!blob || !this.running) {
+                this.scheduleNext(interval);
+                return;
+            }
+            blob.arrayBuffer().then(buffer => {
+                this.inFlight = true;
+                this.inFlightSince = performance.now();
+                this.seq += 1;
+                this.socket.emit('client_frame', { frame: buffer, seq: this.seq, ts: Date.now() }, ack => {
+                    this.inFlight = false;
+                    this.sentCount += 1;
+                    if (!ack || !ack.accepted) {
+                        this.rejectedCount += 1;
+                    }
+                });
+                const elapsed = performance.now() - startTime;
+                this.scheduleNext(Math.max(0, interval - elapsed));
+            });
+        }, this.mimeType, this.quality);
+    }
+}
+
+// 導出類
+if (typeof module !== 'undefined' && module.exports) {
+    module.exports = ClientFrameUploader;
+} else {
+    window.ClientFrameUploader = ClientFrameUploader;
+}
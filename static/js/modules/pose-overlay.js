@@ -0,0 +1,193 @@
+/**
+ * 關鍵點串流骨架疊加層
+ * 關鍵點串流模式下後端只傳送 pose_frame 姿態資料，
+ * 由此模組顯示本地攝影機影像並在其上繪製骨架、檢測線與計數
+ */
+class PoseOverlay {
+    /**
+     * @param {HTMLElement} feedElement 原本顯示後端影像的 <img> 元素
+     */
+    constructor(feedElement) {
+        this.feedElement = feedElement;
+        this.video = null;
+        this.canvas = null;
+        this.ctx = null;
+        this.stream = null;
+        this.lastSeq = -1;
+
+        // COCO 17 點骨架連線
+        this.skeleton = [
+            [5, 7], [7, 9], [6, 8], [8, 10],        // 手臂
+            [5, 6], [5, 11], [6, 12], [11, 12],     // 軀幹
+            [11, 13], [13, 15], [12, 14], [14, 16], // 腿部
+            [0, 1], [0, 2], [1, 3], [2, 4]          // 頭部
+        ];
+        this.minConfidence = 0.3;
+
+        this.init();
+    }
+
+    /**
+     * 在影像元素位置建立本地影像與繪圖畫布
+     */
+    init() {
+        if (!this.feedElement || !this.feedElement.parentElement) {
+            console.error('PoseOverlay: 找不到影像元素');
+            return;
+        }
+
+        this.video = document.createElement('video');
+        this.video.id = 'pose-overlay-video';
+        this.video.autoplay = true;
+        this.video.muted = true;
+        this.video.playsInline = true;
+        this.video.className = this.feedElement.className;
+        // 後端將畫面拉伸為正方形後正規化座標，影像需填滿容器才能與骨架對齊
+        this.video.style.cssText = 'width: 100%; height: 100%; object-fit: fill; display: none;';
+
+        this.canvas = document.createElement('canvas');
+        this.canvas.id = 'pose-overlay-canvas';
+        this.canvas.style.cssText = 'position: absolute; top: 0; left: 0; width: 100%; height: 100%; pointer-events: none; display: none;';
+        this.ctx = this.canvas.getContext('2d');
+
+        const parent = this.feedElement.parentElement;
+        if (getComputedStyle(parent).position === 'static') {
+            parent.style.position = 'relative';
+        }
+        parent.insertBefore(this.video, this.feedElement);
+        parent.insertBefore(this.canvas, this.feedElement.nextSibling);
+    }
+
+    /**
+     * 開啟本地攝影機並切換為疊加顯示
+     */
+    async start() {
+        if (!this.video) return false;
+        if (!navigator.mediaDevices || !navigator.mediaDevices.getUserMedia) {
+            console.error('PoseOverlay: 瀏覽器不支援 getUserMedia');
+            return false;
+        }
+
+        try {
+            if (!this.stream) {
+                this.stream = await navigator.mediaDevices.getUserMedia({
+                    video: { width: { ideal: 1280 }, height: { ideal: 720 } },
+                    audio: false
+                });
+            }
+            this.video.srcObject = this.stream;
+            this.feedElement.style.display = 'none';
+            this.video.style.display = '';
+            this.canvas.style.display = '';
+            this.lastSeq = -1;
+            return true;
+        } catch (e) {
+            console.error('PoseOverlay: 無法開啟本地攝影機:', e);
+            return false;
+        }
+    }
+
+    /**
+     * 關閉本地攝影機並還原原本的影像元素
+     */
+    stop() {
+        if (this.stream) {
+            this.stream.getTracks().forEach(track => track.stop());
+            this.stream = null;
+        }
+        if (this.video) {
+            this.video.srcObject = null;
+            this.video.style.display = 'none';
+        }
+        if (this.canvas) {
+            this.ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
+            this.canvas.style.display = 'none';
+        }
+        if (this.feedElement) {
+            this.feedElement.style.display = '';
+        }
+    }
+
+    /**
+     * 畫布尺寸與顯示尺寸同步
+     */
+    resizeCanvas() {
+        const width = this.canvas.clientWidth;
+        const height = this.canvas.clientHeight;
+        if (this.canvas.width !== width || this.canvas.height !== height) {
+            this.canvas.width = width;
+            this.canvas.height = height;
+        }
+    }
+
+    /**
+     * 繪製一幀 pose_frame 姿態資料
+     * @param {Object} payload 後端傳送的姿態資料，座標已正規化為 0~1
+     */
+    draw(payload) {
+        if (!this.ctx || !payload) return;
+        // 忽略亂序抵達的舊幀
+        if (payload.seq !== null && payload.seq !== undefined) {
+            if (payload.seq <= this.lastSeq) return;
+            this.lastSeq = payload.seq;
+        }
+
+        this.resizeCanvas();
+        const ctx = this.ctx;
+        const width = this.canvas.width;
+        const height = this.canvas.height;
+        ctx.clearRect(0, 0, width, height);
+
+        // 本地影像與後端處理前的畫面方向一致時才需要鏡像
+        this.video.style.transform = payload.mirrored ? 'scaleX(-1)' : '';
+
+        if (payload.detection_line_y !== null && payload.detection_line_y !== undefined) {
+            const y = payload.detection_line_y * height;
+            ctx.strokeStyle = 'rgb(255, 0, 0)';
+            ctx.lineWidth = 2;
+            ctx.beginPath();
+            ctx.moveTo(0, y);
+            ctx.lineTo(width, y);
+            ctx.stroke();
+        }
+
+        const keypoints = payload.keypoints;
+        if (keypoints && keypoints.length >= 17) {
+            const visible = point => point && (point.length < 3 || point[2] >= this.minConfidence)
+                && (point[0] > 0 || point[1] > 0);
+            const toCanvas = point => [point[0] * width, point[1] * height];
+
+            ctx.strokeStyle = 'rgb(0, 255, 0)';
+            ctx.lineWidth = 3;
+            this.skeleton.forEach(([a, b]) => {
+                if (!visible(keypoints[a]) || !visible(keypoints[b])) return;
+                const [x1, y1] = toCanvas(keypoints[a]);
+                const [x2, y2] = toCanvas(keypoints[b]);
+                ctx.beginPath();
+                ctx.moveTo(x1, y1);
+                ctx.lineTo(x2, y2);
+                ctx.stroke();
+            });
+
+            ctx.fillStyle = 'rgb(255, 255, 0)';
+            keypoints.forEach(point => {
+                if (!visible(point)) return;
+                const [x, y] = toCanvas(point);
+                ctx.beginPath();
+                ctx.arc(x, y, 4, 0, Math.PI * 2);
+                ctx.fill();
+            });
+        }
+
+        ctx.fillStyle = 'rgb(0, 255, 0)';
+        ctx.font = 'bold 24px sans-serif';
+        ctx.fillText(`Count: ${payload.count || 0}`, 10, height - 12);
+    }
+}
+
+// 導出類
+if (typeof module !== 'undefined' && module.exports) {
+    module.exports = PoseOverlay;
+} else {
+    window.PoseOverlay = PoseOverlay;
+}
@@ -131,7 +131,9 @@ class SocketManager {
         this.socket.on('video_frame', (data) => {
             if (data && data.frame) {
                 try {
-                    if (typeof data.frame === 'string' && data.frame.length > 100) {
+                    // 影像可能是二進位 JPEG（ArrayBuffer）或舊版的 base64 字串
+                    const frameLength = typeof data.frame === 'string' ? data.frame.length : data.frame.byteLength;
+                    if (frameLength > 100) {
                         if (!this.videoFrameReceived) {
                             this.videoFrameReceived = true;
                         }
@@ -140,7 +142,7 @@ class SocketManager {
                             this.callbacks.onVideoFrame(data.frame);
                         }
                     } else {
-                        console.warn('收到的 base64 數據可能無效');
+                        console.warn('收到的影像數據可能無效');
                     }
                 } catch (e) {
                     console.error('處理視頻幀時出錯:', e);
@@ -302,6 +304,9 @@ class SocketManager {
             return false;
         }
         
+        // 要求後端以二進位 JPEG 傳送影像幀
+        requestData = Object.assign({ frame_transport: 'binary' }, requestData);
+        
         console.log('發送開始檢測請求:', requestData);
         this.socket.emit('start_detection', requestData);
         
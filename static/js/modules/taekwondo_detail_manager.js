@@ -475,7 +475,8 @@ class TaekwondoDetailManager {
         const requestData = {
             exercise_type: 'taekwondo-detail',
             camera_index: this.selectedCameraIndex,
-            auto_start_recording: false  // 先不開始錄製，等攝像頭就緒
+            auto_start_recording: false,  // 先不開始錄製，等攝像頭就緒
+            frame_transport: 'binary'  // 以二進位 JPEG 接收影像幀
         };
         
         this.socket.emit('start_detection', requestData);
@@ -552,6 +553,15 @@ class TaekwondoDetailManager {
         const canvas = document.getElementById('video-canvas');
         if (canvas && frameData) {
             const ctx = canvas.getContext('2d');
+            // 新版後端傳送二進位 JPEG，直接解碼成點陣圖；舊版為 base64 字串
+            if (typeof frameData !== 'string' && window.createImageBitmap) {
+                createImageBitmap(new Blob([frameData], { type: 'image/jpeg' })).then((bitmap) => {
+                    ctx.clearRect(0, 0, canvas.width, canvas.height);
+                    ctx.drawImage(bitmap, 0, 0, canvas.width, canvas.height);
+                    bitmap.close();
+                }).catch((e) => console.error('解碼影像幀失敗:', e));
+                return;
+            }
             const img = new Image();
             img.onload = function() {
                 ctx.clearRect(0, 0, canvas.width, canvas.height);
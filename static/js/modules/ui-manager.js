@@ -164,11 +164,22 @@ class UIManager {
 
     /**
      * 更新視頻幀
+     * @param {ArrayBuffer|string} frame - 二進位 JPEG 或舊版 base64 字串
      */
-    updateVideoFrame(base64Frame) {
-        if (this.elements.videoElement) {
-            this.elements.videoElement.src = 'data:image/jpeg;base64,' + base64Frame;
+    updateVideoFrame(frame) {
+        if (!this.elements.videoElement) {
+            return;
+        }
+        if (typeof frame === 'string') {
+            this.elements.videoElement.src = 'data:image/jpeg;base64,' + frame;
+            return;
+        }
+        const url = URL.createObjectURL(new Blob([frame], { type: 'image/jpeg' }));
+        if (this.lastVideoFrameUrl) {
+            URL.revokeObjectURL(this.lastVideoFrameUrl);
         }
+        this.lastVideoFrameUrl = url;
+        this.elements.videoElement.src = url;
     }
 
     /**
@@ -1,4 +1,168 @@
 
+// 上一個二進位影像幀的 Blob 網址，收到新幀後釋放
+let lastVideoFrameUrl = null;
+
+/**
+ * 將 video_frame 事件中的影像轉成 <img> 可用的網址
+ * 新版後端傳送二進位 JPEG（ArrayBuffer），舊版後端傳送 base64 字串
+ */
+function videoFrameToSrc(frame) {
+    if (typeof frame === 'string') {
+        return 'data:image/jpeg;base64,' + frame;
+    }
+    const url = URL.createObjectURL(new Blob([frame], { type: 'image/jpeg' }));
+    if (lastVideoFrameUrl) {
+        URL.revokeObjectURL(lastVideoFrameUrl);
+    }
+    lastVideoFrameUrl = url;
+    return url;
+}
+
+/**
+ * 檢查影像幀資料是否有效
+ */
+function isValidVideoFrame(frame) {
+    if (typeof frame === 'string') {
+        return frame.length > 100;
+    }
+    return !!frame && frame.byteLength > 100;
+}
+
+// 串流模式：網址帶 ?stream=keypoints 時只接收關鍵點資料，由本地影像疊加骨架
+const streamMode = new URLSearchParams(window.location.search).get('stream') === 'keypoints' ? 'keypoints' : 'video';
+let poseOverlay = null;
+// 影像來源：網址帶 ?source=client 時由瀏覽器上傳攝影機畫面，伺服器不開啟本地攝影機
+const frameSource = new URLSearchParams(window.location.search).get('source') === 'client' ? 'client' : 'camera';
+let clientFrameUploader = null;
+// 連線意外中斷時為 true，重新連線後以相同的 session_key 接續檢測
+let resumeDetectionOnReconnect = false;
+
+/**
+ * 取得骨架疊加層（僅關鍵點串流模式使用）
+ */
+function getPoseOverlay() {
+    if (!poseOverlay && typeof PoseOverlay !== 'undefined') {
+        poseOverlay = new PoseOverlay(document.getElementById('video-feed'));
+    }
+    return poseOverlay;
+}
+
+/**
+ * 開啟檢測所需的本地攝影機畫面（骨架疊加與影像上傳共用同一個影像來源）
+ */
+async function startLocalMedia() {
+    let video = null;
+    if (streamMode === 'keypoints' && getPoseOverlay()) {
+        if (await poseOverlay.start()) {
+            video = poseOverlay.video;
+        }
+    }
+    if (frameSource === 'client' && socket && typeof ClientFrameUploader !== 'undefined') {
+        if (!clientFrameUploader || clientFrameUploader.socket !== socket) {
+            clientFrameUploader = new ClientFrameUploader(socket);
+        }
+        await clientFrameUploader.start(video);
+    }
+}
+
+/**
+ * 關閉本地攝影機畫面
+ */
+function stopLocalMedia() {
+    if (clientFrameUploader) {
+        clientFrameUploader.stop();
+    }
+    if (poseOverlay) {
+        poseOverlay.stop();
+    }
+}
+
+/**
+ * 處理 pose_frame 事件
+ */
+function handlePoseFrame(data) {
+    const overlay = getPoseOverlay();
+    if (overlay && isDetecting) {
+        overlay.draw(data);
+    }
+}
+
+/**
+ * 取得檢測會話識別
+ *
+ * 保存在 sessionStorage 中，重新連線（包括被導向其他節點）後仍使用同一個識別，
+ * 讓伺服器把會話交給持有其計數狀態的節點
+ */
+function getDetectionSessionKey() {
+    let key = null;
+    try {
+        key = sessionStorage.getItem('detection_session_key');
+        if (!key) {
+            key = Date.now().toString(36) + Math.random().toString(36).slice(2, 10);
+            sessionStorage.setItem('detection_session_key', key);
+        }
+    } catch (e) {
+        console.warn('無法使用 sessionStorage，檢測會話不會固定在同一節點:', e);
+    }
+    return key;
+}
+
+/**
+ * 處理 redirect_node 事件 - 伺服器要求改連到持有此會話或仍有空位的節點
+ */
+function handleRedirectNode(data) {
+    if (!data || !data.url) {
+        return;
+    }
+    console.log(`[redirect_node] 檢測會話改由節點 ${data.node_id} 處理: ${data.url}`);
+    isDetecting = false;
+    showNotification('正在切換到其他伺服器，請重新開始檢測', 'info');
+    const base = data.url.replace(/\/+$/, '');
+    window.location.href = base + window.location.pathname + window.location.search;
+}
+
+/**
+ * 處理檢測中的連線中斷
+ *
+ * 非主動斷線時伺服器會在寬限期內保留計數與追蹤狀態，重新連線後以相同的
+ * session_key 開始檢測即可接續；主動斷線時照常停止檢測
+ */
+function handleDetectionDisconnect(reason) {
+    if (!isDetecting) {
+        return;
+    }
+    if (reason === 'io client disconnect') {
+        stopDetection();
+        showErrorMessage('與伺服器的連接已斷開，檢測已停止');
+        return;
+    }
+    resumeDetectionOnReconnect = true;
+    isDetecting = false;
+    showNotification('與伺服器的連接已斷開，重新連線後將接續檢測', 'info');
+}
+
+/**
+ * 重新連線後接續中斷前的檢測
+ */
+function resumeDetectionAfterReconnect() {
+    if (!resumeDetectionOnReconnect) {
+        return;
+    }
+    resumeDetectionOnReconnect = false;
+    console.log('[reconnect] 重新連線，接續中斷前的檢測');
+    startDetection();
+}
+
+/**
+ * 重新連線失敗時放棄接續
+ */
+function handleReconnectFailed() {
+    if (resumeDetectionOnReconnect) {
+        resumeDetectionOnReconnect = false;
+        showErrorMessage('無法重新連接伺服器，檢測已停止');
+    }
+}
+
 function setupSocketListeners() {
     if (!socket) {
         console.warn('Socket未初始化，跳過事件監聽設置');
@@ -1264,11 +1428,18 @@ function startDetection() {
         level: currentLevel,
         save_to_db: true,
         camera_index: cameraIndex,
-        workout_plan_index: currentExerciseIndex
+        workout_plan_index: currentExerciseIndex,
+        frame_transport: 'binary',  // 以二進位 JPEG 接收影像幀
+        stream_mode: streamMode,
+        frame_source: frameSource,
+        session_key: getDetectionSessionKey()
     };
     
     console.log('發送到後端的請求數據:', requestData);
     
+    // 關鍵點串流或客戶端上傳模式改用本地攝影機畫面
+    startLocalMedia();
+    
     // 發送開始檢測請求到後端
     socket.emit('start_detection', requestData);
     console.log(`已發送開始檢測請求，運動類型: ${exerciseType} 關卡: ${currentLevel}`);
@@ -1291,6 +1462,8 @@ function stopDetection() {
 
     isDetecting = false;
     console.log('[stopDetection] isDetecting set to false.');
+    
+    stopLocalMedia();
 
     // 確保socket連接存在且正常
     if (!socket) {
@@ -2769,6 +2942,7 @@ function bindSocketEvents() {
     socket.off('connect_error');
     socket.off('disconnect');
     socket.off('video_frame');
+    socket.off('pose_frame');
     socket.off('exercise_count');
     socket.off('pose_quality');
     socket.off('quality_score');
@@ -2793,7 +2967,11 @@ function bindSocketEvents() {
             detectionStatus.classList.remove('inactive');
             detectionStatus.classList.add('active');
         }
+        
+        resumeDetectionAfterReconnect();
     });
+    socket.io.off('reconnect_failed', handleReconnectFailed);
+    socket.io.on('reconnect_failed', handleReconnectFailed);
     
     // 連接錯誤事件
     socket.on('connect_error', function(error) {
@@ -2821,21 +2999,17 @@ function bindSocketEvents() {
         }
         
         // 如果正在檢測，則停止檢測
-        if (isDetecting) {
-            stopDetection();
-            showErrorMessage('與伺服器的連接已斷開，檢測已停止');
-        }
+        handleDetectionDisconnect(reason);
     });
     
     // 視頻幀更新事件
     socket.on('video_frame', function(data) {
         if (videoFeed) {
             if (data && data.frame) {
-                // 確保 frame 是有效的 base64 字符串
+                // 確保 frame 是有效的影像資料（二進位 JPEG 或 base64 字符串）
                 try {
-                    // 檢查 base64 字符串是否有效
-                    if (typeof data.frame === 'string' && data.frame.length > 100) {
-                        videoFeed.src = 'data:image/jpeg;base64,' + data.frame;
+                    if (isValidVideoFrame(data.frame)) {
+                        videoFeed.src = videoFrameToSrc(data.frame);
                         if (!socket.videoFrameReceived) {
                             socket.videoFrameReceived = true;
                             setTimeout(adjustVideoDisplay, 100); // 延迟一点时间确保图像已加载
@@ -2850,6 +3024,10 @@ function bindSocketEvents() {
         }
     });
     
+    // 關鍵點串流模式的姿態資料
+    socket.on('pose_frame', handlePoseFrame);
+    socket.on('redirect_node', handleRedirectNode);
+    
     // 運動計數更新事件
     socket.on('exercise_count', function(data) {
         // 只有在檢測中才處理計數更新
@@ -4121,6 +4299,7 @@ function initSocketConnection() {
         socket.off('connect_error');
         socket.off('disconnect');
         socket.off('video_frame');
+        socket.off('pose_frame');
         socket.off('exercise_count');
         socket.off('pose_quality');
         socket.off('quality_score');
@@ -4149,7 +4328,11 @@ function initSocketConnection() {
                 detectionStatus.classList.remove('inactive');
                 detectionStatus.classList.add('active');
             }
+            
+            resumeDetectionAfterReconnect();
         });
+        socket.io.off('reconnect_failed', handleReconnectFailed);
+        socket.io.on('reconnect_failed', handleReconnectFailed);
         
         socket.on('connect_error', function(error) {
             console.error('Socket.io 連接錯誤:', error);
@@ -4176,21 +4359,17 @@ function initSocketConnection() {
                 detectionStatus.classList.add('inactive');
             }
             
-            if (isDetecting) {
-                stopDetection();
-                showErrorMessage('與伺服器的連接已斷開，檢測已停止');
-            }
+            handleDetectionDisconnect(reason);
         });
         
         // 添加視頻幀更新事件監聽
         socket.on('video_frame', function(data) {
             if (videoFeed) {
                 if (data && data.frame) {
-                    // 確保 frame 是有效的 base64 字符串
+                    // 確保 frame 是有效的影像資料（二進位 JPEG 或 base64 字符串）
                     try {
-                        // 檢查 base64 字符串是否有效
-                        if (typeof data.frame === 'string' && data.frame.length > 100) {
-                            videoFeed.src = 'data:image/jpeg;base64,' + data.frame;
+                        if (isValidVideoFrame(data.frame)) {
+                            videoFeed.src = videoFrameToSrc(data.frame);
                             if (!socket.videoFrameReceived) {
                                 socket.videoFrameReceived = true;
                                 console.log('首次接收到視頻幀');
@@ -4206,6 +4385,10 @@ function initSocketConnection() {
             }
         });
         
+        // 關鍵點串流模式的姿態資料
+        socket.on('pose_frame', handlePoseFrame);
+        socket.on('redirect_node', handleRedirectNode);
+        
         // 添加運動計數更新事件
         socket.on('exercise_count', function(data) {
             console.log('收到運動計數更新:', data);
@@ -4550,11 +4733,18 @@ function sendStartDetectionRequest() {
         monster_hp: monsterHP,
         initial_monster_hp: initialMonsterHP,
         camera_index: cameraIndex,
-        client_timestamp: Date.now()
+        client_timestamp: Date.now(),
+        frame_transport: 'binary',  // 以二進位 JPEG 接收影像幀
+        stream_mode: streamMode,
+        frame_source: frameSource,
+        session_key: getDetectionSessionKey()
     };
     
     console.log('請求數據:', requestData);
 
+    // 關鍵點串流或客戶端上傳模式改用本地攝影機畫面
+    startLocalMedia();
+
     // 發送請求
     socket.emit('start_detection', requestData);
     console.log('已發送開始檢測請求，運動類型:', currentExerciseType, '關卡:', currentLevel || 1); // 使用全局變數
@@ -0,0 +1,122 @@
+"""/api/dashboard_data 的 keyset 分頁游標與查詢"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('flask_socketio')
+pytest.importorskip('flask_login')
+pytest.importorskip('flask_bcrypt')
+pytest.importorskip('mysql.connector')
+
+from app.routes.dashboard_routes import (  # noqa: E402
+    build_page_query, decode_cursor, encode_cursor, parse_page_args, stream_page
+)
+
+
+def normalize(query):
+    return ' '.join(query.split())
+
+
+def test_cursor_round_trip():
+    timestamp = datetime(2025, 3, 14, 15, 9, 26)
+    token = encode_cursor(timestamp, 42)
+
+    assert '=' not in token
+    assert decode_cursor(token) == (timestamp, 42)
+
+
+@pytest.mark.parametrize('token', ['not-a-cursor', '', 'WyIyMDI1Il0'])
+def test_invalid_cursor_is_rejected(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+
+def test_first_page_orders_by_timestamp_then_id():
+    query, params = build_page_query(parse_page_args({'limit': '20'}))
+
+    assert 'WHERE' not in normalize(query)
+    assert 'ORDER BY timestamp DESC, id DESC' in normalize(query)
+    assert params == [21]
+
+
+def test_next_page_breaks_timestamp_ties_on_id():
+    timestamp = datetime(2025, 3, 14, 15, 9, 26)
+    page = parse_page_args({'limit': '10', 'cursor': encode_cursor(timestamp, 7)})
+    query, params = build_page_query(page)
+
+    assert '(timestamp < %s OR (timestamp = %s AND id < %s))' in normalize(query)
+    assert params == [timestamp, timestamp, 7, 11]
+
+
+def test_filters_come_before_cursor_and_limit():
+    timestamp = datetime(2025, 3, 14, 15, 9, 26)
+    page = parse_page_args({
+        'student_id': 'S001', 'from': '2025-03-01', 'to': '2025-03-14',
+        'cursor': encode_cursor(timestamp, 7), 'fields': 'id,reps',
+    })
+    query, params = build_page_query(page)
+
+    assert normalize(query).startswith('SELECT id AS `id`, reps AS `reps`, timestamp AS _cursor_timestamp')
+    assert params == ['S001', datetime(2025, 3, 1), datetime(2025, 3, 15),
+                      timestamp, timestamp, 7, 101]
+
+
+def test_page_arguments_are_validated():
+    assert parse_page_args({'limit': '100000'})['limit'] == 1000
+    for args in ({'limit': '0'}, {'limit': 'x'}, {'fields': 'id,password'}, {'from': 'yesterday'}):
+        with pytest.raises(ValueError):
+            parse_page_args(args)
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.closed = False
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def make_rows(count):
+    start = datetime(2025, 3, 14, 12, 0, 0)
+    rows = []
+    for index in range(count):
+        # 每兩筆共用一個時間，由 id 決定先後
+        timestamp = start - timedelta(minutes=index // 2)
+        rows.append({'id': 100 - index, 'date': timestamp,
+                     '_cursor_timestamp': timestamp, '_cursor_id': 100 - index})
+    return rows
+
+
+def test_stream_page_emits_next_cursor_from_last_record():
+    rows = make_rows(4)
+    cursor, connection = FakeCursor(rows), FakeConnection()
+    body = json.loads(''.join(stream_page(connection, cursor, 3)))
+
+    assert body['success'] is True
+    assert [record['id'] for record in body['records']] == [100, 99, 98]
+    assert body['records'][0]['date'] == '2025-03-14 12:00:00'
+    assert body['has_more'] is True
+    assert decode_cursor(body['next_cursor']) == (datetime(2025, 3, 14, 11, 59, 0), 98)
+    assert cursor.closed and connection.closed
+
+
+def test_stream_page_last_page_has_no_cursor():
+    body = json.loads(''.join(stream_page(FakeConnection(), FakeCursor(make_rows(2)), 3)))
+
+    assert len(body['records']) == 2
+    assert body['has_more'] is False
+    assert body['next_cursor'] is None
@@ -0,0 +1,240 @@
+"""MySQL 連線池的名額計算與統計"""
+import gc
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('flask_socketio')
+pytest.importorskip('flask_login')
+pytest.importorskip('flask_bcrypt')
+pytest.importorskip('mysql.connector')
+
+from mysql.connector import Error  # noqa: E402
+
+from app import database  # noqa: E402
+from app.database import ConnectionPool  # noqa: E402
+
+
+class FakeRawConnection:
+    def __init__(self):
+        self.closed = False
+        self.connected = True
+        self.ping_error = False
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        if self.ping_error:
+            raise Error("連線已中斷")
+
+    def is_connected(self):
+        return self.connected and not self.closed
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnector:
+    """取代 mysql.connector.connect，記錄建立過的連線，可指定下一次失敗"""
+
+    def __init__(self):
+        self.created = []
+        self.failures = 0
+
+    def __call__(self, **config):
+        if self.failures:
+            self.failures -= 1
+            raise Error("無法連線")
+        raw = FakeRawConnection()
+        self.created.append(raw)
+        return raw
+
+
+@pytest.fixture
+def connector(monkeypatch):
+    connector = FakeConnector()
+    monkeypatch.setattr(database.mysql.connector, 'connect', connector)
+    return connector
+
+
+def make_pool(**kwargs):
+    kwargs.setdefault('size', 1)
+    kwargs.setdefault('max_overflow', 0)
+    kwargs.setdefault('timeout', 0.05)
+    return ConnectionPool({'host': 'localhost'}, **kwargs)
+
+
+def test_returned_connection_is_reused_after_rollback(connector):
+    pool = make_pool()
+    conn = pool.connect()
+    raw = conn._raw
+    conn.close()
+    conn.close()
+
+    again = pool.connect()
+    assert again._raw is raw
+    assert raw.rollbacks == 1
+    again.close()
+
+    stats = pool.get_stats()
+    assert stats['connects'] == 1
+    assert stats['checkouts'] == 2
+    assert stats['open'] == 1
+    assert stats['idle'] == 1
+
+
+def test_overflow_connections_are_closed_on_return(connector):
+    pool = make_pool(size=1, max_overflow=2)
+    conns = [pool.connect() for _ in range(3)]
+    assert pool.get_stats()['in_use'] == 3
+    assert pool.connect() is None
+
+    for conn in conns:
+        conn.close()
+
+    stats = pool.get_stats()
+    assert stats['open'] == 1
+    assert stats['idle'] == 1
+    assert [raw.closed for raw in connector.created] == [False, True, True]
+
+
+def test_exhausted_pool_times_out(connector):
+    pool = make_pool(timeout=0.05)
+    conn = pool.connect()
+
+    start = time.perf_counter()
+    assert pool.connect() is None
+    assert time.perf_counter() - start >= 0.05
+
+    stats = pool.get_stats()
+    assert stats['waits'] == 1
+    assert stats['timeouts'] == 1
+    assert stats['open'] == 1
+    conn.close()
+
+
+def test_waiter_receives_returned_connection(connector):
+    pool = make_pool(timeout=5)
+    conn = pool.connect()
+    raw = conn._raw
+    timer = threading.Timer(0.05, conn.close)
+    timer.start()
+
+    again = pool.connect()
+    timer.join()
+    assert again._raw is raw
+
+    stats = pool.get_stats()
+    assert stats['waits'] == 1
+    assert stats['timeouts'] == 0
+    assert stats['max_wait_ms'] > 0
+
+
+def test_connect_error_releases_reserved_slot(connector):
+    pool = make_pool()
+    connector.failures = 1
+    with pytest.raises(Error):
+        pool.connect()
+
+    stats = pool.get_stats()
+    assert stats['connect_errors'] == 1
+    assert stats['open'] == 0
+
+    conn = pool.connect()
+    assert conn is not None
+    conn.close()
+
+
+def test_failed_ping_replaces_idle_connection(connector):
+    pool = make_pool()
+    conn = pool.connect()
+    stale = conn._raw
+    conn.close()
+    stale.ping_error = True
+
+    fresh = pool.connect()
+    assert fresh._raw is not stale
+    assert stale.closed
+    fresh.close()
+
+    stats = pool.get_stats()
+    assert stats['ping_failures'] == 1
+    assert stats['connects'] == 2
+    assert stats['open'] == 1
+
+
+def test_ping_skipped_within_interval(connector):
+    pool = make_pool(ping_interval=60)
+    conn = pool.connect()
+    raw = conn._raw
+    conn.close()
+    raw.ping_error = True
+
+    again = pool.connect()
+    assert again._raw is raw
+    assert pool.get_stats()['ping_failures'] == 0
+    again.close()
+
+
+def test_old_connection_is_recycled(connector):
+    pool = make_pool(recycle=10)
+    conn = pool.connect()
+    old = conn._raw
+    conn.close()
+    raw, _, returned_at = pool._idle.popleft()
+    pool._idle.append((raw, time.time() - 60, returned_at))
+
+    fresh = pool.connect()
+    assert fresh._raw is not old
+    assert old.closed
+    fresh.close()
+
+    stats = pool.get_stats()
+    assert stats['recycled'] == 1
+    assert stats['open'] == 1
+
+
+def test_broken_connection_is_closed_on_return(connector):
+    pool = make_pool()
+    conn = pool.connect()
+    conn._raw.connected = False
+    conn.close()
+
+    stats = pool.get_stats()
+    assert stats['reset_failures'] == 1
+    assert stats['open'] == 0
+    assert stats['idle'] == 0
+    assert connector.created[0].closed
+
+
+def test_leaked_connection_releases_slot(connector):
+    pool = make_pool()
+    conn = pool.connect()
+    del conn
+    gc.collect()
+
+    stats = pool.get_stats()
+    assert stats['leaked'] == 1
+    assert stats['open'] == 0
+    assert connector.created[0].closed
+    assert pool.connect() is not None
+
+
+def test_dispose_closes_idle_and_keeps_in_use(connector):
+    pool = make_pool(size=2)
+    idle, busy = pool.connect(), pool.connect()
+    idle.close()
+
+    pool.dispose()
+    stats = pool.get_stats()
+    assert stats['open'] == 1
+    assert stats['idle'] == 0
+    assert connector.created[0].closed
+    assert not connector.created[1].closed
+
+    busy.close()
+    assert pool.get_stats()['open'] == 1
@@ -0,0 +1,68 @@
+"""斷線後保留檢測會話，寬限期內以相同 session_key 接回"""
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('flask_socketio')
+pytest.importorskip('flask_login')
+pytest.importorskip('flask_bcrypt')
+pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from app.config import Config  # noqa: E402
+from app.services import detection_session  # noqa: E402
+from app.services.node_registry import InMemoryNodeStore, NodeRegistry  # noqa: E402
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = NodeRegistry(store=InMemoryNodeStore(), node_id='node-a', public_url='http://node-a')
+    monkeypatch.setattr(NodeRegistry, '_instance', registry)
+    monkeypatch.setattr(detection_session, '_sessions', {})
+    monkeypatch.setattr(detection_session, '_retained', {})
+    return registry
+
+
+def start(registry, sid, session_key):
+    session = detection_session.get_session(sid)
+    assert registry.claim_session(session_key) == ('local', None)
+    session.node_session_key = session_key
+    session.detection_exercise_type = 'squat'
+    return session
+
+
+def test_disconnect_keeps_state_and_claim(registry, monkeypatch):
+    monkeypatch.setattr(Config, 'DETECTION_SESSION_GRACE_SECONDS', 30, raising=False)
+    session = start(registry, 'sid-1', 'key-1')
+    session.exercise_count = 7
+
+    detection_session.remove_session('sid-1')
+    assert registry.session_count == 1
+
+    resumed = detection_session.resume_session('sid-2', 'key-1')
+    assert resumed is session
+    assert resumed.sid == 'sid-2'
+    assert resumed.exercise_count == 7
+    assert detection_session.get_session('sid-2', create=False) is session
+    assert registry.session_count == 1
+
+
+def test_expired_session_releases_claim(registry, monkeypatch):
+    monkeypatch.setattr(Config, 'DETECTION_SESSION_GRACE_SECONDS', 30, raising=False)
+    start(registry, 'sid-1', 'key-1')
+    detection_session.remove_session('sid-1')
+
+    session, _ = detection_session._retained['key-1']
+    detection_session._retained['key-1'] = (session, 0)
+    detection_session.expire_retained_sessions()
+
+    assert registry.session_count == 0
+    assert detection_session.resume_session('sid-2', 'key-1') is None
+
+
+def test_disconnect_without_grace_releases_claim(registry, monkeypatch):
+    monkeypatch.setattr(Config, 'DETECTION_SESSION_GRACE_SECONDS', 0, raising=False)
+    start(registry, 'sid-1', 'key-1')
+
+    detection_session.remove_session('sid-1')
+    assert registry.session_count == 0
+    assert detection_session.resume_session('sid-2', 'key-1') is None
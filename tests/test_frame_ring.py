@@ -0,0 +1,42 @@
+"""影像環形緩衝區關閉時釋放共享記憶體"""
+from multiprocessing import shared_memory
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('flask_socketio')
+pytest.importorskip('flask_login')
+pytest.importorskip('flask_bcrypt')
+pytest.importorskip('numpy')
+
+from app.utils.frame_ring import FrameRing  # noqa: E402
+
+
+def test_close_unlinks_even_if_mapping_is_busy(monkeypatch):
+    ring = FrameRing(2, (4, 4, 3))
+    shm = ring._shm
+    name = ring.name
+
+    def busy_close():
+        # 處理執行緒逾時未結束、仍持有 FrameSlot 時 close() 會失敗
+        raise BufferError("cannot close exported pointers exist")
+
+    monkeypatch.setattr(shm, 'close', busy_close)
+    ring.close()
+
+    assert ring.closed
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+    monkeypatch.undo()
+    shm.close()
+
+
+def test_attached_ring_does_not_unlink():
+    ring = FrameRing(2, (4, 4, 3))
+    try:
+        attached = FrameRing.attach(ring.name, ring.slots, ring.shape)
+        attached.close()
+        shm = shared_memory.SharedMemory(name=ring.name)
+        shm.close()
+    finally:
+        ring.close()
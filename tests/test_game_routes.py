@@ -0,0 +1,98 @@
+"""遊戲路由寫入運動紀錄時同步更新每日彙總表"""
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('flask_socketio')
+pytest.importorskip('flask_login')
+pytest.importorskip('flask_bcrypt')
+pytest.importorskip('mysql.connector')
+
+from flask import Flask  # noqa: E402
+
+from app.routes import game_routes  # noqa: E402
+from app.services.stats_rollup import ROLLUP_TABLE  # noqa: E402
+
+
+class FakeCursor:
+    """記錄執行的 SQL，寫入 exercise_info 時給出 lastrowid"""
+
+    def __init__(self):
+        self.executed = []
+        self.lastrowid = None
+        self.rowcount = 0
+
+    def execute(self, query, params=None):
+        self.executed.append((' '.join(query.split()), params))
+        if 'INSERT INTO exercise_info' in query:
+            self.lastrowid = 41
+            self.rowcount = 1
+
+    def fetchone(self):
+        query = self.executed[-1][0]
+        if query.startswith('SELECT total_exp'):
+            return {'total_exp': 50}
+        return None
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.cursor_obj = FakeCursor()
+        self.committed = False
+
+    def cursor(self, dictionary=False, buffered=False):
+        return self.cursor_obj
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client_and_conn(monkeypatch):
+    conn = FakeConnection()
+    monkeypatch.setattr(game_routes, 'get_db_connection', lambda: conn)
+    monkeypatch.setattr(game_routes, 'invalidate_user_stats', lambda student_id: None)
+    app = Flask(__name__)
+    app.register_blueprint(game_routes.game_bp)
+    return app.test_client(), conn
+
+
+def rollup_upserts(cursor):
+    return [params for query, params in cursor.executed if f'INSERT INTO {ROLLUP_TABLE}' in query]
+
+
+def test_complete_level_updates_rollup(client_and_conn):
+    client, conn = client_and_conn
+    response = client.post('/api/game/complete_level', json={
+        'user_id': 'S001', 'level_id': 1, 'exercise_type': 'squat', 'reps': 10, 'sets': 3
+    })
+
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
+    assert rollup_upserts(conn.cursor_obj) == [(41,)]
+    assert conn.committed
+
+
+def test_record_exercise_updates_rollup(client_and_conn):
+    client, conn = client_and_conn
+    response = client.post('/api/exercise/record', json={
+        'student_id': 'S001', 'exercise_type': 'push-up', 'reps': 12, 'sets': 2
+    })
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['success'] is True
+    assert body['record_id'] == 41
+    assert rollup_upserts(conn.cursor_obj) == [(41,)]
+    assert conn.committed
@@ -0,0 +1,96 @@
+"""節點登錄的檢測會話歸屬與容量"""
+import threading
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('flask_socketio')
+pytest.importorskip('flask_login')
+pytest.importorskip('flask_bcrypt')
+
+from app.services.node_registry import InMemoryNodeStore, NodeRegistry  # noqa: E402
+
+
+def make_registry(store=None, node_id='node-a', max_sessions=0):
+    return NodeRegistry(store=store or InMemoryNodeStore(), node_id=node_id,
+                        public_url=f"http://{node_id}", max_sessions=max_sessions)
+
+
+def test_concurrent_claims_respect_capacity():
+    registry = make_registry(max_sessions=5)
+    barrier = threading.Barrier(40)
+    results = []
+    lock = threading.Lock()
+
+    def claim(index):
+        barrier.wait()
+        result, _ = registry.claim_session(f"session-{index}")
+        with lock:
+            results.append(result)
+
+    threads = [threading.Thread(target=claim, args=(index,)) for index in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count('local') == 5
+    assert results.count('full') == 35
+    assert registry.session_count == 5
+
+
+def test_claim_redirects_to_owner_node():
+    store = InMemoryNodeStore()
+    owner = make_registry(store, 'node-a')
+    other = make_registry(store, 'node-b')
+    owner.start()
+    try:
+        assert owner.claim_session('abc') == ('local', None)
+        result, node = other.claim_session('abc')
+        assert result == 'redirect'
+        assert node['node_id'] == 'node-a'
+
+        owner.release_session('abc')
+        assert other.claim_session('abc') == ('local', None)
+    finally:
+        owner.stop()
+
+
+class RacingStore(InMemoryNodeStore):
+    """讓兩個節點都先讀到「沒有歸屬」，再各自寫入"""
+
+    def __init__(self):
+        super().__init__()
+        self.barrier = threading.Barrier(2)
+        self.local = threading.local()
+
+    def get(self, key):
+        value = super().get(key)
+        if ':session:' in key and not getattr(self.local, 'waited', False):
+            self.local.waited = True
+            self.barrier.wait(timeout=5)
+        return value
+
+
+def test_simultaneous_claims_on_two_nodes_pick_one_owner():
+    store = RacingStore()
+    registries = [make_registry(store, 'node-a'), make_registry(store, 'node-b')]
+    for registry in registries:
+        registry._heartbeat()
+    results = {}
+
+    def claim(registry):
+        results[registry.node_id] = registry.claim_session('abc')
+
+    threads = [threading.Thread(target=claim, args=(registry,)) for registry in registries]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    owner = InMemoryNodeStore.get(store, 'ai-fitness:session:abc')
+    loser = 'node-b' if owner == 'node-a' else 'node-a'
+    assert results[owner] == ('local', None)
+    assert results[loser][0] == 'redirect'
+    assert results[loser][1]['node_id'] == owner
+    assert {registry.node_id: registry.session_count for registry in registries} == {owner: 1, loser: 0}
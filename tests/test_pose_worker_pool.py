@@ -0,0 +1,61 @@
+"""姿態推論池的結果重建與共享記憶體格的世代管理"""
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('flask_socketio')
+pytest.importorskip('flask_login')
+pytest.importorskip('flask_bcrypt')
+np = pytest.importorskip('numpy')
+
+from app.services.pose_worker_pool import _Worker  # noqa: E402
+
+
+@pytest.fixture
+def worker():
+    worker = _Worker(0, slots=2, slot_bytes=16, ctx=None)
+    yield worker
+    worker.shm.close()
+    worker.shm.unlink()
+
+
+def free_slots(worker):
+    return sorted(worker.free_slots.queue)
+
+
+def test_release_returns_slot(worker):
+    slot, generation = worker.acquire_slot(timeout=0.1)
+    assert free_slots(worker) == [1 - slot]
+
+    worker.release_slot(slot, generation)
+    assert free_slots(worker) == [0, 1]
+
+
+def test_stale_slot_is_dropped_after_restart(worker):
+    slot, generation = worker.acquire_slot(timeout=0.1)
+    worker.reset_slots()
+
+    # 重新啟動前取得的格在新世代已可用，舊請求歸還時不能再放入一次
+    worker.release_slot(slot, generation)
+    assert free_slots(worker) == [0, 1]
+    assert worker.generation == generation + 1
+
+
+def test_pooled_results_work_with_frame_inference():
+    pytest.importorskip('torch')
+    pytest.importorskip('ultralytics')
+    from app.services.frame_inference import FrameInference
+    from app.services.pose_worker_pool import build_results
+
+    frame = np.zeros((64, 64, 3), dtype=np.uint8)
+    boxes = np.array([[4.0, 6.0, 40.0, 60.0, 0.9, 0.0]], dtype=np.float32)
+    keypoints = np.zeros((1, 17, 3), dtype=np.float32)
+    keypoints[0, :, 0] = np.arange(17)
+    keypoints[0, :, 1] = np.arange(17) * 2
+    keypoints[0, :, 2] = 0.8
+    payload = (boxes, keypoints, {0: 'person'})
+
+    inference = FrameInference(frame, lambda source, **kwargs: [build_results(source, payload)])
+
+    np.testing.assert_allclose(inference.keypoints, keypoints[0, :, :2])
+    np.testing.assert_allclose(inference.keypoint_conf, keypoints[0, :, 2])
+    np.testing.assert_allclose(inference.boxes, boxes[:, :4])